@@ -5,10 +5,11 @@ import logging
 
 from functools import partial
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.device_registry import DeviceEntry
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.event import async_call_later
 
 from homeassistant.const import CONF_DEVICES
 from .const import (
@@ -20,8 +21,21 @@ from .const import (
     CONF_PIN,
     CONF_SCAN_INTERVAL,
     CONF_SCAN_INTERVAL_FAST,
+    CONF_FLEET_SCHEDULER,
+    CONF_TRACE_EXPORT,
+    DATA_CAPABILITIES,
+    DATA_JOURNAL,
+    STARTUP_POLL_DELAY,
+    STARTUP_POLL_STAGGER,
+    DEFAULT_FLEET_SCHEDULER,
+    DEFAULT_TRACE_EXPORT,
+    TRACE_EXPORT_FILE,
 )
+from .coordinator import snapshot_store
+from .fleet import async_get_scheduler
+from .loop_lag import async_get_lag_monitor
 from .helpers import getCoordinator
+from .services import async_setup_services
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -35,27 +49,34 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     if entry.entry_id not in hass.data[DOMAIN]:
         hass.data[DOMAIN][entry.entry_id] = {}
     hass.data[DOMAIN][entry.entry_id][CONF_DEVICES] = {}
+    _store_device_config(hass, entry)
+    entry.async_on_unload(async_get_lag_monitor(hass).async_track())
 
     # Create one coordinator for each device
     first_iteration = True
-    for device_id in entry.data[CONF_DEVICES]:
+    deferred = 0
+    for device_id, device_data in entry.data[CONF_DEVICES].items():
+        name = device_data[CONF_NAME]
+        coordinator = await _async_add_coordinator(hass, entry, device_id, device_data)
+
+        # With a snapshot from the last run the entities have values already,
+        # so the first poll can wait, staggered to keep fans off the proxies'
+        # connection slots at the same time.
+        if await coordinator.async_load_snapshot():
+            entry.async_on_unload(
+                async_call_later(
+                    hass,
+                    STARTUP_POLL_DELAY + deferred * STARTUP_POLL_STAGGER,
+                    partial(_async_deferred_refresh, hass, coordinator),
+                )
+            )
+            deferred += 1
+            continue
+
         if not first_iteration:
             await asyncio.sleep(10)
         first_iteration = False
 
-        device_data = entry.data[CONF_DEVICES][device_id]
-        name = device_data[CONF_NAME]
-        mac = device_data[CONF_MAC]
-
-        # Register device
-        device_registry = dr.async_get(hass)
-        dev = device_registry.async_get_or_create(
-            config_entry_id=entry.entry_id,
-            identifiers={(DOMAIN, mac)},
-            name=name
-        )
-
-        coordinator = getCoordinator(hass, device_data, dev)
         # Don't block setup on initial connection - let it happen in background
         try:
             await asyncio.wait_for(coordinator.async_request_refresh(), timeout=30)
@@ -64,8 +85,6 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         except Exception as e:
             _LOGGER.warning("Initial connection to %s failed, will retry in background: %s", name, e)
 
-        hass.data[DOMAIN][entry.entry_id][CONF_DEVICES][device_id] = coordinator
-
     # Avoid forwarding platforms multiple times
     if not hass.data[DOMAIN][entry.entry_id].get("forwarded"):
         await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
@@ -77,34 +96,57 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     entry.async_on_unload(entry.add_update_listener(update_listener))
 
     # Register services (only once across all entries)
-    if not hass.services.has_service(DOMAIN, "request_update"):
-        hass.services.async_register(DOMAIN, "request_update", partial(service_request_update, hass))
+    async_setup_services(hass)
 
     return True
 
-# Service-call to update values
-async def service_request_update(hass, call: ServiceCall):
-    """Handle the service call to update entities for a specific device."""
-    device_id = call.data.get("device_id")
-    if not device_id:
-        _LOGGER.error("Device ID is required")
-        return
 
-    # Get the device entry from the device registry
+async def _async_add_coordinator(
+    hass: HomeAssistant, entry: ConfigEntry, device_id: str, device_data: dict
+):
+    """Register a fan's device and create its coordinator."""
+    # Register device
     device_registry = dr.async_get(hass)
-    device_entry = device_registry.async_get(device_id)
-    if not device_entry:
-        _LOGGER.error("No device entry found for device ID %s", device_id)
-        return
+    dev = device_registry.async_get_or_create(
+        config_entry_id=entry.entry_id,
+        identifiers={(DOMAIN, device_data[CONF_MAC])},
+        name=device_data[CONF_NAME]
+    )
+
+    coordinator = getCoordinator(hass, device_data, dev)
+    if entry.data.get(CONF_FLEET_SCHEDULER, DEFAULT_FLEET_SCHEDULER):
+        coordinator.use_scheduler(async_get_scheduler(hass))
+    if entry.data.get(CONF_TRACE_EXPORT, DEFAULT_TRACE_EXPORT):
+        coordinator.export_traces(hass.config.path(TRACE_EXPORT_FILE))
+    hass.data[DOMAIN][entry.entry_id][CONF_DEVICES][device_id] = coordinator
+
+    await coordinator.async_load_capabilities()
+    await coordinator.async_load_journal()
+    return coordinator
+
+
+# Settings shared by all fans of an entry, applied when coordinators are created
+_FLEET_DEFAULTS = {
+    CONF_FLEET_SCHEDULER: DEFAULT_FLEET_SCHEDULER,
+    CONF_TRACE_EXPORT: DEFAULT_TRACE_EXPORT,
+}
+
 
-    # Find the coordinator corresponding to the given device ID
-    for entry_data in hass.data.get(DOMAIN, {}).values():
-        for coordinator in entry_data.get(CONF_DEVICES, {}).values():
-            if coordinator.device_id == device_id:
-                await coordinator._async_update_data()
-                return
+@callback
+def _store_device_config(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remember the configuration the coordinators were created from."""
+    hass.data[DOMAIN][entry.entry_id]["device_config"] = {
+        device_id: dict(device_data)
+        for device_id, device_data in entry.data[CONF_DEVICES].items()
+    }
+    for key, default in _FLEET_DEFAULTS.items():
+        hass.data[DOMAIN][entry.entry_id][key] = entry.data.get(key, default)
 
-    _LOGGER.warning("No coordinator found for device ID %s", device_id)
+
+@callback
+def _async_deferred_refresh(hass: HomeAssistant, coordinator, _now) -> None:
+    """First poll of a fan whose entities were populated from its snapshot."""
+    hass.async_create_task(coordinator.async_request_refresh())
 
 
 # Example migration function
@@ -119,18 +161,97 @@ async def async_migrate_entry(hass, config_entry: ConfigEntry):
 
 
 async def update_listener(hass: HomeAssistant, entry: ConfigEntry):
+    """Apply a changed configuration to the fans it concerns only.
+
+    Added fans get a coordinator and entities, removed fans are shut down
+    and forgotten, and edited fans take their new settings in place. The other fans keep
+    their connections and polls.
+    """
     _LOGGER.debug("Updating Pax BLE entry!")
-    await hass.config_entries.async_reload(entry.entry_id)
+    entry_data = hass.data[DOMAIN].get(entry.entry_id)
+    if entry_data is None:
+        return
+    old = entry_data["device_config"]
+    new = entry.data[CONF_DEVICES]
+    coordinators = entry_data[CONF_DEVICES]
+
+    # What a coordinator is built from cannot change in place
+    if any(
+        entry_data[key] != entry.data.get(key, default)
+        for key, default in _FLEET_DEFAULTS.items()
+    ):
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+    for device_id in old.keys() & new.keys():
+        if any(
+            old[device_id].get(key) != new[device_id].get(key)
+            for key in (CONF_NAME, CONF_MODEL, CONF_MAC)
+        ):
+            await hass.config_entries.async_reload(entry.entry_id)
+            return
+
+    removed = {
+        device_id: coordinators.pop(device_id, None) for device_id in old.keys() - new.keys()
+    }
+    if removed:
+        _LOGGER.debug("Shutting down %d removed fans", len(removed))
+        await asyncio.gather(
+            *(
+                _async_shutdown(coordinator)
+                for coordinator in removed.values()
+                if coordinator is not None
+            )
+        )
+        for device_id, coordinator in removed.items():
+            await _async_forget_device(hass, old[device_id][CONF_MAC], coordinator)
+
+    for device_id in old.keys() & new.keys():
+        if old[device_id] != new[device_id]:
+            coordinators[device_id].update_config(new[device_id])
+
+    for device_id in new.keys() - old.keys():
+        coordinator = await _async_add_coordinator(hass, entry, device_id, new[device_id])
+        for async_add_fan in entry_data.get("entity_adders", ()):
+            async_add_fan(coordinator)
+        entry.async_create_background_task(
+            hass, coordinator.async_request_refresh(), f"{DOMAIN} first poll {device_id}"
+        )
+
+    _store_device_config(hass, entry)
+
+
+async def _async_shutdown(coordinator) -> None:
+    await coordinator.async_shutdown()
+    await coordinator.disconnect()
+
+
+async def _async_forget_device(hass: HomeAssistant, mac: str, coordinator=None) -> None:
+    """Remove what is kept of a fan that was removed from the entry."""
+    dev_reg = dr.async_get(hass)
+    if (device := dev_reg.async_get_device({(DOMAIN, mac)})) is not None:
+        ent_reg = er.async_get(hass)
+        for ent in er.async_entries_for_device(
+            ent_reg, device.id, include_disabled_entities=True
+        ):
+            ent_reg.async_remove(ent.entity_id)
+        dev_reg.async_remove_device(device.id)
+
+    for records in (hass.data.get(DATA_CAPABILITIES), hass.data.get(DATA_JOURNAL)):
+        if records is not None:
+            records.async_remove(mac)
+    if coordinator is not None:
+        await coordinator.async_remove_snapshot()
+    else:
+        await snapshot_store(hass, mac).async_remove()
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     _LOGGER.debug("Unloading Pax BLE entry!")
 
-    # Make sure we are disconnected
+    # Stop polling and make sure we are disconnected, all fans at once
     devices = hass.data[DOMAIN].get(entry.entry_id, {}).get(CONF_DEVICES, {})
-    for dev_id, coordinator in devices.items():
-        await coordinator.disconnect()
+    await asyncio.gather(*(_async_shutdown(coordinator) for coordinator in devices.values()))
 
     # Unload entries
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
@@ -163,10 +284,20 @@ async def async_remove_config_entry_device(
         if dev_config[CONF_NAME] == device_entry.name:
             devices.append(dev_config[CONF_MAC])
 
-    new_data = config_entry.data.copy()
+    # Copied down to the devices, so the update listener sees the change
+    new_data = dict(config_entry.data)
+    new_data[CONF_DEVICES] = {
+        mac: dict(cfg) for mac, cfg in new_data[CONF_DEVICES].items()
+    }
+    capabilities = hass.data.get(DATA_CAPABILITIES)
+    journal = hass.data.get(DATA_JOURNAL)
     for dev in devices:
         # Remove device from config entry
         new_data[CONF_DEVICES].pop(dev)
+        if capabilities is not None:
+            capabilities.async_remove(dev)
+        if journal is not None:
+            journal.async_remove(dev)
     hass.config_entries.async_update_entry(config_entry, data=new_data)
     hass.config_entries._async_schedule_save()
 
@@ -0,0 +1,96 @@
+"""Per-device cache of probed capabilities and static device information."""
+
+import logging
+import time
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    CAPABILITY_MAX_AGE,
+    CAPABILITY_SAVE_DELAY,
+    CAPABILITY_STORAGE_VERSION,
+    DATA_CAPABILITIES,
+    DOMAIN,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CapabilityCache:
+    """What each fan supports, per MAC address and firmware revision.
+
+    A record holds the characteristics the fan's GATT table exposes, the
+    reads that failed on it, and the static device information that was
+    read. Records are reused across restarts until they are older than
+    CAPABILITY_MAX_AGE, or until the fan reports another firmware.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._store = Store(
+            hass, CAPABILITY_STORAGE_VERSION, f"{DOMAIN}.capabilities"
+        )
+        self._records: dict[str, dict] = {}
+
+    async def async_load(self) -> None:
+        try:
+            data = await self._store.async_load()
+        except Exception as err:
+            _LOGGER.warning("Could not load capability cache: %s", err)
+            data = None
+        self._records = (data or {}).get("devices", {})
+
+    def get(self, mac: str, fw_rev: str | None = None) -> dict | None:
+        """Return the record for mac, if it is fresh and for fw_rev (if given)."""
+        record = self._records.get(dr.format_mac(mac))
+        if record is None:
+            return None
+        if time.time() - record.get("probed_at", 0) > CAPABILITY_MAX_AGE:
+            return None
+        if fw_rev is not None and record.get("fw_rev") != fw_rev:
+            return None
+        return record
+
+    def unsupported(self, mac: str, fw_rev: str | None) -> frozenset[str]:
+        """Characteristics whose reads are known to fail on this firmware."""
+        record = self._records.get(dr.format_mac(mac))
+        if record is None or record.get("fw_rev") != fw_rev:
+            return frozenset()
+        return frozenset(record.get("unsupported", ()))
+
+    def async_set(
+        self,
+        mac: str,
+        fw_rev: str | None,
+        info: dict[str, str],
+        present: list[str] | None,
+        unsupported: list[str],
+    ) -> None:
+        self._records[dr.format_mac(mac)] = {
+            "fw_rev": fw_rev,
+            "info": info,
+            "present": present,
+            "unsupported": sorted(unsupported),
+            "probed_at": time.time(),
+        }
+        self._store.async_delay_save(self._data, CAPABILITY_SAVE_DELAY)
+
+    def async_remove(self, mac: str) -> None:
+        if self._records.pop(dr.format_mac(mac), None) is not None:
+            self._store.async_delay_save(self._data, CAPABILITY_SAVE_DELAY)
+
+    def as_dict(self, mac: str) -> dict | None:
+        return self._records.get(dr.format_mac(mac))
+
+    def _data(self) -> dict:
+        return {"devices": self._records}
+
+
+async def async_get_capability_cache(hass: HomeAssistant) -> CapabilityCache:
+    """Return the shared capability cache, loading it on first use."""
+    if (cache := hass.data.get(DATA_CAPABILITIES)) is None:
+        cache = CapabilityCache(hass)
+        hass.data[DATA_CAPABILITIES] = cache
+        await cache.async_load()
+    return cache
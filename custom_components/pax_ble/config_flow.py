@@ -1,9 +1,13 @@
 """Config flow to configure Pax integration"""
 
+import asyncio
 import logging
 import voluptuous as vol
 
-from homeassistant.components.bluetooth import BluetoothServiceInfoBleak
+from homeassistant.components.bluetooth import (
+    BluetoothServiceInfoBleak,
+    async_discovered_service_info,
+)
 from homeassistant.config_entries import ConfigEntry, ConfigFlow, OptionsFlow
 from homeassistant.core import HomeAssistant
 from homeassistant.data_entry_flow import FlowResult
@@ -11,7 +15,6 @@ from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers import selector
-from types import SimpleNamespace
 from typing import Any
 
 from .devices.base_device import BaseDevice
@@ -20,9 +23,13 @@ from homeassistant.const import CONF_DEVICES
 from .const import (
     CONF_ACTION,
     CONF_ADD_DEVICE,
+    CONF_BULK_ADD,
     CONF_WRONG_PIN_SELECTOR,
     CONF_EDIT_DEVICE,
     CONF_REMOVE_DEVICE,
+    CONF_FLEET_SETTINGS,
+    CONF_FLEET_SCHEDULER,
+    CONF_TRACE_EXPORT,
 )
 from .const import (
     DOMAIN,
@@ -32,14 +39,30 @@ from .const import (
     CONF_PIN,
     CONF_SCAN_INTERVAL,
     CONF_SCAN_INTERVAL_FAST,
+    CONF_SIGNIFICANT_CHANGE,
+    CONF_MAX_SILENCE,
+    CONF_DEADBAND_SCALE,
+    CONF_WRITE_BEHIND,
+    CONF_PRIORITY,
 )
 from .const import DEFAULT_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL_FAST
-from .const import DeviceModel
+from .const import DEFAULT_SIGNIFICANT_CHANGE, DEFAULT_MAX_SILENCE, DEFAULT_WRITE_BEHIND
+from .const import DEFAULT_DEADBAND_SCALE
+from .const import DEFAULT_PRIORITY, PRIORITY_AIRTIME_SHARE, DEFAULT_FLEET_SCHEDULER
+from .const import DEFAULT_TRACE_EXPORT
+from .const import BULK_ADD_CONCURRENCY, DeviceModel
 from .device_lookup import device_in_map
-from .helpers import getCoordinator
+from .fleet import async_get_slots
+from .helpers import getDevice
 
 CONFIG_ENTRY_NAME = "Pax BLE"
 SELECTED_DEVICE = "selected_device"
+SELECTED_DEVICES = "selected_devices"
+
+# Models whose PIN can be found when left out: read from a Levante after a
+# power cycle, asked from a Svensa by pairing
+PIN_DISCOVERY_MODELS = (DeviceModel.LEVANTE,)
+PAIRING_MODELS = (DeviceModel.SVENSA,)
 
 DEVICE_DATA = {
     CONF_NAME: "",
@@ -48,6 +71,11 @@ DEVICE_DATA = {
     CONF_PIN: "",
     CONF_SCAN_INTERVAL: DEFAULT_SCAN_INTERVAL,
     CONF_SCAN_INTERVAL_FAST: DEFAULT_SCAN_INTERVAL_FAST,
+    CONF_SIGNIFICANT_CHANGE: DEFAULT_SIGNIFICANT_CHANGE,
+    CONF_MAX_SILENCE: DEFAULT_MAX_SILENCE,
+    CONF_DEADBAND_SCALE: DEFAULT_DEADBAND_SCALE,
+    CONF_WRITE_BEHIND: DEFAULT_WRITE_BEHIND,
+    CONF_PRIORITY: DEFAULT_PRIORITY,
 }
 
 _LOGGER = logging.getLogger(__name__)
@@ -117,10 +145,7 @@ class PaxConfigFlowHandler(ConfigFlow, domain=DOMAIN):
         return await self.async_step_add_device()
 
     def try_get_model(self, name: str) -> DeviceModel | None:
-        for model in DeviceModel:
-            if model.value.lower() in name.lower():
-                return model
-        return None
+        return model_from_name(name)
 
     """##################################################
     ##################### ADD DEVICE ####################
@@ -134,17 +159,8 @@ class PaxConfigFlowHandler(ConfigFlow, domain=DOMAIN):
             user_input is None
             and self.device_data.get(CONF_MODEL) == DeviceModel.LEVANTE
         ):
-            # Levante exposes its PIN via a readable GATT characteristic
-            # after a reboot. So we can try to auto-discover the PIN.
-            try:
-                fan = BaseDevice(self.hass, self.device_data[CONF_MAC], 0)
-                if await fan.connect():
-                    pin = await fan.getAuth()
-                    if pin != 0:
-                        self.device_data[CONF_PIN] = str(pin)
-                    await fan.disconnect()
-            except Exception:
-                _LOGGER.warning("Failed to auto-discover PIN for %s", self.device_data[CONF_MAC], exc_info=True)
+            if pin := await discover_levante_pin(self.hass, self.device_data[CONF_MAC]):
+                self.device_data[CONF_PIN] = pin
 
         if user_input is not None:
             dev_mac = dr.format_mac(user_input[CONF_MAC])
@@ -154,17 +170,11 @@ class PaxConfigFlowHandler(ConfigFlow, domain=DOMAIN):
                     description_placeholders={"dev_name": dev_mac},
                 )
 
-            fan = BaseDevice(self.hass, dev_mac, user_input[CONF_PIN])
-
-            if await fan.connect():
-                await fan.setAuth(user_input[CONF_PIN])
-
-                if not self.accept_wrong_pin:
-                    pin_verified = await fan.checkAuth()
-                else:
-                    pin_verified = True
-                await fan.disconnect()
+            pin_verified = await check_device_pin(
+                self.hass, dev_mac, user_input[CONF_PIN], not self.accept_wrong_pin
+            )
 
+            if pin_verified is not None:
                 if pin_verified:
                     device_cfg = dict(user_input)
                     device_cfg[CONF_MAC] = dev_mac
@@ -252,6 +262,8 @@ class PaxOptionsFlowHandler(OptionsFlow):
         self.selected_device = None  # Mac address / key
         self.device_data = DEVICE_DATA.copy()  # Data of "current" device
         self.accept_wrong_pin = False
+        self.discovered = {}  # Mac address -> data of fans found for bulk add
+        self.selected = []  # Mac addresses of the fans picked for bulk add
 
     async def async_step_init(self, user_input: dict[str, Any] | None = None):
         # Manage the options for the custom component."""
@@ -259,10 +271,14 @@ class PaxOptionsFlowHandler(OptionsFlow):
         if user_input is not None:
             if user_input.get(CONF_ACTION) == CONF_ADD_DEVICE:
                 return await self.async_step_add_device()
+            if user_input.get(CONF_ACTION) == CONF_BULK_ADD:
+                return await self.async_step_bulk_add()
             if user_input.get(CONF_ACTION) == CONF_EDIT_DEVICE:
                 return await self.async_step_select_edit_device()
             if user_input.get(CONF_ACTION) == CONF_REMOVE_DEVICE:
                 return await self.async_step_remove_device()
+            if user_input.get(CONF_ACTION) == CONF_FLEET_SETTINGS:
+                return await self.async_step_fleet_settings()
 
         return self.async_show_form(step_id="init", data_schema=CONFIGURE_SCHEMA)
 
@@ -289,17 +305,11 @@ class PaxOptionsFlowHandler(OptionsFlow):
                     },
                 )
 
-            fan = BaseDevice(self.hass, dev_mac, user_input[CONF_PIN])
-
-            if await fan.connect():
-                await fan.setAuth(user_input[CONF_PIN])
-
-                if not self.accept_wrong_pin:
-                    pin_verified = await fan.checkAuth()
-                else:
-                    pin_verified = True
-                await fan.disconnect()
+            pin_verified = await check_device_pin(
+                self.hass, dev_mac, user_input[CONF_PIN], not self.accept_wrong_pin
+            )
 
+            if pin_verified is not None:
                 if pin_verified:
                     device_cfg = dict(user_input)
                     device_cfg[CONF_MAC] = dev_mac
@@ -337,6 +347,107 @@ class PaxOptionsFlowHandler(OptionsFlow):
             step_id="add_device", data_schema=data_schema, errors=errors
         )
 
+    """##################################################
+    ###################### BULK ADD #####################
+    ##################################################"""
+
+    async def async_step_bulk_add(self, user_input=None):
+        """Handler for picking the discovered fans to add at once."""
+        errors = {}
+
+        if user_input is not None:
+            self.selected = [
+                mac for mac in user_input[SELECTED_DEVICES] if mac in self.discovered
+            ]
+            if self.selected:
+                return await self.async_step_bulk_add_pins()
+            errors["base"] = "no_devices_selected"
+
+        self.discovered = {}
+        for service_info in async_discovered_service_info(self.hass, connectable=True):
+            mac = dr.format_mac(service_info.address)
+            model = model_from_name(service_info.name)
+            if model is None or mac in self.discovered or self.device_exists(mac):
+                continue
+            # Fans of one model all advertise the same name
+            name = f"{service_info.name} {mac[-5:].replace(':', '')}"
+            self.discovered[mac] = dict(
+                DEVICE_DATA, **{CONF_NAME: name, CONF_MODEL: model.value, CONF_MAC: mac}
+            )
+
+        if not self.discovered:
+            return self.async_abort(reason="no_devices_found")
+
+        return self.async_show_form(
+            step_id="bulk_add",
+            data_schema=getDeviceSchemaBulkAdd(
+                {mac: data[CONF_NAME] for mac, data in self.discovered.items()}
+            ),
+            errors=errors,
+        )
+
+    async def async_step_bulk_add_pins(self, user_input=None):
+        """Handler for the PIN of each fan picked for bulk add."""
+        devices = {
+            f"{self.discovered[mac][CONF_NAME]} ({mac})": self.discovered[mac]
+            for mac in self.selected
+        }
+
+        if user_input is not None:
+            selected = [
+                dict(data, **{CONF_PIN: user_input.get(label, "")})
+                for label, data in devices.items()
+            ]
+            return await self._async_bulk_add(selected)
+
+        return self.async_show_form(
+            step_id="bulk_add_pins", data_schema=getDeviceSchemaBulkAddPins(devices)
+        )
+
+    async def _async_bulk_add(self, selected):
+        """Verify the selected fans concurrently and add the verified ones."""
+        limit = asyncio.Semaphore(BULK_ADD_CONCURRENCY)
+
+        async def verify(device_data) -> str:
+            async with limit:
+                try:
+                    return await verify_new_device(self.hass, device_data)
+                except Exception as e:
+                    _LOGGER.warning(
+                        "Could not verify %s: %s", device_data[CONF_MAC], e
+                    )
+                    return "failed"
+
+        outcomes = await asyncio.gather(*(verify(data) for data in selected))
+
+        added = [data for data, outcome in zip(selected, outcomes) if outcome == "verified"]
+        if added:
+            # One update, so the entry sets up every new fan in one go
+            new_data = dict(self.config_entry.data)
+            new_data[CONF_DEVICES] = {
+                mac: dict(cfg) for mac, cfg in new_data[CONF_DEVICES].items()
+            }
+            for data in added:
+                new_data[CONF_DEVICES][data[CONF_MAC]] = data
+            self.hass.config_entries.async_update_entry(
+                self.config_entry, data=new_data
+            )
+            abort_discovery_flows(self.hass, {data[CONF_MAC] for data in added})
+
+        results = "\n".join(
+            f"- {data[CONF_NAME]} ({data[CONF_MAC]}): {outcome.replace('_', ' ')}"
+            for data, outcome in zip(selected, outcomes)
+        )
+        _LOGGER.debug("Bulk add results:\n%s", results)
+        return self.async_abort(
+            reason="bulk_add_result",
+            description_placeholders={
+                "added": str(len(added)),
+                "total": str(len(selected)),
+                "results": results,
+            },
+        )
+
     """##################################################
     #################### PAIR DEVICE ####################
     ##################################################"""
@@ -345,24 +456,11 @@ class PaxOptionsFlowHandler(OptionsFlow):
         """Handler for pairing device."""
         errors = {}
 
-        # Initialize the BaseDevice
-        fan = BaseDevice(
-            self.hass, self.device_data[CONF_MAC], self.device_data[CONF_PIN]
-        )
-
-        # Attempt to connect to the device
-        if await fan.connect():
-            try:
-                # Attempt to pair the device
-                result = await fan.pair()
-                self.device_data[CONF_PIN] = result
-            except Exception as e:
-                # Log the error and add a user-friendly message
-                _LOGGER.error(f"Error during pairing: {e}")
-                errors["base"] = "pairing_failed"
-        else:
-            # Handle connection failure
-            errors["base"] = "connection_failed"
+        result, error = await attempt_pair_device(self.hass, self.device_data)
+        if not result:
+            errors["base"] = (
+                "connection_failed" if error == "cannot_connect" else "pairing_failed"
+            )
 
         # Return the next step with any errors
         return await self.async_step_add_device(errors=errors)
@@ -507,6 +605,25 @@ class PaxOptionsFlowHandler(OptionsFlow):
             errors=errors,
         )
 
+    """##################################################
+    ################### FLEET SETTINGS ##################
+    ##################################################"""
+
+    async def async_step_fleet_settings(self, user_input=None):
+        """Handler for settings shared by all devices."""
+        if user_input is not None:
+            new_data = dict(self.config_entry.data)
+            new_data.update(user_input)
+            self.hass.config_entries.async_update_entry(
+                self.config_entry, data=new_data
+            )
+            return self.async_abort(reason="fleet_settings_saved")
+
+        return self.async_show_form(
+            step_id="fleet_settings",
+            data_schema=getFleetSchema(self.config_entry.data),
+        )
+
     async def async_remove_device(self, entry_id, mac) -> None:
         """Remove device"""
         device_id = None
@@ -530,7 +647,13 @@ class PaxOptionsFlowHandler(OptionsFlow):
 """                      Static schemas                 """
 """ ################################################ """
 
-CONF_ACTIONS = [CONF_ADD_DEVICE, CONF_EDIT_DEVICE, CONF_REMOVE_DEVICE]
+CONF_ACTIONS = [
+    CONF_ADD_DEVICE,
+    CONF_BULK_ADD,
+    CONF_EDIT_DEVICE,
+    CONF_REMOVE_DEVICE,
+    CONF_FLEET_SETTINGS,
+]
 CONFIGURE_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_ACTION): selector.SelectSelector(
@@ -546,6 +669,13 @@ CONFIGURE_SCHEMA = vol.Schema(
 """ ################################################### """
 
 
+PRIORITY_SELECTOR = selector.SelectSelector(
+    selector.SelectSelectorConfig(
+        options=list(PRIORITY_AIRTIME_SHARE), translation_key=CONF_PRIORITY
+    ),
+)
+
+
 # Schema taking device details when adding
 def getDeviceSchemaAdd(user_input: dict[str, Any] | None = None) -> vol.Schema:
     DEVICE_MODELS = list(DeviceModel)
@@ -570,6 +700,28 @@ def getDeviceSchemaAdd(user_input: dict[str, Any] | None = None) -> vol.Schema:
             vol.Optional(
                 CONF_SCAN_INTERVAL_FAST, default=user_input[CONF_SCAN_INTERVAL_FAST]
             ): vol.All(vol.Coerce(int), vol.Range(min=5, max=999)),
+            vol.Optional(
+                CONF_SIGNIFICANT_CHANGE,
+                default=user_input.get(
+                    CONF_SIGNIFICANT_CHANGE, DEFAULT_SIGNIFICANT_CHANGE
+                ),
+            ): cv.boolean,
+            vol.Optional(
+                CONF_MAX_SILENCE,
+                default=user_input.get(CONF_MAX_SILENCE, DEFAULT_MAX_SILENCE),
+            ): vol.All(vol.Coerce(int), vol.Range(min=60, max=86400)),
+            vol.Optional(
+                CONF_DEADBAND_SCALE,
+                default=user_input.get(CONF_DEADBAND_SCALE, DEFAULT_DEADBAND_SCALE),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0.1, max=10)),
+            vol.Optional(
+                CONF_WRITE_BEHIND,
+                default=user_input.get(CONF_WRITE_BEHIND, DEFAULT_WRITE_BEHIND),
+            ): cv.boolean,
+            vol.Optional(
+                CONF_PRIORITY,
+                default=user_input.get(CONF_PRIORITY, DEFAULT_PRIORITY),
+            ): PRIORITY_SELECTOR,
         }
     )
 
@@ -589,6 +741,28 @@ def getDeviceSchemaEdit(user_input: dict[str, Any] | None = None) -> vol.Schema:
             vol.Optional(
                 CONF_SCAN_INTERVAL_FAST, default=user_input[CONF_SCAN_INTERVAL_FAST]
             ): vol.All(vol.Coerce(int), vol.Range(min=5, max=999)),
+            vol.Optional(
+                CONF_SIGNIFICANT_CHANGE,
+                default=user_input.get(
+                    CONF_SIGNIFICANT_CHANGE, DEFAULT_SIGNIFICANT_CHANGE
+                ),
+            ): cv.boolean,
+            vol.Optional(
+                CONF_MAX_SILENCE,
+                default=user_input.get(CONF_MAX_SILENCE, DEFAULT_MAX_SILENCE),
+            ): vol.All(vol.Coerce(int), vol.Range(min=60, max=86400)),
+            vol.Optional(
+                CONF_DEADBAND_SCALE,
+                default=user_input.get(CONF_DEADBAND_SCALE, DEFAULT_DEADBAND_SCALE),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0.1, max=10)),
+            vol.Optional(
+                CONF_WRITE_BEHIND,
+                default=user_input.get(CONF_WRITE_BEHIND, DEFAULT_WRITE_BEHIND),
+            ): cv.boolean,
+            vol.Optional(
+                CONF_PRIORITY,
+                default=user_input.get(CONF_PRIORITY, DEFAULT_PRIORITY),
+            ): PRIORITY_SELECTOR,
         }
     )
 
@@ -606,6 +780,58 @@ def getDeviceSchemaSelect(devices: dict[str, Any] | None = None) -> vol.Schema:
     return data_schema
 
 
+# Schema for picking the discovered fans to add
+def getDeviceSchemaBulkAdd(devices: dict[str, str]) -> vol.Schema:
+    schema_devices = {
+        dev_key: f"{dev_name} ({dev_key})" for dev_key, dev_name in devices.items()
+    }
+
+    data_schema = vol.Schema(
+        {
+            vol.Required(
+                SELECTED_DEVICES, default=list(schema_devices)
+            ): cv.multi_select(schema_devices),
+        }
+    )
+
+    return data_schema
+
+
+# Schema taking the PIN of each fan to add, keyed by its label. Only fans
+# whose PIN can be found otherwise may go without.
+def getDeviceSchemaBulkAddPins(devices: dict[str, dict[str, Any]]) -> vol.Schema:
+    data_schema = vol.Schema(
+        {
+            (
+                vol.Optional(dev_label, default="")
+                if data[CONF_MODEL] in PIN_DISCOVERY_MODELS + PAIRING_MODELS
+                else vol.Required(dev_label)
+            ): cv.string
+            for dev_label, data in devices.items()
+        }
+    )
+
+    return data_schema
+
+
+# Schema taking the settings shared by all devices
+def getFleetSchema(entry_data: dict[str, Any]) -> vol.Schema:
+    data_schema = vol.Schema(
+        {
+            vol.Optional(
+                CONF_FLEET_SCHEDULER,
+                default=entry_data.get(CONF_FLEET_SCHEDULER, DEFAULT_FLEET_SCHEDULER),
+            ): cv.boolean,
+            vol.Optional(
+                CONF_TRACE_EXPORT,
+                default=entry_data.get(CONF_TRACE_EXPORT, DEFAULT_TRACE_EXPORT),
+            ): cv.boolean,
+        }
+    )
+
+    return data_schema
+
+
 # Schema for accepting wrong pin
 MENU_WRONG_PIN_VALUES = ["accept", "decline", "pair"]
 MENU_WRONG_PIN_SCHEMA = vol.Schema(
@@ -623,18 +849,102 @@ MENU_WRONG_PIN_SCHEMA = vol.Schema(
 """ ################################################### """
 
 
+def model_from_name(name: str | None) -> DeviceModel | None:
+    """The model a fan advertises in its name, if any."""
+    for model in DeviceModel:
+        if model.value.lower() in (name or "").lower():
+            return model
+    return None
+
+
+def abort_discovery_flows(hass, macs: set[str]) -> None:
+    """Abort the discovery flows of fans that have been added by other means."""
+    for flow in hass.config_entries.flow.async_progress_by_handler(DOMAIN):
+        if flow["context"].get("unique_id") in macs:
+            hass.config_entries.flow.async_abort(flow["flow_id"])
+
+
+async def discover_levante_pin(hass, mac) -> str | None:
+    """Read the PIN of a Levante.
+
+    Levante exposes its PIN via a readable GATT characteristic after a
+    reboot, so it can be discovered rather than entered.
+    """
+    try:
+        fan = BaseDevice(hass, mac, 0)
+        async with fan.operation_lock:
+            if await fan.connect():
+                try:
+                    pin = await fan.getAuth()
+                    if pin != 0:
+                        return str(pin)
+                finally:
+                    await fan.disconnect()
+    except Exception:
+        _LOGGER.warning("Failed to auto-discover PIN for %s", mac, exc_info=True)
+    return None
+
+
+async def verify_new_device(hass, device_data) -> str:
+    """Verify the PIN of a fan to be added, pairing it if it can be.
+
+    An empty PIN of a Levante is discovered first. A model that can pair
+    is paired when its PIN is empty or not accepted, and the PIN found is
+    stored in device_data. Returns "verified", "wrong_pin",
+    "cannot_connect" or "pairing_failed".
+    """
+    mac = device_data[CONF_MAC]
+    # Counted against the slots of the fan's route, like the polls. No
+    # coordinator holds the lock of a fan that is not configured yet.
+    async with async_get_slots(hass).acquire(mac):
+        if not device_data[CONF_PIN] and device_data[CONF_MODEL] in PIN_DISCOVERY_MODELS:
+            device_data[CONF_PIN] = await discover_levante_pin(hass, mac) or ""
+
+        if device_data[CONF_PIN]:
+            pin_verified = await check_device_pin(hass, mac, device_data[CONF_PIN])
+            if pin_verified is None:
+                return "cannot_connect"
+            if pin_verified:
+                return "verified"
+
+        if device_data[CONF_MODEL] not in PAIRING_MODELS:
+            return "wrong_pin"
+        result, error = await attempt_pair_device(hass, device_data)
+        if result:
+            return "verified"
+        return "cannot_connect" if error == "cannot_connect" else "pairing_failed"
+
+
+async def check_device_pin(hass, mac, pin, check: bool = True) -> bool | None:
+    """Set the PIN on a fan and, if check is set, whether it was accepted.
+
+    None if the fan cannot be connected. The link is borrowed through the
+    connection manager, after any poll or write of a running coordinator.
+    """
+    fan = BaseDevice(hass, mac, pin)
+    async with fan.operation_lock:
+        if not await fan.connect():
+            return None
+        try:
+            await fan.setAuth(pin)
+            return await fan.checkAuth() if check else True
+        finally:
+            await fan.disconnect()
+
+
 async def attempt_pair_device(hass, device_data):
     """Helper method to attempt pairing a device."""
-    device = SimpleNamespace(name="Config Flow Device")
-    coordinator = getCoordinator(hass, device_data, device)
+    fan = getDevice(hass, device_data)
 
-    if await coordinator._fan.connect():
+    async with fan.operation_lock:
+        if not await fan.connect():
+            return False, "cannot_connect"
         try:
-            result = await coordinator._fan.pair()
+            result = await fan.pair()
             device_data[CONF_PIN] = result
             return True, None
         except Exception as e:
             _LOGGER.error(f"Error during pairing: {e}")
             return False, str(e)
-    else:
-        return False, "cannot_connect"
+        finally:
+            await fan.disconnect()
@@ -14,9 +14,13 @@ PLATFORMS = [
 # Configuration Constants
 CONF_ACTION = "action"
 CONF_ADD_DEVICE = "add_device"
+CONF_BULK_ADD = "bulk_add"
 CONF_WRONG_PIN_SELECTOR = "wrong_pin_selector"
 CONF_EDIT_DEVICE = "edit_device"
 CONF_REMOVE_DEVICE = "remove_device"
+CONF_FLEET_SETTINGS = "fleet_settings"
+CONF_FLEET_SCHEDULER = "fleet_scheduler"
+CONF_TRACE_EXPORT = "trace_export"
 
 # Configuration Device Constants
 CONF_NAME: str = "name"
@@ -25,10 +29,110 @@ CONF_MAC: str = "mac"
 CONF_PIN: str = "pin"
 CONF_SCAN_INTERVAL: str = "scan_interval"
 CONF_SCAN_INTERVAL_FAST: str = "scan_interval_fast"
+CONF_SIGNIFICANT_CHANGE: str = "significant_change"
+CONF_MAX_SILENCE: str = "max_silence"
+CONF_DEADBAND_SCALE: str = "deadband_scale"
+CONF_WRITE_BEHIND: str = "write_behind"
+CONF_PRIORITY: str = "priority"
 
 # Defaults
 DEFAULT_SCAN_INTERVAL: int = 300  # Seconds
 DEFAULT_SCAN_INTERVAL_FAST: int = 5  # Seconds
+DEFAULT_SIGNIFICANT_CHANGE: bool = False
+DEFAULT_MAX_SILENCE: int = 900  # Seconds
+DEFAULT_DEADBAND_SCALE: float = 1.0  # Multiplier of the per-sensor deadbands
+DEFAULT_WRITE_BEHIND: bool = False
+DEFAULT_PRIORITY: str = "normal"
+
+# Local extrapolation of boost/pause countdowns between polls
+COUNTDOWN_TICK_INTERVAL: int = 10  # Seconds
+
+# Persistent state snapshot per fan
+SNAPSHOT_STORAGE_VERSION: int = 1
+SNAPSHOT_SAVE_DELAY: int = 60  # Seconds
+
+# Capabilities and device information probed per fan, shared by all entries
+DATA_CAPABILITIES: str = f"{DOMAIN}_capabilities"
+CAPABILITY_STORAGE_VERSION: int = 1
+CAPABILITY_SAVE_DELAY: int = 10  # Seconds
+CAPABILITY_MAX_AGE: int = 30 * 24 * 3600  # Seconds
+
+# Writes queued for unreachable fans, shared by all entries
+DATA_JOURNAL: str = f"{DOMAIN}_journal"
+JOURNAL_STORAGE_VERSION: int = 1
+JOURNAL_SAVE_DELAY: int = 5  # Seconds
+JOURNAL_RETRY_DELAY: int = 10  # Seconds from queueing a write to trying it
+
+# One BLE link per fan, shared by coordinators and config flows
+DATA_CONNECTIONS: str = f"{DOMAIN}_connections"
+
+# Sessions running at once through each Bluetooth adapter or proxy
+DATA_FLEET: str = f"{DOMAIN}_fleet"
+PROXY_CONNECTION_SLOTS: int = 3
+
+# Polls of all fans planned by one timer, when enabled for the entry
+DATA_SCHEDULER: str = f"{DOMAIN}_scheduler"
+DEFAULT_FLEET_SCHEDULER: bool = False
+SCHEDULER_BATCH_WINDOW: int = 15  # Seconds a poll is brought forward to share a route
+
+# Traces of the latest sessions per fan, optionally appended to a file
+TRACE_CAPACITY: int = 25
+DEFAULT_TRACE_EXPORT: bool = False
+TRACE_EXPORT_FILE: str = "pax_ble_traces.jsonl"  # In the config directory
+TRACE_EXPORT_MAX_BYTES: int = 5 * 1024 * 1024  # Rotated past this size
+
+# Event loop lag above which routine polls and optional steps are deferred
+DATA_LOOP_LAG: str = f"{DOMAIN}_loop_lag"
+LOOP_LAG_INTERVAL: float = 1.0  # Seconds between samples
+LOOP_LAG_SAMPLES: int = 5  # Worst of these is the current lag
+LOOP_LAG_THRESHOLD: float = 0.25  # Seconds
+LOOP_LAG_MAX_DEFER: int = 60  # Seconds
+LOOP_LAG_DECISIONS: int = 50  # Kept for diagnostics
+
+# Airtime budget of each route: routine polls of a fan wait while the route's
+# sessions took more than its priority's share of the window. Writes, write
+# verifications and requested updates never wait.
+AIRTIME_WINDOW: int = 300  # Seconds
+AIRTIME_MAX_DEFER: int = 120  # Seconds
+PRIORITY_AIRTIME_SHARE: dict[str, float | None] = {
+    "high": None,
+    "normal": 0.5,
+    "low": 0.25,
+}
+
+# Fans verified at once when adding all discovered fans
+BULK_ADD_CONCURRENCY: int = 4
+
+# Hot paths profiled on demand by the profile service
+PROFILE_DEFAULT_DURATION: int = 60  # Seconds
+PROFILE_MAX_DURATION: int = 1800  # Seconds
+PROFILE_REPORT_FILE: str = "pax_ble_profile.{}.json"  # In the config directory
+
+# Links opened ahead of a write by the prepare service
+PREPARE_DEFAULT_TTL: int = 30  # Seconds
+PREPARE_MAX_TTL: int = 300  # Seconds
+
+# Services
+SERVICE_REQUEST_UPDATE: str = "request_update"
+SERVICE_EXECUTE: str = "execute"
+SERVICE_GROUP_COMMAND: str = "group_command"
+SERVICE_EXPORT_CONFIG: str = "export_config"
+SERVICE_APPLY_CONFIG: str = "apply_config"
+SERVICE_PREPARE: str = "prepare"
+SERVICE_PROFILE: str = "profile"
+# Format of the configuration snapshots exported and applied by the services
+CONFIG_SNAPSHOT_VERSION: int = 1
+DATA_UPDATE_REQUESTS: str = f"{DOMAIN}_update_requests"
+REQUEST_UPDATE_CONCURRENCY: int = 3  # Fans refreshed at once, across entries
+REQUEST_UPDATE_DEDUPE_WINDOW: int = 10  # Seconds
+
+# First poll of fans restored from a snapshot: delay, plus stagger per fan
+STARTUP_POLL_DELAY: int = 30  # Seconds
+STARTUP_POLL_STAGGER: int = 10  # Seconds
+
+# Rolling statistics over recent sensor samples
+TREND_WINDOWS: tuple[int, ...] = (300, 900, 3600)  # Seconds
+TREND_CAPACITY: int = 720  # Samples kept per fan
 
 
 # Device models
@@ -2,17 +2,135 @@ import asyncio
 import async_timeout
 import datetime as dt
 import logging
+import time
 
 from abc import ABC, abstractmethod
+from collections import namedtuple
+from collections.abc import AsyncIterator, Callable, Iterable
+from contextlib import AsyncExitStack, asynccontextmanager
+from homeassistant.core import CALLBACK_TYPE, callback
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.device_registry import DeviceEntry
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-from typing import Optional
+from typing import Any, Mapping, Optional
 
-from .devices.base_device import BaseDevice
+from .const import (
+    COUNTDOWN_TICK_INTERVAL,
+    CONFIG_SNAPSHOT_VERSION,
+    CONF_MAX_SILENCE,
+    CONF_DEADBAND_SCALE,
+    CONF_PIN,
+    CONF_PRIORITY,
+    CONF_SCAN_INTERVAL,
+    CONF_SCAN_INTERVAL_FAST,
+    CONF_SIGNIFICANT_CHANGE,
+    CONF_WRITE_BEHIND,
+    DEFAULT_MAX_SILENCE,
+    DEFAULT_DEADBAND_SCALE,
+    DEFAULT_PRIORITY,
+    DEFAULT_SIGNIFICANT_CHANGE,
+    DEFAULT_WRITE_BEHIND,
+    DOMAIN,
+    JOURNAL_RETRY_DELAY,
+    SNAPSHOT_SAVE_DELAY,
+    SNAPSHOT_STORAGE_VERSION,
+    TRACE_CAPACITY,
+    TRACE_EXPORT_MAX_BYTES,
+    TREND_CAPACITY,
+    TREND_WINDOWS,
+)
+from .capabilities import CapabilityCache, async_get_capability_cache
+from .devices.base_device import BaseDevice, is_unsupported_error
+from .devices.characteristics import (
+    CHARACTERISTIC_BOOST,
+    CHARACTERISTIC_DEVICE_NAME,
+    CHARACTERISTIC_FIRMWARE_REVISION,
+    CHARACTERISTIC_HARDWARE_REVISION,
+    CHARACTERISTIC_MANUFACTURER_NAME,
+    CHARACTERISTIC_SENSOR_DATA,
+    CHARACTERISTIC_SOFTWARE_REVISION,
+)
+from .devices.validation import validate_boost_mode
+from .fleet import PollScheduler, async_get_slots
+from .loop_lag import async_get_lag_monitor
+from .journal import WriteJournal, async_get_journal
+from .rolling import RollingStatistics, WindowStats
+from .profiler import section
+from .state_store import StateStore
+from .tracing import TraceBuffer, current_trace, export_traces, span
 
 _LOGGER = logging.getLogger(__name__)
 
+# Fields of FanState kept in the rolling statistics
+TREND_FIELDS = ("humidity", "temperature", "light", "rpm")
+
+# Samples the humidity rate's window should hold at the normal scan interval
+RATE_MIN_SAMPLES = 3
+
+# Statistics of the polls, read from the latency histograms; see get_data
+POLL_STATISTICS = frozenset(("poll_duration", "poll_success"))
+
+# Values shared by every model; child coordinators extend this with their own
+STATE_SCHEMA = {
+    # Device information
+    "manufacturer": str,
+    "model": str,
+    "fw_rev": str,
+    "hw_rev": str,
+    "sw_rev": str,
+    # Sensor data
+    "humidity": float,
+    "temperature": float,
+    "light": int,
+    "rpm": int,
+    "flow": float,
+    "state": str,
+    "mode": str,
+    "humidity_rate": float,
+    # Boost
+    "boostmode": bool,
+    "boostmodespeedread": int,
+    "boostmodesecread": int,
+    "boostmodespeedwrite": int,
+    "boostmodesecwrite": int,
+}
+
+# Device information: key -> (BaseDevice getter, characteristic read).
+# Firmware first, as the known-unsupported reads are tracked per firmware.
+DEVICE_INFO_READS = {
+    "fw_rev": ("getFirmwareRevision", CHARACTERISTIC_FIRMWARE_REVISION),
+    "manufacturer": ("getManufacturer", CHARACTERISTIC_MANUFACTURER_NAME),
+    "model": ("getDeviceName", CHARACTERISTIC_DEVICE_NAME),
+    "hw_rev": ("getHardwareRevision", CHARACTERISTIC_HARDWARE_REVISION),
+    "sw_rev": ("getSoftwareRevision", CHARACTERISTIC_SOFTWARE_REVISION),
+}
+
+# A setting the fan reads and writes as a whole through one getter/setter
+# pair of the device. decode turns the getter's record into the values of
+# keys, in order; encode turns those values into the setter's arguments,
+# which validate checks before anything is sent.
+ConfigGroup = namedtuple(
+    "ConfigGroup",
+    "keys setter getter decode encode validate",
+    defaults=(None, tuple, tuple, None),
+)
+
+
+# Shared by every model; boost is read back through the sensor poll
+BOOST_GROUP = ConfigGroup(
+    ("boostmode", "boostmodespeedwrite", "boostmodesecwrite"),
+    "setBoostMode",
+    validate=validate_boost_mode,
+)
+
+
+def snapshot_store(hass, mac) -> Store:
+    """The store of a fan's state snapshot, see async_load_snapshot."""
+    return Store(hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.snapshot.{dr.format_mac(mac)}")
+
 
 class BaseCoordinator(DataUpdateCoordinator, ABC):
     _fast_poll_enabled = False
@@ -23,13 +141,31 @@ class BaseCoordinator(DataUpdateCoordinator, ABC):
     _deviceInfoLoaded = False
     _last_config_timestamp = None
 
-    # Error tracking for rate limiting
-    _consecutive_failures = 0
-    _last_error_log_time = None
-    _error_backoff_delay = 0  # seconds
-
     # Should be set by a child class
     _fan: Optional[BaseDevice] = None  # This is basically a type hint
+    _schema = STATE_SCHEMA
+
+    # Countdowns the device reports as time remaining: key -> seconds per unit
+    _countdowns = {"boostmodesecread": 1}
+
+    # Settings by group name; set by a child class
+    _config_groups: Mapping[str, ConfigGroup] = {}
+    # Whether writes end by dropping the connection
+    _disconnect_after_write = False
+
+    # Read on every sensor poll, and the state keys written from them
+    _sensor_characteristics = (CHARACTERISTIC_SENSOR_DATA, CHARACTERISTIC_BOOST)
+    _sensor_keys = (
+        "humidity",
+        "temperature",
+        "light",
+        "rpm",
+        "flow",
+        "state",
+        "boostmode",
+        "boostmodespeedread",
+        "boostmodesecread",
+    )
 
     def __init__(
         self,
@@ -38,6 +174,7 @@ class BaseCoordinator(DataUpdateCoordinator, ABC):
         model: str,
         scan_interval: int,
         scan_interval_fast: int,
+        options: Optional[Mapping[str, Any]] = None,
     ):
         """Initialize coordinator parent"""
         super().__init__(
@@ -47,6 +184,10 @@ class BaseCoordinator(DataUpdateCoordinator, ABC):
             name=model + ": " + device.name,
             # Polling interval. Will only be polled if there are subscribers.
             update_interval=dt.timedelta(seconds=scan_interval),
+            # A poll that reads nothing new must not rewrite every entity.
+            # Values reach the entities through the state store's commits;
+            # the refresh itself only notifies when availability flips.
+            always_update=False,
         )
 
         self._normal_poll_interval = scan_interval
@@ -55,6 +196,7 @@ class BaseCoordinator(DataUpdateCoordinator, ABC):
         self._fan: Optional[BaseDevice] = None  # Base class for Calima/Svensa
         self._device = device
         self._model = model
+        self._options = dict(options or {})
 
         # Connection management
         self._connection_failures = 0
@@ -71,10 +213,49 @@ class BaseCoordinator(DataUpdateCoordinator, ABC):
         self._backoff_multiplier = 2
         self._reconnection_task = None
 
+        # Recent samples for trend statistics; fixed memory per fan
+        self._trends = RollingStatistics(TREND_FIELDS, TREND_WINDOWS, TREND_CAPACITY)
+
+        # Running countdowns: key -> (value read, epoch time of the read)
+        self._countdown_anchors: dict[str, tuple[int, float]] = {}
+        self._cancel_countdown_tick = None
+        self._cancel_countdown_verify = None
+
+        # Last known state, persisted so entities have values after a restart
+        self._snapshot_store: Optional[Store] = None
+        self._snapshot_save_pending = False
+        self._restored: dict[str, float] = {}  # key -> read time, until re-read
+
+        # Shared per-fan capability cache, see async_load_capabilities
+        self._capabilities: CapabilityCache | None = None
+
+        # Writes queued while the fan was unreachable, see write_data
+        self._journal: WriteJournal | None = None
+        self._writes_applied: dict[str, float] = {}  # key -> time written from the journal
+        self._cancel_journal_retry = None
+
+        # Authorized link kept open for the next write, see async_prepare
+        self._prepared_until = 0.0  # monotonic time
+        self._cancel_prepared_expiry = None
+
+        self._slots = async_get_slots(hass)
+        self._loop_lag = async_get_lag_monitor(hass)
+        # Step by step record of the latest sessions, see _session
+        self._traces = TraceBuffer(TRACE_CAPACITY, time.monotonic, time.time)
+        self._expedite = False  # next poll skips the airtime budget, see expedite
+        self._scheduler: PollScheduler | None = None  # plans the polls, if used
+        self._group_of_key = {
+            key: name for name, group in self._config_groups.items() for key in group.keys
+        }
+
+        # Entity callbacks keyed by the state keys they read
+        self._key_listeners: dict[str, list[CALLBACK_TYPE]] = {}
+
         # Initialize state in case of new integration
-        self._state = {}
-        self._state["boostmodespeedwrite"] = 2400
-        self._state["boostmodesecwrite"] = 600
+        self._state = StateStore(self._schema, self._async_state_committed)
+        with self._state.transaction():
+            self._state["boostmodespeedwrite"] = 2400
+            self._state["boostmodesecwrite"] = 600
 
         # Note: disconnect callback will be set up in child classes after _fan is initialized
 
@@ -82,10 +263,19 @@ class BaseCoordinator(DataUpdateCoordinator, ABC):
     def fan(self) -> BaseDevice:
         return self._fan
 
+    @property
+    def _operation_lock(self) -> asyncio.Lock:
+        """Serialises polls, writes and config flow checks on the fan's link."""
+        return self._fan.operation_lock
+
     @property
     def device_id(self):
         return self._device.id
 
+    @property
+    def mac(self) -> str:
+        return self._fan._mac
+
     @property
     def devicename(self):
         return self._device.name
@@ -94,6 +284,73 @@ class BaseCoordinator(DataUpdateCoordinator, ABC):
     def identifiers(self):
         return self._device.identifiers
 
+    @property
+    def sensor_keys(self) -> tuple[str, ...]:
+        """State keys written by every sensor poll."""
+        return self._sensor_keys
+
+    @property
+    def significant_change(self) -> bool:
+        """Whether sensors should only publish significant changes."""
+        return self._options.get(CONF_SIGNIFICANT_CHANGE, DEFAULT_SIGNIFICANT_CHANGE)
+
+    @property
+    def max_silence(self) -> int:
+        """Seconds a filtered sensor may hold back a changed value."""
+        return self._options.get(CONF_MAX_SILENCE, DEFAULT_MAX_SILENCE)
+
+    @property
+    def deadband_scale(self) -> float:
+        """Multiplier of the sensors' deadbands, to filter more or less."""
+        return self._options.get(CONF_DEADBAND_SCALE, DEFAULT_DEADBAND_SCALE)
+
+    def update_config(self, device_data: Mapping[str, Any]) -> None:
+        """Take edited settings of the fan without recreating the coordinator."""
+        self._options = dict(device_data)
+        self._normal_poll_interval = device_data[CONF_SCAN_INTERVAL]
+        self._fast_poll_interval = device_data[CONF_SCAN_INTERVAL_FAST]
+        if device_data[CONF_PIN] != self._fan._pin:
+            # The link was authorized with the old PIN
+            self._drop_prepared()
+            self._fan._pin = device_data[CONF_PIN]
+        # Fast polling ends after a few reads and then picks the new interval up
+        if not self._fast_poll_enabled:
+            self.setNormalPollMode()
+        _LOGGER.debug("Updated configuration of %s", self.devicename)
+
+    @property
+    def write_behind(self) -> bool:
+        """Whether writes to an unreachable fan are queued until it is back."""
+        return self._options.get(CONF_WRITE_BEHIND, DEFAULT_WRITE_BEHIND)
+
+    @property
+    def priority(self) -> str:
+        """How readily routine polls get airtime of a busy route."""
+        return self._options.get(CONF_PRIORITY, DEFAULT_PRIORITY)
+
+    @property
+    def fast_polling(self) -> bool:
+        return self._fast_poll_enabled
+
+    def expedite(self) -> None:
+        """Let the next poll run without waiting for airtime, as it was asked for."""
+        self._expedite = True
+
+    def _poll_priority(self) -> str | None:
+        """The priority of the coming poll, None if it is not routine.
+
+        Verifying a write during fast polling, the first poll and polls that
+        were asked for do not wait for the airtime budget.
+        """
+        if self._expedite or self._fast_poll_enabled or not self._deviceInfoLoaded:
+            self._expedite = False
+            return None
+        return self.priority
+
+    def _defer_optional(self, work: str) -> bool:
+        """Whether work the fan can do without for now should wait for later."""
+        return self._loop_lag.defer(self.devicename, work)
+
     def setFastPollMode(self):
         """Enable fast polling only if device is connected."""
         if not self._fan or not self._fan.isConnected():
@@ -125,8 +382,47 @@ class BaseCoordinator(DataUpdateCoordinator, ABC):
         # the old (fast) interval before the normal interval takes effect.
         self._schedule_refresh()
 
+    def export_traces(self, path: str) -> None:
+        """Also append every finished trace to a JSON lines file."""
+
+        def export(trace) -> None:
+            self.hass.async_add_executor_job(
+                export_traces, path, [trace.as_dict()], TRACE_EXPORT_MAX_BYTES
+            )
+
+        self._traces.on_finish = export
+
+    def use_scheduler(self, scheduler: PollScheduler) -> None:
+        """Have the fleet's scheduler plan the polls instead of an own timer."""
+        self._scheduler = scheduler
+
+    @callback
+    def _schedule_refresh(self) -> None:
+        if self._scheduler is None:
+            super()._schedule_refresh()
+        elif self.update_interval is not None and self._listeners:
+            self._scheduler.async_plan(self, self.update_interval.total_seconds())
+
+    @callback
+    def _unschedule_refresh(self) -> None:
+        """Stop polling, as nothing listens to the coordinator any more."""
+        super()._unschedule_refresh()
+        if self._scheduler is not None:
+            self._scheduler.async_remove(self)
+
+    async def async_shutdown(self) -> None:
+        if self._scheduler is not None:
+            self._scheduler.async_remove(self)
+        await super().async_shutdown()
+
     async def disconnect(self):
         """Safely disconnect from device."""
+        self._cancel_countdowns()
+        self._drop_prepared()
+        if self._cancel_journal_retry is not None:
+            self._cancel_journal_retry()
+            self._cancel_journal_retry = None
+
         # Cancel any pending reconnection task
         if self._reconnection_task and not self._reconnection_task.done():
             self._reconnection_task.cancel()
@@ -137,8 +433,15 @@ class BaseCoordinator(DataUpdateCoordinator, ABC):
 
     async def _on_device_disconnect(self):
         """Called when device disconnects unexpectedly."""
-        _LOGGER.warning("Device %s disconnected unexpectedly", self.devicename)
+        self._fan.failures.warning(
+            _LOGGER,
+            "link",
+            "disconnected",
+            "Device %s disconnected unexpectedly",
+            self.devicename,
+        )
         self._connection_failures += 1
+        self._drop_prepared()
 
         # Disable fast polling immediately
         if self._fast_poll_enabled:
@@ -203,9 +506,16 @@ class BaseCoordinator(DataUpdateCoordinator, ABC):
                 # Validate the new connection
                 if await self._fan.validate_connection():
                     self._connection_failures = 0
+                    self._fan.failures.resolved(_LOGGER, "link")
                     return True
                 else:
-                    _LOGGER.warning("New connection failed validation")
+                    self._fan.failures.warning(
+                        _LOGGER,
+                        "validation",
+                        "invalid",
+                        "New connection to %s failed validation",
+                        self.devicename,
+                    )
                     return False
             else:
                 return False
@@ -214,6 +524,21 @@ class BaseCoordinator(DataUpdateCoordinator, ABC):
             return False
 
     async def _async_update_data(self):
+        """Poll the fan, timing the whole cycle."""
+        failures = self._connection_failures
+        try:
+            with section("poll cycle"), self._fan.latency.measure("update") as timing:
+                await self._async_poll()
+                if self._connection_failures > failures:
+                    timing.fail("read failed")
+                    if (trace := current_trace()) is not None:
+                        trace.fail("read failed")
+        finally:
+            # Not in the state store: they change every poll, and would make
+            # every poll commit and save a snapshot
+            self._async_dispatch(POLL_STATISTICS)
+
+    async def _async_poll(self):
         _LOGGER.debug("Coordinator updating data!!")
 
         """ Counter for fast polling """
@@ -296,8 +621,14 @@ class BaseCoordinator(DataUpdateCoordinator, ABC):
                 _LOGGER.debug("Failed when loading device information: %s", str(err))
                 self._connection_failures += 1
 
+        """ Write settings queued while the fan was unreachable """
+        await self._async_try_journal()
+
         """ Fetch config data if we have no/old values """
-        if dt.datetime.now().date() != self._last_config_timestamp:
+        if dt.datetime.now().date() != self._last_config_timestamp and not (
+            self._last_config_timestamp is not None
+            and self._defer_optional("config refresh")
+        ):
             try:
                 async with async_timeout.timeout(45):
                     if await self.read_configdata(disconnect=False):
@@ -312,7 +643,9 @@ class BaseCoordinator(DataUpdateCoordinator, ABC):
         """ Fetch sensor data """
         try:
             async with async_timeout.timeout(30):
-                success = await self.read_sensordata(disconnect=not self._fast_poll_enabled)
+                success = await self.read_sensordata(
+                    disconnect=not self._fast_poll_enabled and not self._link_prepared()
+                )
                 if success:
                     # Reset connection failures on successful data read
                     if self._connection_failures > 0:
@@ -349,6 +682,8 @@ class BaseCoordinator(DataUpdateCoordinator, ABC):
                 % (self.devicename, self._connection_failures)
             )
 
+        self._async_release_restored()
+
     async def _async_update_device_info(self) -> None:
         device_registry = dr.async_get(self.hass)
         device_registry.async_update_device(
@@ -367,18 +702,393 @@ class BaseCoordinator(DataUpdateCoordinator, ABC):
                 self.setNormalPollMode()
 
     def get_data(self, key):
-        if key in self._state:
-            return self._state[key]
-        return None
+        if key in POLL_STATISTICS:
+            return self._poll_statistic(key)
+        return self._state.get(key)
+
+    def _poll_statistic(self, key) -> float | int | None:
+        if (poll := self._fan.latency.get("update")) is None:
+            return None
+        if key == "poll_duration":
+            return round(poll.last, 1)
+        return round(poll.success_ratio * 100)
+
+    @property
+    def trend_windows(self) -> tuple[int, ...]:
+        return self._trends.spans
+
+    def get_trend(self, key, window) -> WindowStats:
+        """Rolling min/max/mean/slope (per second) of a sensor over window seconds."""
+        return self._trends.stats(key, window)
+
+    def _rate_window(self) -> int:
+        """The shortest trend window holding a few samples at the scan interval."""
+        return next(
+            (
+                span
+                for span in self._trends.spans
+                if span >= RATE_MIN_SAMPLES * self._normal_poll_interval
+            ),
+            self._trends.spans[-1],
+        )
+
+    def _record_sample(self, fan_state) -> None:
+        """Add a decoded FanState to the rolling statistics.
+
+        Call from inside the state transaction that publishes the sample, so
+        the derived humidity rate goes out with it.
+        """
+        self._trends.add(
+            time.monotonic(),
+            {
+                "humidity": fan_state.Humidity,
+                "temperature": fan_state.Temp,
+                "light": fan_state.Light,
+                "rpm": fan_state.RPM,
+            },
+        )
+        slope = self._trends.stats("humidity", self._rate_window()).slope
+        self._state["humidity_rate"] = None if slope is None else round(slope * 60, 2)
+
+    def diagnostics(self) -> dict[str, Any]:
+        """Runtime details of this fan for the diagnostics download."""
+        return {
+            "model": self._model,
+            "connected": self._fan.isConnected(),
+            "connection_failures": self._connection_failures,
+            "route": self._slots.route(self.mac),
+            "priority": self.priority,
+            "next_poll": self._scheduler.next_poll(self.mac) if self._scheduler else None,
+            "queued_writes": self._journal.pending(self.mac) if self._journal else None,
+            "latency": self._fan.latency.as_dict(),
+            "traces": self._traces.as_list(),
+            "ongoing_failures": self._fan.failures.as_dict(),
+            "payloads": self._fan.payload_history(),
+            "capabilities": (
+                self._capabilities.as_dict(self.mac) if self._capabilities else None
+            ),
+        }
+
+    def _confirm_repeated_poll(self, fan_state) -> bool:
+        """Settle a sensor poll whose payloads all repeat the previous poll.
+
+        The state already holds what they decode to, so the values are only
+        confirmed as read now and nothing is published. The sample still
+        goes to the trends, whose windows are time based. Not done while a
+        countdown runs, as its state value is then extrapolated, not read.
+        """
+        if self._countdown_anchors or not self._fan.payload_repeated(
+            *self._sensor_characteristics
+        ):
+            return False
+        self._state.confirm(self._sensor_keys)
+        self._record_sample(fan_state)
+        return True
+
+    def get_last_updated(self, key) -> dt.datetime | None:
+        """Return when key was last read or written, if ever."""
+        if (timestamp := self._state.last_updated(key)) is None:
+            return None
+        return dt.datetime.fromtimestamp(timestamp, dt.timezone.utc)
 
     def set_data(self, key, value):
         _LOGGER.debug("Set_Data: %s %s", key, value)
+
+        # Publishes straight away (unless inside a transaction). Callers set
+        # the value here and only tell Home Assistant after the device write
+        # returns, which would otherwise leave the state machine reporting
+        # the old value for the whole duration of that write.
         self._state[key] = value
 
-        # Publish straight away. Callers set the value here and only tell Home
-        # Assistant after the device write returns, which leaves the state
-        # machine reporting the old value for the whole duration of that write.
-        self.async_update_listeners()
+    @callback
+    def async_add_key_listener(
+        self, update_callback: CALLBACK_TYPE, keys: Iterable[str]
+    ) -> Callable[[], None]:
+        """Listen for changes to the given state keys only.
+
+        The regular coordinator listeners are now only told about
+        availability changes; values are dispatched here, so a changed rpm
+        rewrites the RPM sensor rather than every entity of the fan.
+        """
+        keys = tuple(keys)
+        for key in keys:
+            self._key_listeners.setdefault(key, []).append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            for key in keys:
+                listeners = self._key_listeners.get(key)
+                if listeners and update_callback in listeners:
+                    listeners.remove(update_callback)
+                    if not listeners:
+                        del self._key_listeners[key]
+
+        return remove_listener
+
+    @callback
+    def _async_state_committed(self, changed: frozenset[str]) -> None:
+        """Called by the state store once per commit that changed a value."""
+        with section("state publication"):
+            self._async_dispatch(changed)
+            self._async_schedule_snapshot_save()
+
+    @callback
+    def _async_dispatch(self, changed: frozenset[str]) -> None:
+        """Schedule a state write for the entities reading the changed keys."""
+        # An entity subscribed to several changed keys is written once
+        scheduled: dict[CALLBACK_TYPE, None] = {}
+        for key in changed:
+            for update_callback in self._key_listeners.get(key, ()):
+                scheduled[update_callback] = None
+        for update_callback in scheduled:
+            update_callback()
+
+    async def async_load_snapshot(self) -> bool:
+        """Populate the state from the snapshot saved on the last run.
+
+        Entities then have values from the moment they are added, marked as
+        restored with the time they were read, until the device is read
+        again. Returns True if anything was restored.
+        """
+        self._snapshot_store = snapshot_store(self.hass, self.mac)
+        try:
+            data = await self._snapshot_store.async_load()
+        except Exception as err:
+            _LOGGER.warning("Could not load state snapshot for %s: %s", self.devicename, err)
+            return False
+        if not data:
+            return False
+
+        self._restored = self._state.restore(data.get("state", {}))
+        # Count down what was running when saved, but do not poll for it now
+        self._track_countdowns(verify=False)
+        _LOGGER.debug(
+            "Restored %d values for %s from snapshot", len(self._restored), self.devicename
+        )
+        return bool(self._restored)
+
+    async def async_remove_snapshot(self) -> None:
+        """Delete the saved snapshot, of a fan that is no longer configured."""
+        store, self._snapshot_store = self._snapshot_store, None
+        await (store or snapshot_store(self.hass, self.mac)).async_remove()
+
+    def restored_at(self, key) -> dt.datetime | None:
+        """When a value restored from the snapshot was read, until it is re-read."""
+        if (timestamp := self._restored.get(key)) is None:
+            return None
+        return dt.datetime.fromtimestamp(timestamp, dt.timezone.utc)
+
+    @callback
+    def _async_release_restored(self) -> None:
+        """Drop the restored marker from values that have since been re-read."""
+        if not self._restored:
+            return
+        fresh = frozenset(
+            key
+            for key, timestamp in self._restored.items()
+            if self._state.last_updated(key) != timestamp
+        )
+        for key in fresh:
+            del self._restored[key]
+        # Re-read values equal to the snapshot do not commit; write them here
+        # so their entities lose the restored attributes.
+        if fresh:
+            self._async_dispatch(fresh)
+
+    @callback
+    def _async_schedule_snapshot_save(self) -> None:
+        # Store.async_delay_save() restarts its delay on every call, so only
+        # schedule when no save is pending - constant changes in fast-poll
+        # mode must not postpone the save indefinitely.
+        if self._snapshot_store is None or self._snapshot_save_pending:
+            return
+        self._snapshot_save_pending = True
+        self._snapshot_store.async_delay_save(self._snapshot_data, SNAPSHOT_SAVE_DELAY)
+
+    def _snapshot_data(self) -> dict:
+        self._snapshot_save_pending = False
+        return {"state": self._state.export()}
+
+    def _track_countdowns(self, verify: bool = True) -> None:
+        """Re-anchor the countdowns on the values last read from the device.
+
+        A countdown is only exact at the moment it was read, so between polls
+        it is counted down locally on a cheap timer, and one verification
+        read is scheduled for the moment the first running one expires.
+        """
+        for key in self._countdowns:
+            value = self._state.get(key)
+            if value:
+                self._countdown_anchors[key] = (value, self._state.last_updated(key))
+            else:
+                self._countdown_anchors.pop(key, None)
+
+        if self._cancel_countdown_verify:
+            self._cancel_countdown_verify()
+            self._cancel_countdown_verify = None
+
+        if not self._countdown_anchors:
+            self._cancel_countdowns()
+            return
+
+        if not self._cancel_countdown_tick:
+            self._cancel_countdown_tick = async_track_time_interval(
+                self.hass,
+                self._async_countdown_tick,
+                dt.timedelta(seconds=COUNTDOWN_TICK_INTERVAL),
+            )
+        if not verify:
+            return
+        now = time.time()
+        expires_in = min(
+            value * self._countdowns[key] - (now - read_at)
+            for key, (value, read_at) in self._countdown_anchors.items()
+        )
+        # One second late, so the device has certainly finished counting
+        self._cancel_countdown_verify = async_call_later(
+            self.hass, max(0.0, expires_in) + 1, self._async_countdown_expired
+        )
+
+    @callback
+    def _async_countdown_tick(self, _now) -> None:
+        now = time.time()
+        with self._state.transaction() as state:
+            for key, (value, read_at) in list(self._countdown_anchors.items()):
+                elapsed_units = int(max(0.0, now - read_at) // self._countdowns[key])
+                remaining = max(0, value - elapsed_units)
+                # Keep the read time: an extrapolated value is not a new reading
+                if state.set(key, remaining, timestamp=read_at):
+                    # The state no longer mirrors the last payloads
+                    self._fan.forget_payloads(*self._sensor_characteristics)
+                if not remaining:
+                    del self._countdown_anchors[key]
+        if not self._countdown_anchors and self._cancel_countdown_tick:
+            self._cancel_countdown_tick()
+            self._cancel_countdown_tick = None
+
+    @callback
+    def _async_countdown_expired(self, _now) -> None:
+        self._cancel_countdown_verify = None
+        _LOGGER.debug("Countdown expired on %s, verifying", self.devicename)
+        self.expedite()
+        self.hass.async_create_task(self.async_request_refresh())
+
+    def _cancel_countdowns(self) -> None:
+        for cancel in (self._cancel_countdown_tick, self._cancel_countdown_verify):
+            if cancel:
+                cancel()
+        self._cancel_countdown_tick = None
+        self._cancel_countdown_verify = None
+
+    async def async_load_capabilities(self) -> None:
+        """Attach the shared capability cache, loading it on first use."""
+        self._capabilities = await async_get_capability_cache(self.hass)
+
+    async def async_load_journal(self) -> None:
+        """Attach the shared write journal, showing values still queued."""
+        self._journal = await async_get_journal(self.hass)
+        queued = {
+            key: self._state.coerce(key, value)
+            for entry in self._journal.pending(self.mac).values()
+            for key, value in entry["values"].items()
+        }
+        if queued:
+            _LOGGER.debug("Writes queued for %s: %s", self.devicename, queued)
+            self._state.update(queued)
+
+    def write_status(self, key) -> dict[str, Any]:
+        """Journal attributes of an entity writing key."""
+        if self._journal is not None and (group := self._group_of_key.get(key)):
+            entry = self._journal.pending(self.mac).get(group)
+            if entry is not None and key in entry["values"]:
+                return {
+                    "write_pending": True,
+                    "write_queued_at": dt.datetime.fromtimestamp(
+                        entry["queued_at"], dt.timezone.utc
+                    ).isoformat(),
+                }
+        if (applied_at := self._writes_applied.get(key)) is not None:
+            return {
+                "write_pending": False,
+                "write_applied_at": dt.datetime.fromtimestamp(
+                    applied_at, dt.timezone.utc
+                ).isoformat(),
+            }
+        return {}
+
+    def _queue_write(self, key, value) -> bool:
+        """Accept a write for later, when the fan is connected again."""
+        if self._journal is None or (group := self._group_of_key.get(key)) is None:
+            return False
+        self._journal.async_queue(self.mac, group, key, value)
+        self._writes_applied.pop(key, None)
+        _LOGGER.info("%s is unreachable, queued %s until it is back", self.devicename, key)
+        self._async_dispatch(frozenset((key,)))
+        return True
+
+    def _schedule_journal_retry(self) -> None:
+        """Try the queued writes soon, rather than at the next poll."""
+        if self._cancel_journal_retry is None:
+            self._cancel_journal_retry = async_call_later(
+                self.hass, JOURNAL_RETRY_DELAY, self._async_journal_retry
+            )
+
+    @callback
+    def _async_journal_retry(self, _now) -> None:
+        self._cancel_journal_retry = None
+        self.hass.async_create_task(self._async_write_journal())
+
+    async def _async_write_journal(self) -> None:
+        async with self._session("write"):
+            await self._async_try_journal()
+
+    async def _async_try_journal(self) -> None:
+        try:
+            async with async_timeout.timeout(45):
+                await self._async_apply_journal()
+        except asyncio.CancelledError:
+            raise
+        except Exception as err:
+            _LOGGER.debug("Failed when writing queued settings: %s", str(err))
+
+    async def _async_apply_journal(self) -> None:
+        """Write the groups queued for the fan, now it can be reached."""
+        if self._journal is None or not (pending := self._journal.pending(self.mac)):
+            return
+        if not await self._async_prepare_write():
+            return
+        await self._async_authorize()
+
+        for name, entry in list(pending.items()):
+            if name not in self._config_groups:
+                self._journal.async_done(self.mac, name)
+                continue
+            try:
+                values = {
+                    key: self._state.coerce(key, value)
+                    for key, value in entry["values"].items()
+                }
+                await self._execute_write(name, values)
+            except HomeAssistantError as err:
+                # The fan did not answer; kept for the next attempt
+                _LOGGER.debug(
+                    "Queued %s write for %s not done: %s", name, self.devicename, err
+                )
+                break
+            except ValueError as err:
+                # Would never be accepted, so not kept either
+                _LOGGER.warning(
+                    "Dropping queued %s write for %s: %s", name, self.devicename, err
+                )
+                self._journal.async_done(self.mac, name)
+                continue
+            self._journal.async_done(self.mac, name)
+            applied_at = time.time()
+            for key in values:
+                self._writes_applied[key] = applied_at
+            _LOGGER.info("Wrote queued %s settings to %s", name, self.devicename)
+            self._async_dispatch(frozenset(values))
+        self.setFastPollMode()
 
     async def read_deviceinfo(self, disconnect=False) -> bool:
         _LOGGER.debug("Reading device information")
@@ -387,45 +1097,411 @@ class BaseCoordinator(DataUpdateCoordinator, ABC):
             if not await self._safe_connect():
                 raise Exception("Not connected!")
         except Exception as e:
-            _LOGGER.warning("Error when fetching device info: %s", str(e))
+            self._fan.failures.warning(
+                _LOGGER, "device info", e, "Error when fetching device info: %s", str(e)
+            )
             return False
 
-        # Fetch data. Some data may not be availiable, that's okay.
-        try:
-            self._state["manufacturer"] = await self._fan.getManufacturer()
-        except Exception as err:
-            _LOGGER.debug("Couldn't read manufacturer! %s", str(err))
-        try:
-            self._state["model"] = await self._fan.getDeviceName()
-        except Exception as err:
-            _LOGGER.debug("Couldn't read device name! %s", str(err))
-        try:
-            self._state["fw_rev"] = await self._fan.getFirmwareRevision()
-        except Exception as err:
-            _LOGGER.debug("Couldn't read firmware revision! %s", str(err))
-        try:
-            self._state["hw_rev"] = await self._fan.getHardwareRevision()
-        except Exception as err:
-            _LOGGER.debug("Couldn't read hardware revision! %s", str(err))
-        try:
-            self._state["sw_rev"] = await self._fan.getSoftwareRevision()
-        except Exception as err:
-            _LOGGER.debug("Couldn't read software revision! %s", str(err))
+        # Static information probed on an earlier run is reused while the fan
+        # reports the same firmware, which takes a single read to find out
+        if (cached := await self._cached_deviceinfo()) is not None:
+            _LOGGER.debug("Using cached device information for %s", self.devicename)
+            self._state.update(cached["info"])
+            if disconnect:
+                await self._fan.disconnect()
+            return True
+
+        # Fetch data. Some data may not be availiable, that's okay. Reads of
+        # characteristics the fan does not expose (the GAP Device Name on
+        # BlueZ) or that failed before on this firmware are skipped.
+        info = {}
+        unsupported = []
+        skip = frozenset()
+        for key, (getter, characteristic) in DEVICE_INFO_READS.items():
+            if characteristic in skip or self._fan.has_characteristic(characteristic) is False:
+                unsupported.append(characteristic)
+                continue
+            try:
+                info[key] = await getattr(self._fan, getter)()
+            except Exception as err:
+                _LOGGER.debug("Couldn't read %s! %s", key, str(err))
+                # Only a refusal is kept; timeouts and lost links are retried
+                if is_unsupported_error(err):
+                    unsupported.append(characteristic)
+            if key == "fw_rev" and self._capabilities is not None:
+                skip = self._capabilities.unsupported(self.mac, info.get("fw_rev"))
+        self._state.update(info)
 
         if not self._fan.isConnected():
             return False
-        elif disconnect:
+        if self._capabilities is not None:
+            self._capabilities.async_set(
+                self.mac,
+                info.get("fw_rev"),
+                info,
+                self._fan.present_characteristics(),
+                unsupported,
+            )
+        if disconnect:
             await self._fan.disconnect()
         return True
 
+    async def _cached_deviceinfo(self) -> dict | None:
+        """The cached record of the fan, if it is for its current firmware."""
+        if self._capabilities is None or self._capabilities.get(self.mac) is None:
+            return None
+        getter, _ = DEVICE_INFO_READS["fw_rev"]
+        try:
+            fw_rev = await getattr(self._fan, getter)()
+        except Exception as err:
+            _LOGGER.debug("Couldn't read fw_rev! %s", str(err))
+            return None
+        return self._capabilities.get(self.mac, fw_rev)
+
     # Must be overridden by subclass
     @abstractmethod
     async def read_sensordata(self, disconnect=False) -> bool:
         _LOGGER.debug("Reading sensor data")
 
+    @property
+    def config_groups(self) -> Mapping[str, ConfigGroup]:
+        return self._config_groups
+
+    def config_group_of(self, key) -> str | None:
+        """Name of the setting group a state key is written with."""
+        return self._group_of_key.get(key)
+
+    @property
+    def snapshot_groups(self) -> list[str]:
+        """The setting groups a configuration snapshot holds."""
+        return [
+            name
+            for name, group in self._config_groups.items()
+            if group.getter is not None and group.setter is not None
+        ]
+
+    def config_snapshot(self) -> dict[str, Any]:
+        """The fan's stored configuration, from the values last read.
+
+        Groups not read yet are left out.
+        """
+        groups = {}
+        for name in self.snapshot_groups:
+            values = {key: self._state.get(key) for key in self._config_groups[name].keys}
+            if None not in values.values():
+                groups[name] = values
+        return {"version": CONFIG_SNAPSHOT_VERSION, "model": self._model, "groups": groups}
+
+    def snapshot_steps(self, snapshot: Mapping[str, Any]) -> tuple[list, list[str]]:
+        """Write steps for the groups of a snapshot that differ from the fan.
+
+        Compared with the values last read. Also returns the snapshot's
+        groups this fan does not have; raises ValueError for a snapshot
+        of another version.
+        """
+        if snapshot.get("version") != CONFIG_SNAPSHOT_VERSION:
+            raise ValueError(
+                f"Snapshot version {snapshot.get('version')} is not supported, "
+                f"expected {CONFIG_SNAPSHOT_VERSION}"
+            )
+        steps = []
+        unsupported = []
+        snapshot_groups = self.snapshot_groups
+        for name, values in snapshot.get("groups", {}).items():
+            if name not in snapshot_groups:
+                unsupported.append(name)
+                continue
+            try:
+                wanted = {key: self._state.coerce(key, value) for key, value in values.items()}
+            except (KeyError, TypeError, ValueError) as err:
+                raise ValueError(f"Invalid values for group '{name}': {err}") from err
+            if any(self._state.get(key) != value for key, value in wanted.items()):
+                steps.append({"write": name, "values": wanted})
+        return steps, unsupported
+
+    @asynccontextmanager
+    async def _session(
+        self, kind: str, priority: str | None = None
+    ) -> AsyncIterator[None]:
+        """Exclusive use of the fan, within a connection slot of its route.
+
+        Routine work passes its priority, to wait for a calm event loop and
+        the route's airtime budget first. It waits before taking the fan, so
+        writes do not. The session is traced as kind, the wait as "queue".
+        """
+        with self._traces.record(kind, self.devicename):
+            async with AsyncExitStack() as stack:
+                with span("queue") as queued:
+                    if priority is not None:
+                        queued.set(priority=priority)
+                        await self._loop_lag.async_wait_calm(self.devicename, "poll")
+                        await self._slots.async_wait_turn(self.mac, priority)
+                    await stack.enter_async_context(self._operation_lock)
+                    queued.set(
+                        route=await stack.enter_async_context(
+                            self._slots.acquire(self.mac)
+                        )
+                    )
+                yield
+
+    async def _read_config_group(self, name) -> dict[str, Any]:
+        """Read a setting group from the fan into the state."""
+        group = self._config_groups[name]
+        record = await getattr(self._fan, group.getter)()
+        values = dict(zip(group.keys, group.decode(record)))
+        self._state.update(values)
+        return values
+
+    async def _ensure_config_group(self, name, provided: Iterable[str] = ()) -> bool:
+        """Refresh a group before writing the provided keys of it.
+
+        A setter writes every value of its group, so the others are read
+        back first, as they may have been changed outside Home Assistant.
+        """
+        group = self._config_groups[name]
+        if group.getter is not None and len(group.keys) > 1:
+            try:
+                await self._read_config_group(name)
+            except Exception as e:
+                _LOGGER.debug(
+                    "Error refreshing config group for %s: %s", self.devicename, str(e)
+                )
+                return False
+
+        missing = [
+            key for key in group.keys if key not in provided and self._state.get(key) is None
+        ]
+        if missing:
+            _LOGGER.warning(
+                "Missing config values for %s after refresh: %s",
+                self.devicename,
+                ", ".join(missing),
+            )
+            return False
+        return True
+
+    def _config_group_args(self, name, values: Mapping[str, Any]) -> tuple:
+        group = self._config_groups[name]
+        args = group.encode(tuple(values[key] for key in group.keys))
+        if group.validate is not None:
+            group.validate(*args)
+        return args
+
+    async def _write_config_group(self, name) -> None:
+        """Write a setting group from the state to the fan."""
+        group = self._config_groups[name]
+        if group.setter is None:
+            return
+        if name == "boost" and not self._state["boostmodesecwrite"]:
+            # Use default values if not set up
+            self._state.update({"boostmodespeedwrite": 2400, "boostmodesecwrite": 600})
+        args = self._config_group_args(name, self._state)
+        await getattr(self._fan, group.setter)(*args)
+
+    async def _async_prepare_write(self) -> bool:
+        """Get the connected fan ready to be written; False if it is not."""
+        return self._link_prepared() or await self._safe_connect()
+
+    async def _async_authorize(self) -> None:
+        """Authorize the link with the PIN, unless prepared already."""
+        if not self._link_prepared():
+            await self._fan.authorize()
+
+    def _link_prepared(self) -> bool:
+        """Whether the link opened by async_prepare is still there."""
+        return self._prepared_until > time.monotonic() and self._fan.isConnected()
+
+    async def async_prepare(self, ttl: float) -> bool:
+        """Open and authorize the link now, so a write soon after is one GATT write.
+
+        The link is kept for ttl seconds, or until the route's connection
+        slots are needed by another fan. Returns False if the fan could not
+        be reached.
+        """
+        async with self._session("prepare"):
+            if self._link_prepared():
+                # Extend rather than authorize again
+                self._prepared_until = time.monotonic() + ttl
+            else:
+                self._drop_prepared()
+                if not await self._async_prepare_write():
+                    return False
+                await self._fan.authorize()
+                self._prepared_until = time.monotonic() + ttl
+                self._slots.hold(self.mac, self._async_preempt_prepared)
+
+        if self._cancel_prepared_expiry is not None:
+            self._cancel_prepared_expiry()
+        self._cancel_prepared_expiry = async_call_later(
+            self.hass, ttl, self._async_prepared_expired
+        )
+        _LOGGER.debug("Link to %s prepared for %ss", self.devicename, ttl)
+        return True
+
+    def _drop_prepared(self) -> None:
+        self._prepared_until = 0.0
+        self._slots.unhold(self.mac)
+        if self._cancel_prepared_expiry is not None:
+            self._cancel_prepared_expiry()
+            self._cancel_prepared_expiry = None
+
+    @callback
+    def _async_prepared_expired(self, _now) -> None:
+        self._cancel_prepared_expiry = None
+        self.hass.async_create_task(self._async_release_prepared(force=False))
+
+    async def _async_preempt_prepared(self) -> None:
+        if self._operation_lock.locked():
+            # In a session of its own, which may be waiting for the other
+            # fan's lock in turn: the link goes once that session ends
+            self.hass.async_create_task(self._async_release_prepared(force=True))
+            return
+        await self._async_release_prepared(force=True)
+
+    async def _async_release_prepared(self, force: bool) -> None:
+        """Let go of a prepared link, dropping the connection where it would have been."""
+        self._drop_prepared()
+        async with self._operation_lock:
+            if self._link_prepared() or not self._fan.isConnected():
+                return
+            if force or (self._disconnect_after_write and not self._fast_poll_enabled):
+                _LOGGER.debug("Releasing prepared link to %s", self.devicename)
+                await self._fan.disconnect()
+
+    def _plan_steps(self, steps: Iterable[Mapping[str, Any]]) -> list[tuple]:
+        """Check execute() steps without touching the fan.
+
+        Returns (action, group, values) per step; raises ValueError for an
+        unknown group or key, or for values the setter would refuse, and
+        ServiceValidationError for a value that is not of the key's type.
+        """
+        plan = []
+        for index, step in enumerate(steps):
+            action = "read" if "read" in step else "write"
+            name = step[action]
+            if (group := self._config_groups.get(name)) is None:
+                raise ValueError(
+                    f"Step {index}: unknown group '{name}', expected one of "
+                    + ", ".join(self._config_groups)
+                )
+            if action == "read":
+                if group.getter is None:
+                    raise ValueError(f"Step {index}: group '{name}' cannot be read")
+                plan.append((action, name, None))
+                continue
+
+            if group.setter is None:
+                raise ValueError(f"Step {index}: group '{name}' cannot be written")
+            if unknown := set(step["values"]) - set(group.keys):
+                raise ValueError(
+                    f"Step {index}: {', '.join(sorted(unknown))} not in group '{name}' "
+                    f"({', '.join(group.keys)})"
+                )
+            values = {}
+            for key, value in step["values"].items():
+                try:
+                    values[key] = self._state.coerce(key, value)
+                except (TypeError, ValueError) as err:
+                    raise ServiceValidationError(
+                        f"Step {index}: invalid value {value!r} for '{key}': {err}"
+                    ) from err
+            # Check now if nothing needs to be read from the fan first
+            known = {key: self._state.get(key) for key in group.keys} | values
+            if None not in known.values():
+                try:
+                    self._config_group_args(name, known)
+                except ValueError as err:
+                    raise ValueError(f"Step {index}: {err}") from err
+            plan.append((action, name, values))
+        return plan
+
+    async def async_execute(self, steps: Iterable[Mapping[str, Any]]) -> list[dict[str, Any]]:
+        """Run reads and writes of setting groups in one authorized session.
+
+        Each step is {"read": group} or {"write": group, "values": {key: value}},
+        with values left out of a write taken from the fan. Steps run in
+        order and stop at the first failure. Returns per step its outcome,
+        the group's values and how long it took.
+        """
+        plan = self._plan_steps(steps)
+        results = [
+            {"step": index, action: name, "success": False, "skipped": True}
+            for index, (action, name, _) in enumerate(plan)
+        ]
+        writes = any(action == "write" for action, _, _ in plan)
+        written = False
+
+        async with self._session("execute"):
+            try:
+                if not await self._async_prepare_write():
+                    for result in results:
+                        result["error"] = "Not connected"
+                    return results
+                if writes:
+                    await self._async_authorize()
+
+                for result, (action, name, values) in zip(results, plan):
+                    started = time.perf_counter()
+                    result["skipped"] = False
+                    try:
+                        if action == "read":
+                            result["values"] = await self._read_config_group(name)
+                        else:
+                            result["values"] = await self._execute_write(name, values)
+                            written = True
+                        result["success"] = True
+                    except Exception as err:
+                        result["error"] = str(err)
+                    result["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                    if not result["success"]:
+                        break
+            finally:
+                if written:
+                    self.setFastPollMode()
+                if self._disconnect_after_write and not self._link_prepared():
+                    await self._fan.disconnect()
+        return results
+
+    async def _execute_write(self, name, values: Mapping[str, Any]) -> dict[str, Any]:
+        group = self._config_groups[name]
+        if len(values) < len(group.keys) and not await self._ensure_config_group(
+            name, values
+        ):
+            raise HomeAssistantError(f"Could not read the current values of '{name}'")
+        previous = {key: self._state.get(key) for key in group.keys}
+        self._config_group_args(name, previous | values)
+
+        self._state.update(values)
+        try:
+            await self._write_config_group(name)
+        except Exception:
+            # Not on the fan, so not in the state either
+            self._state.update(previous)
+            raise
+        return {key: self._state.get(key) for key in group.keys}
+
+    async def write_data(self, key) -> bool:
+        """Write the state's value of key, and the rest of its group, to the fan.
+
+        With write_behind on, a fan that cannot be reached gets the value
+        queued instead: straight away while its polls are failing, else
+        once connecting fails. Queued values count as written, and are
+        tried again shortly after, as the next poll may be minutes away.
+        """
+        requested_value = self._state.get(key)
+        if self.write_behind and self._connection_failures > 0:
+            if not self._queue_write(key, requested_value):
+                return False
+            self._schedule_journal_retry()
+            return True
+        async with self._session("write"):
+            if self.write_behind and not await self._async_prepare_write():
+                return self._queue_write(key, requested_value)
+            return await self._write_data(key, requested_value)
+
     # Must be overridden by subclass
     @abstractmethod
-    async def write_data(self, key) -> bool:
+    async def _write_data(self, key, requested_value) -> bool:
         _LOGGER.debug("Write_Data: %s", key)
 
     # Must be overridden by subclass
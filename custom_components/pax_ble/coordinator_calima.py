@@ -1,4 +1,3 @@
-import asyncio
 import datetime as dt
 import logging
 
@@ -6,21 +5,106 @@ from typing import Optional
 
 from homeassistant.util import dt as dt_util
 
-from .coordinator import BaseCoordinator
+from .coordinator import BOOST_GROUP, BaseCoordinator, ConfigGroup, STATE_SCHEMA
 from .devices.calima import Calima
+from .devices.validation import (
+    validate_automatic_cycles,
+    validate_fan_speed_settings,
+    validate_light_sensor_settings,
+    validate_sensors_sensitivity,
+)
+from .tracing import span
 
 _LOGGER = logging.getLogger(__name__)
 
+CALIMA_STATE_SCHEMA = {
+    **STATE_SCHEMA,
+    "automatic_cycles": int,
+    "fanspeed_humidity": int,
+    "fanspeed_light": int,
+    "fanspeed_trickle": int,
+    "heatdistributorsettings_temperaturelimit": int,
+    "heatdistributorsettings_fanspeedbelow": int,
+    "heatdistributorsettings_fanspeedabove": int,
+    "lightsensorsettings_delayedstart": int,
+    "lightsensorsettings_runningtime": int,
+    "sensitivity_humidity": int,
+    "sensitivity_light": int,
+    "silenthours_on": bool,
+    "silenthours_starttime": dt.time,
+    "silenthours_endtime": dt.time,
+    "trickledays_weekdays": int,
+    "trickledays_weekends": int,
+}
+
+CALIMA_CONFIG_GROUPS = {
+    "automatic_cycles": ConfigGroup(
+        ("automatic_cycles",),
+        "setAutomaticCycles",
+        "getAutomaticCycles",
+        decode=lambda setting: (setting,),
+        validate=validate_automatic_cycles,
+    ),
+    "boost": BOOST_GROUP,
+    "fanspeeds": ConfigGroup(
+        ("fanspeed_humidity", "fanspeed_light", "fanspeed_trickle"),
+        "setFanSpeedSettings",
+        "getFanSpeedSettings",
+        validate=validate_fan_speed_settings,
+    ),
+    "heatdistributorsettings": ConfigGroup(
+        (
+            "heatdistributorsettings_temperaturelimit",
+            "heatdistributorsettings_fanspeedbelow",
+            "heatdistributorsettings_fanspeedabove",
+        ),
+        "setHeatDistributor",
+        "getHeatDistributor",
+    ),
+    "lightsensorsettings": ConfigGroup(
+        ("lightsensorsettings_delayedstart", "lightsensorsettings_runningtime"),
+        "setLightSensorSettings",
+        "getLightSensorSettings",
+        validate=validate_light_sensor_settings,
+    ),
+    "sensitivity": ConfigGroup(
+        ("sensitivity_humidity", "sensitivity_light"),
+        "setSensorsSensitivity",
+        "getSensorsSensitivity",
+        decode=lambda settings: (settings.Humidity, settings.Light),
+        validate=validate_sensors_sensitivity,
+    ),
+    "silenthours": ConfigGroup(
+        ("silenthours_on", "silenthours_starttime", "silenthours_endtime"),
+        "setSilentHours",
+        "getSilentHours",
+        decode=lambda settings: (
+            settings.On,
+            dt.time(settings.StartingHour, settings.StartingMinute),
+            dt.time(settings.EndingHour, settings.EndingMinute),
+        ),
+    ),
+    "trickledays": ConfigGroup(
+        ("trickledays_weekdays", "trickledays_weekends"),
+        "setTrickleDays",
+        "getTrickleDays",
+    ),
+}
+
 
 class CalimaCoordinator(BaseCoordinator):
     _fan: Optional[Calima] = None  # This is basically a type hint
+    _schema = CALIMA_STATE_SCHEMA
+    _config_groups = CALIMA_CONFIG_GROUPS
+    _disconnect_after_write = True
 
     def __init__(
-        self, hass, device, model, mac, pin, scan_interval, scan_interval_fast
+        self, hass, device, model, mac, pin, scan_interval, scan_interval_fast,
+        options=None,
     ):
         """Initialize coordinator parent"""
         super().__init__(
-            hass, device, model, scan_interval, scan_interval_fast
+            hass, device, model, scan_interval, scan_interval_fast, options
         )
 
         # Initialize correct fan
@@ -30,10 +114,9 @@ class CalimaCoordinator(BaseCoordinator):
         # Set up disconnect callback
         self._fan.set_disconnect_callback(self._on_device_disconnect)
         self._last_clock_sync_check: Optional[dt.datetime] = None
-        self._operation_lock = asyncio.Lock()
 
     async def _async_update_data(self):
-        async with self._operation_lock:
+        async with self._session("poll", self._poll_priority()):
             return await super()._async_update_data()
 
     async def read_sensordata(self, disconnect=False) -> bool:
@@ -56,20 +139,26 @@ class CalimaCoordinator(BaseCoordinator):
             if FanState is None:
                 _LOGGER.debug("Could not read data")
                 return False
+            elif self._confirm_repeated_poll(FanState):
+                _LOGGER.debug("Sensor data unchanged on %s", self.devicename)
             else:
-                self._state["humidity"] = FanState.Humidity
-                self._state["temperature"] = FanState.Temp
-                self._state["light"] = FanState.Light
-                self._state["rpm"] = FanState.RPM
-                if FanState.RPM > 400:
-                    self._state["flow"] = round(FanState.RPM * 0.05076 - 14, 2)
-                else:
-                    self._state["flow"] = 0
-                self._state["state"] = FanState.Mode
-
-                self._state["boostmode"] = BoostMode.OnOff
-                self._state["boostmodespeedread"] = BoostMode.Speed
-                self._state["boostmodesecread"] = BoostMode.Seconds
+                with self._state.transaction() as state:
+                    state["humidity"] = FanState.Humidity
+                    state["temperature"] = FanState.Temp
+                    state["light"] = FanState.Light
+                    state["rpm"] = FanState.RPM
+                    if FanState.RPM > 400:
+                        state["flow"] = round(FanState.RPM * 0.05076 - 14, 2)
+                    else:
+                        state["flow"] = 0
+                    state["state"] = FanState.Mode
+                    self._record_sample(FanState)
+
+                    state["boostmode"] = BoostMode.OnOff
+                    state["boostmodespeedread"] = BoostMode.Speed
+                    state["boostmodesecread"] = BoostMode.Seconds
+
+                self._track_countdowns()
 
             if disconnect:
                 await self._fan.disconnect()
@@ -84,10 +173,21 @@ class CalimaCoordinator(BaseCoordinator):
         if (
             not force
             and self._last_clock_sync_check is not None
-            and now - self._last_clock_sync_check < dt.timedelta(minutes=10)
+            and (
+                now - self._last_clock_sync_check < dt.timedelta(minutes=10)
+                or self._defer_optional("clock check")
+            )
         ):
             return True
 
+        with span("clock_check", forced=force) as step:
+            if not (synced := await self._sync_clock(now)):
+                step.fail("not synced")
+            else:
+                self._fan.failures.resolved(_LOGGER, "clock sync")
+            return synced
+
+    async def _sync_clock(self, now: dt.datetime) -> bool:
         try:
             fan_time = await self._fan.getTime()
             current_seconds = (
@@ -137,155 +237,42 @@ class CalimaCoordinator(BaseCoordinator):
             )
             return True
         except Exception as e:
-            _LOGGER.warning("Unable to sync clock for %s: %s", self.devicename, str(e))
+            self._fan.failures.warning(
+                _LOGGER,
+                "clock sync",
+                e,
+                "Unable to sync clock for %s: %s",
+                self.devicename,
+                str(e),
+            )
             return False
 
-    async def write_data(self, key) -> bool:
-        requested_value = self._state.get(key)
-        async with self._operation_lock:
-            return await self._write_data(key, requested_value)
+    async def _async_prepare_write(self) -> bool:
+        if self._link_prepared():
+            return True
+        if not await self._safe_connect():
+            return False
+        return await self._sync_clock_if_needed() or await self._safe_connect()
 
     async def _write_data(self, key, requested_value) -> bool:
         _LOGGER.debug("Write_Data: %s", key)
+        if (group := self._group_of_key.get(key)) is None:
+            return False
         try:
             # Make sure we are connected
-            if not await self._safe_connect():
+            if not await self._async_prepare_write():
                 _LOGGER.debug("Cannot write data: not connected to %s", self.devicename)
                 return False
 
-            if (
-                not await self._sync_clock_if_needed()
-                and not await self._safe_connect()
-            ):
-                return False
-
             # Authorize
-            await self._fan.authorize()
-            required_config_keys = {
-                "fanspeed_humidity": (
-                    "fanspeed_humidity",
-                    "fanspeed_light",
-                    "fanspeed_trickle",
-                ),
-                "fanspeed_light": (
-                    "fanspeed_humidity",
-                    "fanspeed_light",
-                    "fanspeed_trickle",
-                ),
-                "fanspeed_trickle": (
-                    "fanspeed_humidity",
-                    "fanspeed_light",
-                    "fanspeed_trickle",
-                ),
-                "lightsensorsettings_delayedstart": (
-                    "lightsensorsettings_delayedstart",
-                    "lightsensorsettings_runningtime",
-                ),
-                "lightsensorsettings_runningtime": (
-                    "lightsensorsettings_delayedstart",
-                    "lightsensorsettings_runningtime",
-                ),
-                "sensitivity_humidity": ("sensitivity_humidity", "sensitivity_light"),
-                "sensitivity_light": ("sensitivity_humidity", "sensitivity_light"),
-                "trickledays_weekdays": (
-                    "trickledays_weekdays",
-                    "trickledays_weekends",
-                ),
-                "trickledays_weekends": (
-                    "trickledays_weekdays",
-                    "trickledays_weekends",
-                ),
-                "silenthours_on": (
-                    "silenthours_on",
-                    "silenthours_starttime",
-                    "silenthours_endtime",
-                ),
-                "silenthours_starttime": (
-                    "silenthours_on",
-                    "silenthours_starttime",
-                    "silenthours_endtime",
-                ),
-                "silenthours_endtime": (
-                    "silenthours_on",
-                    "silenthours_starttime",
-                    "silenthours_endtime",
-                ),
-                "heatdistributorsettings_temperaturelimit": (
-                    "heatdistributorsettings_temperaturelimit",
-                    "heatdistributorsettings_fanspeedbelow",
-                    "heatdistributorsettings_fanspeedabove",
-                ),
-                "heatdistributorsettings_fanspeedbelow": (
-                    "heatdistributorsettings_temperaturelimit",
-                    "heatdistributorsettings_fanspeedbelow",
-                    "heatdistributorsettings_fanspeedabove",
-                ),
-                "heatdistributorsettings_fanspeedabove": (
-                    "heatdistributorsettings_temperaturelimit",
-                    "heatdistributorsettings_fanspeedbelow",
-                    "heatdistributorsettings_fanspeedabove",
-                ),
-            }
-
-            if dependencies := required_config_keys.get(key):
-                if not await self._ensure_config_keys(*dependencies):
-                    return False
+            await self._async_authorize()
+
+            if not await self._ensure_config_group(group, (key,)):
+                return False
             self._state[key] = requested_value
 
             # Write data
-            match key:
-                case "automatic_cycles":
-                    await self._fan.setAutomaticCycles(
-                        int(self._state["automatic_cycles"])
-                    )
-                case "boostmode":
-                    # Use default values if not set up
-                    if int(self._state["boostmodesecwrite"]) == 0:
-                        self._state["boostmodespeedwrite"] = 2400
-                        self._state["boostmodesecwrite"] = 600
-                    await self._fan.setBoostMode(
-                        int(self._state["boostmode"]),
-                        int(self._state["boostmodespeedwrite"]),
-                        int(self._state["boostmodesecwrite"]),
-                    )
-                case "fanspeed_humidity" | "fanspeed_light" | "fanspeed_trickle":
-                    await self._fan.setFanSpeedSettings(
-                        int(self._state["fanspeed_humidity"]),
-                        int(self._state["fanspeed_light"]),
-                        int(self._state["fanspeed_trickle"]),
-                    )
-                case (
-                    "lightsensorsettings_delayedstart"
-                    | "lightsensorsettings_runningtime"
-                ):
-                    await self._fan.setLightSensorSettings(
-                        int(self._state["lightsensorsettings_delayedstart"]),
-                        int(self._state["lightsensorsettings_runningtime"]),
-                    )
-                case "sensitivity_humidity" | "sensitivity_light":
-                    await self._fan.setSensorsSensitivity(
-                        int(self._state["sensitivity_humidity"]),
-                        int(self._state["sensitivity_light"]),
-                    )
-                case "trickledays_weekdays" | "trickledays_weekends":
-                    await self._fan.setTrickleDays(
-                        int(self._state["trickledays_weekdays"]),
-                        int(self._state["trickledays_weekends"]),
-                    )
-                case "silenthours_on" | "silenthours_starttime" | "silenthours_endtime":
-                    await self._fan.setSilentHours(
-                        bool(self._state["silenthours_on"]),
-                        self._state["silenthours_starttime"],
-                        self._state["silenthours_endtime"],
-                    )
-                case "heatdistributorsettings_temperaturelimit" | "heatdistributorsettings_fanspeedbelow" | "heatdistributorsettings_fanspeedabove":
-                    await self._fan.setHeatDistributor(
-                        int(self._state["heatdistributorsettings_temperaturelimit"]),
-                        int(self._state["heatdistributorsettings_fanspeedbelow"]),
-                        int(self._state["heatdistributorsettings_fanspeedabove"]),
-                    )
-                case _:
-                    return False
+            await self._write_config_group(group)
 
             self.setFastPollMode()
             return True
@@ -294,71 +281,8 @@ class CalimaCoordinator(BaseCoordinator):
             _LOGGER.debug("Error writing data to %s: %s", self.devicename, str(e))
             return False
         finally:
-            await self._fan.disconnect()
-
-    async def _ensure_config_keys(self, *keys: str) -> bool:
-        try:
-            match keys[0]:
-                case "fanspeed_humidity":
-                    settings = await self._fan.getFanSpeedSettings()
-                    self._state["fanspeed_humidity"] = settings.Humidity
-                    self._state["fanspeed_light"] = settings.Light
-                    self._state["fanspeed_trickle"] = settings.Trickle
-                case "lightsensorsettings_delayedstart":
-                    settings = await self._fan.getLightSensorSettings()
-                    self._state["lightsensorsettings_delayedstart"] = (
-                        settings.DelayedStart
-                    )
-                    self._state["lightsensorsettings_runningtime"] = (
-                        settings.RunningTime
-                    )
-                case "sensitivity_humidity":
-                    settings = await self._fan.getSensorsSensitivity()
-                    self._state["sensitivity_humidity"] = settings.Humidity
-                    self._state["sensitivity_light"] = settings.Light
-                case "trickledays_weekdays":
-                    settings = await self._fan.getTrickleDays()
-                    self._state["trickledays_weekdays"] = settings.Weekdays
-                    self._state["trickledays_weekends"] = settings.Weekends
-                case "silenthours_on":
-                    settings = await self._fan.getSilentHours()
-                    self._state["silenthours_on"] = settings.On
-                    self._state["silenthours_starttime"] = dt.time(
-                        settings.StartingHour, settings.StartingMinute
-                    )
-                    self._state["silenthours_endtime"] = dt.time(
-                        settings.EndingHour, settings.EndingMinute
-                    )
-                case "heatdistributorsettings_temperaturelimit":
-                    settings = await self._fan.getHeatDistributor()
-                    self._state["heatdistributorsettings_temperaturelimit"] = (
-                        settings.TemperatureLimit
-                    )
-                    self._state["heatdistributorsettings_fanspeedbelow"] = (
-                        settings.FanSpeedBelow
-                    )
-                    self._state["heatdistributorsettings_fanspeedabove"] = (
-                        settings.FanSpeedAbove
-                    )
-                case _:
-                    return False
-        except Exception as e:
-            _LOGGER.debug(
-                "Error refreshing config group for %s: %s",
-                self.devicename,
-                str(e),
-            )
-            return False
-
-        missing = [key for key in keys if self._state.get(key) is None]
-        if missing:
-            _LOGGER.warning(
-                "Missing config values for %s after refresh: %s",
-                self.devicename,
-                ", ".join(missing),
-            )
-            return False
-        return True
+            if not self._link_prepared():
+                await self._fan.disconnect()
 
     async def read_configdata(self, disconnect=False) -> bool:
         try:
@@ -373,49 +297,51 @@ class CalimaCoordinator(BaseCoordinator):
                 raise Exception("Not connected after clock sync failure")
 
             AutomaticCycles = await self._fan.getAutomaticCycles()  # Configuration
-            self._state["automatic_cycles"] = AutomaticCycles
-
             FanMode = await self._fan.getMode()  # Configurations
-            self._state["mode"] = FanMode
-
             FanSpeeds = await self._fan.getFanSpeedSettings()  # Configuration
-            self._state["fanspeed_humidity"] = FanSpeeds.Humidity
-            self._state["fanspeed_light"] = FanSpeeds.Light
-            self._state["fanspeed_trickle"] = FanSpeeds.Trickle
-
             HeatDistributorSettings = await self._fan.getHeatDistributor()  # Configuration
-            self._state["heatdistributorsettings_temperaturelimit"] = (
-                HeatDistributorSettings.TemperatureLimit
-            )
-            self._state["heatdistributorsettings_fanspeedbelow"] = (
-                HeatDistributorSettings.FanSpeedBelow
-            )
-            self._state["heatdistributorsettings_fanspeedabove"] = (
-                HeatDistributorSettings.FanSpeedAbove
-            )
-
             LightSensorSettings = await self._fan.getLightSensorSettings()  # Configuration
-            self._state["lightsensorsettings_delayedstart"] = (
-                LightSensorSettings.DelayedStart
-            )
-            self._state["lightsensorsettings_runningtime"] = LightSensorSettings.RunningTime
-
             Sensitivity = await self._fan.getSensorsSensitivity()  # Configuration
-            self._state["sensitivity_humidity"] = Sensitivity.Humidity
-            self._state["sensitivity_light"] = Sensitivity.Light
-
             SilentHours = await self._fan.getSilentHours()  # Configuration
-            self._state["silenthours_on"] = SilentHours.On
-            self._state["silenthours_starttime"] = dt.time(
-                SilentHours.StartingHour, SilentHours.StartingMinute
-            )
-            self._state["silenthours_endtime"] = dt.time(
-                SilentHours.EndingHour, SilentHours.EndingMinute
-            )
-
             TrickleDays = await self._fan.getTrickleDays()  # Configuration
-            self._state["trickledays_weekdays"] = TrickleDays.Weekdays
-            self._state["trickledays_weekends"] = TrickleDays.Weekends
+
+            # Publish the whole configuration as one commit
+            with self._state.transaction() as state:
+                state["automatic_cycles"] = AutomaticCycles
+                state["mode"] = FanMode
+
+                state["fanspeed_humidity"] = FanSpeeds.Humidity
+                state["fanspeed_light"] = FanSpeeds.Light
+                state["fanspeed_trickle"] = FanSpeeds.Trickle
+
+                state["heatdistributorsettings_temperaturelimit"] = (
+                    HeatDistributorSettings.TemperatureLimit
+                )
+                state["heatdistributorsettings_fanspeedbelow"] = (
+                    HeatDistributorSettings.FanSpeedBelow
+                )
+                state["heatdistributorsettings_fanspeedabove"] = (
+                    HeatDistributorSettings.FanSpeedAbove
+                )
+
+                state["lightsensorsettings_delayedstart"] = (
+                    LightSensorSettings.DelayedStart
+                )
+                state["lightsensorsettings_runningtime"] = LightSensorSettings.RunningTime
+
+                state["sensitivity_humidity"] = Sensitivity.Humidity
+                state["sensitivity_light"] = Sensitivity.Light
+
+                state["silenthours_on"] = SilentHours.On
+                state["silenthours_starttime"] = dt.time(
+                    SilentHours.StartingHour, SilentHours.StartingMinute
+                )
+                state["silenthours_endtime"] = dt.time(
+                    SilentHours.EndingHour, SilentHours.EndingMinute
+                )
+
+                state["trickledays_weekdays"] = TrickleDays.Weekdays
+                state["trickledays_weekends"] = TrickleDays.Weekends
 
             if disconnect:
                 await self._fan.disconnect()
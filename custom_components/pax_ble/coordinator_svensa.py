@@ -2,21 +2,100 @@ import logging
 
 from typing import Optional
 
-from .coordinator import BaseCoordinator
+from .coordinator import BOOST_GROUP, BaseCoordinator, ConfigGroup, STATE_SCHEMA
+from .devices.characteristics import CHARACTERISTIC_PAUSE
 from .devices.svensa import Svensa
+from .devices.validation import (
+    validate_constant_operation,
+    validate_humidity,
+    validate_timer_functions,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+SVENSA_STATE_SCHEMA = {
+    **STATE_SCHEMA,
+    "airquality": int,
+    "airing": int,
+    "fanspeed_airing": int,
+    "trickle_on": bool,
+    "fanspeed_trickle": int,
+    "fanspeed_humidity": int,
+    "sensitivity_humidity": int,
+    "sensitivity_presence": int,
+    "sensitivity_gas": int,
+    "sensitivity_light": int,
+    "pause": bool,
+    "pauseminread": int,
+    "pausemin": int,
+    "timer_runtime": int,
+    "timer_delay": int,
+    "fanspeed_sensor": int,
+}
+
+# A level of 0 switches the sensor off
+SVENSA_CONFIG_GROUPS = {
+    "airing": ConfigGroup(
+        ("airing", "fanspeed_airing"),
+        "setAutomaticCycles",
+        "getAutomaticCycles",
+        decode=lambda cycles: (cycles.TimeMin, cycles.Speed),
+        encode=lambda v: (26, v[0], v[1]),
+    ),
+    "boost": BOOST_GROUP,
+    "constant_operation": ConfigGroup(
+        ("trickle_on", "fanspeed_trickle"),
+        "setConstantOperation",
+        "getConstantOperation",
+        validate=validate_constant_operation,
+    ),
+    "humidity": ConfigGroup(
+        ("sensitivity_humidity", "fanspeed_humidity"),
+        "setHumidity",
+        "getHumidity",
+        decode=lambda humidity: (humidity.Level, humidity.Speed),
+        encode=lambda v: (v[0] != 0, v[0], v[1]),
+        validate=validate_humidity,
+    ),
+    "pause": ConfigGroup(("pause", "pausemin"), "setPause"),
+    "presence_gas": ConfigGroup(
+        ("sensitivity_presence", "sensitivity_gas"),
+        "setPresenceGas",
+        "getPresenceGas",
+        decode=lambda settings: (settings.PresenceLevel, settings.GasLevel),
+        encode=lambda v: (v[0] != 0, v[0], v[1] != 0, v[1]),
+    ),
+    # The light sensor has no setting of its own to write
+    "sensitivity_light": ConfigGroup(("sensitivity_light",), None),
+    "timer_functions": ConfigGroup(
+        ("timer_runtime", "timer_delay", "fanspeed_sensor"),
+        "setTimerFunctions",
+        "getTimerFunctions",
+        decode=lambda timer: (timer.PresenceTime, timer.TimeMin, timer.Speed),
+        encode=lambda v: (v[0], v[1] != 0, v[1], v[2]),
+        validate=validate_timer_functions,
+    ),
+}
+
 
 class SvensaCoordinator(BaseCoordinator):
     _fan: Optional[Svensa] = None  # This is basically a type hint
+    _schema = SVENSA_STATE_SCHEMA
+    _config_groups = SVENSA_CONFIG_GROUPS
+    _countdowns = {"boostmodesecread": 1, "pauseminread": 60}
+    _sensor_characteristics = (
+        *BaseCoordinator._sensor_characteristics,
+        CHARACTERISTIC_PAUSE,
+    )
+    _sensor_keys = (*BaseCoordinator._sensor_keys, "airquality", "pause", "pauseminread")
 
     def __init__(
-        self, hass, device, model, mac, pin, scan_interval, scan_interval_fast
+        self, hass, device, model, mac, pin, scan_interval, scan_interval_fast,
+        options=None,
     ):
         """Initialize coordinator parent"""
         super().__init__(
-            hass, device, model, scan_interval, scan_interval_fast
+            hass, device, model, scan_interval, scan_interval_fast, options
         )
 
         # Initialize correct fan
@@ -26,6 +105,10 @@ class SvensaCoordinator(BaseCoordinator):
         # Set up disconnect callback
         self._fan.set_disconnect_callback(self._on_device_disconnect)
 
+    async def _async_update_data(self):
+        async with self._session("poll", self._poll_priority()):
+            return await super()._async_update_data()
+
     async def read_sensordata(self, disconnect=False) -> bool:
         _LOGGER.debug("Reading sensor data")
         try:
@@ -41,26 +124,32 @@ class SvensaCoordinator(BaseCoordinator):
             if FanState is None:
                 _LOGGER.debug("Could not read data")
                 return False
+            elif self._confirm_repeated_poll(FanState):
+                _LOGGER.debug("Sensor data unchanged on %s", self.devicename)
             else:
-                self._state["humidity"] = FanState.Humidity
-                self._state["airquality"] = FanState.AirQuality
-                self._state["temperature"] = FanState.Temp
-                self._state["light"] = FanState.Light
-                self._state["rpm"] = FanState.RPM
-                if FanState.RPM > 400:
-                    self._state["flow"] = round(FanState.RPM * 0.05076 - 14, 2)
-                else:
-                    self._state["flow"] = 0
-                self._state["state"] = FanState.Mode
-
-                self._state["boostmode"] = BoostMode.OnOff
-                self._state["boostmodespeedread"] = BoostMode.Speed
-                self._state["boostmodesecread"] = BoostMode.Seconds
-
-                self._state["pause"] = Pause.PauseActive
-                self._state["pauseminread"] = Pause.PauseMinutes
-                if not Pause.PauseActive:
-                    self._state["pausemin"] = Pause.PauseMinutes
+                with self._state.transaction() as state:
+                    state["humidity"] = FanState.Humidity
+                    state["airquality"] = FanState.AirQuality
+                    state["temperature"] = FanState.Temp
+                    state["light"] = FanState.Light
+                    state["rpm"] = FanState.RPM
+                    if FanState.RPM > 400:
+                        state["flow"] = round(FanState.RPM * 0.05076 - 14, 2)
+                    else:
+                        state["flow"] = 0
+                    state["state"] = FanState.Mode
+                    self._record_sample(FanState)
+
+                    state["boostmode"] = BoostMode.OnOff
+                    state["boostmodespeedread"] = BoostMode.Speed
+                    state["boostmodesecread"] = BoostMode.Seconds
+
+                    state["pause"] = Pause.PauseActive
+                    state["pauseminread"] = Pause.PauseMinutes
+                    if not Pause.PauseActive:
+                        state["pausemin"] = Pause.PauseMinutes
+
+                self._track_countdowns()
 
             if disconnect:
                 await self._fan.disconnect()
@@ -70,72 +159,21 @@ class SvensaCoordinator(BaseCoordinator):
             _LOGGER.debug("Error reading sensor data from %s: %s", self.devicename, str(e))
             return False
 
-    async def write_data(self, key) -> bool:
+    async def _write_data(self, key, requested_value) -> bool:
         _LOGGER.debug("Write_Data: %s", key)
+        if (group := self._group_of_key.get(key)) is None:
+            return False
         try:
             # Make sure we are connected
-            if not await self._safe_connect():
+            if not await self._async_prepare_write():
                 _LOGGER.debug("Cannot write data: not connected to %s", self.devicename)
                 return False
 
             # Authorize
-            await self._fan.authorize()
+            await self._async_authorize()
 
             # Write data
-            match key:
-                case "airing" | "fanspeed_airing":
-                    await self._fan.setAutomaticCycles(
-                        26,
-                        int(self._state["airing"]),
-                        int(self._state["fanspeed_airing"]),
-                    )
-                case "boostmode":
-                    # Use default values if not set up
-                    if int(self._state["boostmodesecwrite"]) == 0:
-                        self._state["boostmodespeedwrite"] = 2400
-                        self._state["boostmodesecwrite"] = 600
-                    await self._fan.setBoostMode(
-                        int(self._state["boostmode"]),
-                        int(self._state["boostmodespeedwrite"]),
-                        int(self._state["boostmodesecwrite"]),
-                    )
-                case "sensitivity_humidity" | "fanspeed_humidity":
-                    await self._fan.setHumidity(
-                        int(self._state["sensitivity_humidity"]) != 0,
-                        int(self._state["sensitivity_humidity"]),
-                        int(self._state["fanspeed_humidity"]),
-                    )
-                case "sensitivity_presence" | "sensitivity_gas":
-                    await self._fan.setPresenceGas(
-                        int(self._state["sensitivity_presence"]) != 0,
-                        int(self._state["sensitivity_presence"]),
-                        int(self._state["sensitivity_gas"]) != 0,
-                        int(self._state["sensitivity_gas"]),
-                    )
-                case "timer_runtime" | "timer_delay" | "fanspeed_sensor":
-                    await self._fan.setTimerFunctions(
-                        int(self._state["timer_runtime"]),
-                        int(self._state["timer_delay"]) != 0,
-                        int(self._state["timer_delay"]),
-                        int(self._state["fanspeed_sensor"]),
-                    )
-                case "trickle_on" | "fanspeed_trickle":
-                    await self._fan.setConstantOperation(
-                        bool(self._state["trickle_on"]),
-                        int(self._state["fanspeed_trickle"]),
-                    )
-                case "pause" | "pausemin":
-                    await self._fan.setPause(
-                        bool(self._state["pause"]),
-                        int(self._state["pausemin"]),
-                    )
-
-                case "sensitivity_light":
-                    # Should we do anything here?
-                    pass
-
-                case _:
-                    return False
+            await self._write_config_group(group)
 
             self.setFastPollMode()
             return True
@@ -152,44 +190,53 @@ class SvensaCoordinator(BaseCoordinator):
                 return False
 
             AutomaticCycles = await self._fan.getAutomaticCycles()  # Configuration
-            self._state["airing"] = AutomaticCycles.TimeMin
-            self._state["fanspeed_airing"] = AutomaticCycles.Speed
             _LOGGER.debug(f"Automatic cycles: {AutomaticCycles}")
 
             ConstantOperation = await self._fan.getConstantOperation()  # Configuration
-            self._state["trickle_on"] = ConstantOperation.Active
-            self._state["fanspeed_trickle"] = ConstantOperation.Speed
             _LOGGER.debug(f"Constant Op: {ConstantOperation}")
 
             FanMode = await self._fan.getMode()  # Configurations
-            self._state["mode"] = FanMode
             _LOGGER.debug(f"FanMode: {FanMode}")
 
             Humidity = await self._fan.getHumidity()  # Configuration
-            self._state["fanspeed_humidity"] = Humidity.Speed
-            self._state["sensitivity_humidity"] = Humidity.Level
             _LOGGER.debug(f"Humidity: {Humidity}")
 
             PresenceGas = await self._fan.getPresenceGas()  # Configuration
-            self._state["sensitivity_presence"] = PresenceGas.PresenceLevel
-            self._state["sensitivity_gas"] = PresenceGas.GasLevel
             _LOGGER.debug(f"PresenceGas: {PresenceGas}")
 
             Pause = await self._fan.getPause()
-            self._state["pause"] = Pause.PauseActive
-            self._state["pauseminread"] = Pause.PauseMinutes
-            if not Pause.PauseActive:
-                self._state["pausemin"] = Pause.PauseMinutes
-            else:
-                # Only useful if we start the integration while the fan is paused. Will be re-read when pause ends.
-                self._state["pausemin"] = 60
 
             TimeFunctions = await self._fan.getTimerFunctions()  # Configuration
-            self._state["timer_runtime"] = TimeFunctions.PresenceTime
-            self._state["timer_delay"] = TimeFunctions.TimeMin
-            self._state["fanspeed_sensor"] = TimeFunctions.Speed
             _LOGGER.debug(f"Time Functions: {TimeFunctions}")
 
+            # Publish the whole configuration as one commit
+            with self._state.transaction() as state:
+                state["airing"] = AutomaticCycles.TimeMin
+                state["fanspeed_airing"] = AutomaticCycles.Speed
+
+                state["trickle_on"] = ConstantOperation.Active
+                state["fanspeed_trickle"] = ConstantOperation.Speed
+
+                state["mode"] = FanMode
+
+                state["fanspeed_humidity"] = Humidity.Speed
+                state["sensitivity_humidity"] = Humidity.Level
+
+                state["sensitivity_presence"] = PresenceGas.PresenceLevel
+                state["sensitivity_gas"] = PresenceGas.GasLevel
+
+                state["pause"] = Pause.PauseActive
+                state["pauseminread"] = Pause.PauseMinutes
+                if not Pause.PauseActive:
+                    state["pausemin"] = Pause.PauseMinutes
+                else:
+                    # Only useful if we start the integration while the fan is paused. Will be re-read when pause ends.
+                    state["pausemin"] = 60
+
+                state["timer_runtime"] = TimeFunctions.PresenceTime
+                state["timer_delay"] = TimeFunctions.TimeMin
+                state["fanspeed_sensor"] = TimeFunctions.Speed
+
             if disconnect:
                 await self._fan.disconnect()
             return True
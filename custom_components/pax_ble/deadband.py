@@ -0,0 +1,80 @@
+"""Significant-change filtering for sensor values.
+
+Kept free of homeassistant imports so it can be unit tested on its own.
+"""
+
+from collections import namedtuple
+
+# absolute: smallest change worth publishing, in the sensor's unit
+# relative: smallest change as a fraction of the last published value
+# max_silence: seconds after which a pending change is published regardless
+Deadband = namedtuple(
+    "Deadband", ["absolute", "relative", "max_silence"], defaults=(0, 0, None)
+)
+
+
+class SignificantChangeFilter:
+    """Decide which new readings of a sensor are worth publishing.
+
+    A reading is significant when it differs from the last published value
+    by at least the larger of the absolute threshold and the relative one.
+    Moving to or from None (unknown) and non-numeric values always count.
+    Suppressed readings are not lost: once max_silence has passed since the
+    last publication, the next check publishes whatever the value is then.
+    """
+
+    __slots__ = ("_deadband", "_published", "_published_at", "_has_published")
+
+    def __init__(self, deadband: Deadband) -> None:
+        self._deadband = deadband
+        self._published = None
+        self._published_at: float | None = None
+        self._has_published = False
+
+    @property
+    def value(self):
+        """The last published value."""
+        return self._published
+
+    @property
+    def has_published(self) -> bool:
+        return self._has_published
+
+    def accept(self, value, now: float) -> bool:
+        """Return True, and remember value as published, if it is significant."""
+        if self._is_significant(value, now):
+            self.force(value, now)
+            return True
+        return False
+
+    def force(self, value, now: float) -> None:
+        """Publish value unconditionally."""
+        self._published = value
+        self._published_at = now
+        self._has_published = True
+
+    def due_in(self, now: float) -> float | None:
+        """Seconds until max_silence forces a publication, if it is enabled."""
+        if not self._deadband.max_silence or self._published_at is None:
+            return None
+        return max(0.0, self._published_at + self._deadband.max_silence - now)
+
+    def _is_significant(self, value, now: float) -> bool:
+        if not self._has_published:
+            return True
+
+        old = self._published
+        if value == old:
+            return False
+        if value is None or old is None:
+            return True
+        if not isinstance(value, (int, float)) or not isinstance(old, (int, float)):
+            return True
+
+        if self._deadband.max_silence and now - self._published_at >= self._deadband.max_silence:
+            return True
+
+        threshold = max(
+            self._deadband.absolute, self._deadband.relative * abs(old)
+        )
+        return abs(value - old) >= threshold
@@ -1,35 +1,64 @@
 from .characteristics import *
-
+from .codecs import BASE_CODECS, BoostMode, Codec, DecodeCache, Time
+from .connection import get_connection_manager
+from .validation import validate_boost_mode
+from ..failure_log import FailureLog
+from ..latency import LatencyRecorder
+from ..profiler import section
+from ..tracing import note, span
+
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
 from homeassistant.components import bluetooth
-from struct import pack, unpack
 import datetime
-from bleak.exc import BleakError
+from bleak.exc import BleakCharacteristicNotFoundError, BleakError
 import binascii
-from collections import namedtuple
 import logging
-import asyncio
+import time
 from bleak_retry_connector import (
     clear_cache,
-    establish_connection,
     BleakClientWithServiceCache,
-    close_stale_connections,
 )
 
 
 _LOGGER = logging.getLogger(__name__)
 
-Time = namedtuple("Time", "DayOfWeek Hour Minute Second")
-BoostMode = namedtuple("BoostMode", "OnOff Speed Seconds")
+# GATT errors of a fan refusing an operation for good, by backend: ATT
+# error descriptions of ESPHome proxies, BlueZ's NotPermitted/NotSupported
+UNSUPPORTED_GATT_ERRORS = ("not permitted", "not supported", "attribute not found")
+
+
+def is_unsupported_error(err: BaseException) -> bool:
+    """Whether a failed GATT operation means the fan does not offer it.
+
+    Timeouts and lost links say nothing about the fan, so are not.
+    """
+    if isinstance(err, BleakCharacteristicNotFoundError):
+        return True
+    return isinstance(err, BleakError) and any(
+        reason in str(err).lower() for reason in UNSUPPORTED_GATT_ERRORS
+    )
 
 
 class BaseDevice:
+    # Wire format of each characteristic, see codecs.py
+    codecs: Mapping[str, Codec] = BASE_CODECS
+
     def __init__(self, hass, mac, pin):
         self._hass = hass
         self._mac = mac
         self._pin = pin
         self._client: BleakClientWithServiceCache | None = None
-        self._connect_lock = asyncio.Lock()
+        # The link is borrowed from, and shared through, the connection manager
+        self._connections = get_connection_manager(hass)
+        self.operation_lock = self._connections.operation_lock(mac)
         self._disconnect_callback = None
+        # Last payload per characteristic; repeats are not decoded again
+        self._payloads = DecodeCache(self.codecs)
+        # How long connecting and each GATT operation take
+        self.latency = LatencyRecorder(time.monotonic)
+        # Repeated failures are summarized instead of logged each time
+        self.failures = FailureLog(mac, time.monotonic, note)
         # Characteristic UUIDs (centralized in characteristics.py ideally)
         self.chars = {
             CHARACTERISTIC_APPEARANCE: "00002a01-0000-1000-8000-00805f9b34fb",  # Not used
@@ -57,68 +86,83 @@ class BaseDevice:
         """Set callback to be called when device disconnects unexpectedly."""
         self._disconnect_callback = callback
 
-    def _handle_disconnect(self, _client):
+    def _handle_disconnect(self):
         """Handle unexpected disconnection.
 
-        Only logs the disconnection for debugging purposes.
-        Reconnection is handled lazily on the next poll cycle.
+        Tells the coordinator, if it set a callback; otherwise reconnection
+        is handled lazily on the next poll cycle.
         """
         _LOGGER.debug("Device %s disconnected, will reconnect on next poll", self._mac)
         self._client = None
+        if self._disconnect_callback is not None:
+            self._hass.async_create_task(self._disconnect_callback())
+
+    @contextmanager
+    def _measure(self, operation, **attrs) -> Iterator:
+        """Time an operation into the latency histograms and the running trace."""
+        with self.latency.measure(operation) as timing, span(operation, **attrs) as step:
+            yield step
+            if step.error is not None:
+                timing.fail(step.error)
+
+    def _characteristic_name(self, uuid) -> str:
+        return next((name for name, char in self.chars.items() if char == uuid), str(uuid))
 
     async def authorize(self):
-        await self.setAuth(self._pin)
+        with self._measure("authorize"):
+            await self.setAuth(self._pin)
 
 
     async def connect(self, timeout: int = 45) -> bool:
-        """Establish a reliable connection using bleak-retry-connector."""
-        async with self._connect_lock:
-            # Already connected (or another caller just connected while we waited)?
-            if self._client and self._client.is_connected:
-                return True
+        """Establish a reliable connection, or join the fan's open one."""
+        if self.isConnected():
+            return True
 
+        with self._measure("connect") as step:
             try:
                 device = bluetooth.async_ble_device_from_address(self._hass, self._mac.upper())
                 if not device:
                     raise BleakError(f"Device {self._mac} not found")
+                if service_info := bluetooth.async_last_service_info(
+                    self._hass, self._mac.upper(), connectable=True
+                ):
+                    step.set(source=service_info.source, rssi=service_info.rssi)
 
-                try:
-                    await close_stale_connections()
-                except Exception:
-                    pass
-
-                self._client = await establish_connection(
-                    BleakClientWithServiceCache,
+                self._client = await self._connections.async_connect(
                     device,
+                    self,
+                    self._handle_disconnect,
                     name=getattr(self, "name", self._mac),
-                    disconnected_callback=self._handle_disconnect,
-                    use_services_cache=True,
-                    max_attempts=5,
-                    retry_interval=1.0,
                     timeout=timeout,
                 )
                 _LOGGER.debug("Connected to %s", self._mac)
+                self.failures.resolved(_LOGGER, "connect")
                 return True
             except Exception as err:
-                _LOGGER.warning("Failed to connect %s: %s", self._mac, err)
+                self.failures.warning(
+                    _LOGGER, "connect", err, "Failed to connect %s: %s", self._mac, err
+                )
+                step.fail(err)
                 self._client = None
                 return False
 
-    async def disconnect(self) -> None:
-        if self._client:
+    async def disconnect(self, force: bool = False) -> None:
+        """Let go of the link, dropping it for everyone if force is set."""
+        if self._client or force:
             try:
-                await self._client.disconnect()
-            except Exception as e:
-                _LOGGER.warning("Error disconnecting %s: %s", self._mac, e)
+                with span("disconnect", force=force):
+                    await self._connections.async_release(self._mac, self, force)
             finally:
                 self._client = None
 
     async def _with_disconnect_on_error(self, coro):
         try:
             return await coro
-        except Exception:
-            _LOGGER.debug("GATT operation failed; disconnecting", exc_info=True)
-            await self.disconnect()
+        except Exception as err:
+            # A refused operation leaves the link as good as it was
+            if not is_unsupported_error(err):
+                _LOGGER.debug("GATT operation failed; disconnecting", exc_info=True)
+                await self.disconnect(force=True)
             raise
 
     async def pair(self) -> str:
@@ -152,17 +196,28 @@ class BaseDevice:
         best-effort: it is a BlueZ-side fix, and backends without a cache
         (ESPHome proxies) pass straight through to the retry.
         """
+        with self._measure("validate") as step:
+            if not await self._validate_connection():
+                step.fail("invalid")
+                return False
+            self.failures.resolved(_LOGGER, "validation")
+            return True
+
+    async def _validate_connection(self) -> bool:
         if not self.isConnected():
             return False
         if self._sensor_data_present():
             return True
 
-        _LOGGER.warning(
+        self.failures.warning(
+            _LOGGER,
+            "validation",
+            "invalid",
             "Validation failed for %s - disconnecting and clearing the GATT "
             "cache, then retrying once",
             self._mac,
         )
-        await self.disconnect()
+        await self.disconnect(force=True)
         try:
             await clear_cache(self._mac)
         except Exception:
@@ -179,9 +234,26 @@ class BaseDevice:
         # Still invalid on a fresh connection and cache: a real fault.
         # Tear this link down too - leaving it up would recreate the
         # zombie this path exists to prevent.
-        await self.disconnect()
+        await self.disconnect(force=True)
         return False
 
+    def has_characteristic(self, name) -> bool | None:
+        """Whether the fan's GATT table exposes a characteristic.
+
+        None when not connected, or the services are not resolved.
+        """
+        try:
+            return self._client.services.get_characteristic(self.chars[name]) is not None
+        except Exception:
+            return None
+
+    def present_characteristics(self) -> list[str] | None:
+        """Names of the known characteristics the fan exposes, if connected."""
+        if not self.isConnected():
+            return None
+        present = [name for name in self.chars if self.has_characteristic(name)]
+        return present or None
+
     def _sensor_data_present(self) -> bool:
         """Local membership check for the fan's SENSOR_DATA characteristic."""
         try:
@@ -203,9 +275,10 @@ class BaseDevice:
     async def _readUUID(self, uuid) -> bytearray:
         if not self._client:
             raise BleakError("Client not initialized")
-        return await self._with_disconnect_on_error(
-            self._client.read_gatt_char(uuid)
-        )
+        with self._measure("read", characteristic=self._characteristic_name(uuid)):
+            return await self._with_disconnect_on_error(
+                self._client.read_gatt_char(uuid)
+            )
 
     async def _readHandle(self, handle) -> bytearray:
         if not self._client:
@@ -217,10 +290,41 @@ class BaseDevice:
     async def _writeUUID(self, uuid, data) -> None:
         if not self._client:
             raise BleakError("Client not initialized")
-        return await self._with_disconnect_on_error(
-            self._client.write_gatt_char(uuid, data, response=True)
+        with self._measure("write", characteristic=self._characteristic_name(uuid)):
+            return await self._with_disconnect_on_error(
+                self._client.write_gatt_char(uuid, data, response=True)
+            )
+
+    async def _read(self, characteristic):
+        """Read a characteristic and decode it with its codec.
+
+        A payload identical to the previous read returns the previous
+        decoding; payload_repeated() tells the caller so.
+        """
+        payload = await self._readUUID(self.chars[characteristic])
+        with section("decode"):
+            return self._payloads.decode(characteristic, payload)
+
+    async def _write(self, characteristic, *values) -> None:
+        """Encode values with the characteristic's codec and write them."""
+        self._payloads.invalidate(characteristic)
+        await self._writeUUID(
+            self.chars[characteristic], self.codecs[characteristic].encode(*values)
         )
 
+    def payload_repeated(self, *characteristics) -> bool:
+        """Whether the last read of every characteristic repeated the one before."""
+        return all(self._payloads.repeated(name) for name in characteristics)
+
+    def forget_payloads(self, *characteristics) -> None:
+        """Decode the next read of each characteristic even if it repeats."""
+        for name in characteristics:
+            self._payloads.invalidate(name)
+
+    def payload_history(self) -> dict:
+        """Read/change counts and a fingerprint of the payloads per characteristic."""
+        return self._payloads.as_dict()
+
     # --- Generic GATT Characteristics
     async def getDeviceName(self) -> str:
         # return (await self._readHandle(0x2)).decode("ascii")
@@ -267,26 +371,19 @@ class BaseDevice:
     # --- Onwards to PAX characteristics
     async def setAuth(self, pin) -> None:
         _LOGGER.debug(f"Connecting with pin: {pin}")
-        await self._writeUUID(self.chars[CHARACTERISTIC_PIN_CODE], pack("<I", int(pin)))
+        await self._write(CHARACTERISTIC_PIN_CODE, int(pin))
 
         result = await self.checkAuth()
         _LOGGER.debug(f"Authorized: {result}")
 
     async def getAuth(self) -> int:
-        v = unpack("<I", await self._readUUID(self.chars[CHARACTERISTIC_PIN_CODE]))
-        return v[0]
+        return await self._read(CHARACTERISTIC_PIN_CODE)
 
     async def checkAuth(self) -> bool:
-        v = unpack(
-            "<b", await self._readUUID(self.chars[CHARACTERISTIC_PIN_CONFIRMATION])
-        )
-        return bool(v[0])
+        return await self._read(CHARACTERISTIC_PIN_CONFIRMATION)
 
     async def setAlias(self, name) -> None:
-        await self._writeUUID(
-            self.chars[CHARACTERISTIC_FAN_DESCRIPTION],
-            pack("20s", bytearray(name, "utf-8")),
-        )
+        await self._write(CHARACTERISTIC_FAN_DESCRIPTION, bytearray(name, "utf-8"))
 
     async def getAlias(self) -> str:
         return await self._readUUID(self.chars[CHARACTERISTIC_FAN_DESCRIPTION]).decode(
@@ -297,25 +394,16 @@ class BaseDevice:
         return self._bToStr(await self._readUUID(self.chars[CHARACTERISTIC_STATUS]))
 
     async def getFactorySettingsChanged(self) -> bool:
-        v = unpack(
-            "<?",
-            await self._readUUID(self.chars[CHARACTERISTIC_FACTORY_SETTINGS_CHANGED]),
-        )
-        return v[0]
+        return await self._read(CHARACTERISTIC_FACTORY_SETTINGS_CHANGED)
 
     async def getLed(self) -> str:
         return self._bToStr(await self._readUUID(self.chars[CHARACTERISTIC_LED]))
 
     async def setTime(self, dayofweek, hour, minute, second) -> None:
-        await self._writeUUID(
-            self.chars[CHARACTERISTIC_CLOCK],
-            pack("<4B", dayofweek, hour, minute, second),
-        )
+        await self._write(CHARACTERISTIC_CLOCK, dayofweek, hour, minute, second)
 
     async def getTime(self) -> Time:
-        return Time._make(
-            unpack("<BBBB", await self._readUUID(self.chars[CHARACTERISTIC_CLOCK]))
-        )
+        return await self._read(CHARACTERISTIC_CLOCK)
 
     async def setTimeToNow(self) -> None:
         now = datetime.datetime.now()
@@ -325,40 +413,24 @@ class BaseDevice:
         return await self._readUUID(self.chars[CHARACTERISTIC_RESET])
 
     async def resetDevice(self):  # Dangerous
-        await self._writeUUID(self.chars[CHARACTERISTIC_RESET], pack("<I", 120))
+        await self._write(CHARACTERISTIC_RESET, 120)
 
     async def resetValues(self):  # Dangerous
-        await self._writeUUID(self.chars[CHARACTERISTIC_RESET], pack("<I", 85))
+        await self._write(CHARACTERISTIC_RESET, 85)
 
     ####################################
     #### COMMON FAN SPECIFIC VALUES ####
     ####################################
     async def getBoostMode(self) -> BoostMode:
-        v = unpack("<BHH", await self._readUUID(self.chars[CHARACTERISTIC_BOOST]))
-        return BoostMode._make(v)
+        return await self._read(CHARACTERISTIC_BOOST)
 
     async def setBoostMode(self, on, speed, seconds) -> None:
-        if speed % 25:
-            raise ValueError("Speed must be a multiple of 25")
+        validate_boost_mode(on, speed, seconds)
         if not on:
             speed = 0
             seconds = 0
 
-        await self._writeUUID(
-            self.chars[CHARACTERISTIC_BOOST], pack("<BHH", on, speed, seconds)
-        )
+        await self._write(CHARACTERISTIC_BOOST, on, speed, seconds)
 
     async def getMode(self) -> str:
-        v = unpack("<B", await self._readUUID(self.chars[CHARACTERISTIC_MODE]))
-        if v[0] == 0:
-            return "MultiMode"
-        elif v[0] == 1:
-            return "DraftShutterMode"
-        elif v[0] == 2:
-            return "WallSwitchExtendedRuntimeMode"
-        elif v[0] == 3:
-            return "WallSwitchNoExtendedRuntimeMode"
-        elif v[0] == 4:
-            return "HeatDistributionMode"
-        else:
-            return "Unknown: " + str(v[0])
+        return await self._read(CHARACTERISTIC_MODE)
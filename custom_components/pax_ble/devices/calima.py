@@ -1,31 +1,31 @@
 import datetime
 import logging
-import math
 
 from .characteristics import *
 from .base_device import BaseDevice
-
-from collections import namedtuple
-from struct import pack, unpack
-
-_LOGGER = logging.getLogger(__name__)
-
-Fanspeeds = namedtuple(
-    "Fanspeeds", "Humidity Light Trickle", defaults=(2250, 1625, 1000)
+from .codecs import (
+    CALIMA_CODECS,
+    CalimaFanState as FanState,
+    Fanspeeds,
+    HeatDistributorSettings,
+    LightSensorSettings,
+    Sensitivity,
+    SilentHours,
+    TrickleDays,
 )
-FanState = namedtuple("FanState", "Humidity Temp Light RPM Mode")
-HeatDistributorSettings = namedtuple(
-    "HeatDistributorSettings", "TemperatureLimit FanSpeedBelow FanSpeedAbove"
+from .validation import (
+    validate_automatic_cycles,
+    validate_fan_speed_settings,
+    validate_light_sensor_settings,
+    validate_sensors_sensitivity,
 )
-LightSensorSettings = namedtuple("LightSensorSettings", "DelayedStart RunningTime")
-Sensitivity = namedtuple("Sensitivity", "HumidityOn Humidity LightOn Light")
-SilentHours = namedtuple(
-    "SilentHours", "On StartingHour StartingMinute EndingHour EndingMinute"
-)
-TrickleDays = namedtuple("TrickleDays", "Weekdays Weekends")
+
+_LOGGER = logging.getLogger(__name__)
 
 
 class Calima(BaseDevice):
+    codecs = CALIMA_CODECS
+
     def __init__(self, hass, mac, pin):
         super().__init__(hass, mac, pin)
 
@@ -52,85 +52,35 @@ class Calima(BaseDevice):
     ############## STATE / SENSOR DATA #############
     ################################################
     async def getState(self) -> FanState:
-        # Short Short Short Short    Byte Short Byte
-        # Hum   Temp  Light FanSpeed Mode Tbd   Tbd
-        v = unpack(
-            "<4HBHB", await self._readUUID(self.chars[CHARACTERISTIC_SENSOR_DATA])
-        )
-        _LOGGER.debug("Read Fan States: %s", v)
-
-        trigger = "No trigger"
-        if ((v[4] >> 4) & 1) == 1:
-            trigger = "Boost"
-        elif ((v[4] >> 6) & 3) == 3:
-            trigger = "Switch"
-        elif (v[4] & 3) == 1:
-            trigger = "Trickle ventilation"
-        elif (v[4] & 3) == 2:
-            trigger = "Light ventilation"
-        elif (
-            v[4] & 3
-        ) == 3:  # Note that the trigger might be active, but mode must be enabled to be activated
-            trigger = "Humidity ventilation"
-
-        return FanState(
-            # See the note in svensa.py: None (-> "unknown") rather than 0,
-            # so an unconvertible raw value is not reported as a measured 0%.
-            round(math.log2(v[0] - 30) * 10, 2) if v[0] > 30 else None,
-            v[1] / 4 - 2.6,
-            v[2],
-            v[3],
-            trigger,
-        )
+        state = await self._read(CHARACTERISTIC_SENSOR_DATA)
+        _LOGGER.debug("Read Fan States: %s", state)
+        return state
 
     ################################################
     ############ CONFIGURATION FUNCTIONS ###########
     ################################################
     async def getAutomaticCycles(self) -> int:
-        v = unpack(
-            "<B", await self._readUUID(self.chars[CHARACTERISTIC_AUTOMATIC_CYCLES])
-        )
-        return v[0]
+        return await self._read(CHARACTERISTIC_AUTOMATIC_CYCLES)
 
     async def setAutomaticCycles(self, setting: int) -> None:
-        if setting < 0 or setting > 3:
-            raise ValueError("Setting must be between 0-3")
+        validate_automatic_cycles(setting)
 
-        await self._writeUUID(
-            self.chars[CHARACTERISTIC_AUTOMATIC_CYCLES], pack("<B", setting)
-        )
+        await self._write(CHARACTERISTIC_AUTOMATIC_CYCLES, setting)
 
     async def getFanSpeedSettings(self) -> Fanspeeds:
-        return Fanspeeds._make(
-            unpack(
-                "<HHH",
-                await self._readUUID(self.chars[CHARACTERISTIC_LEVEL_OF_FAN_SPEED]),
-            )
-        )
+        return await self._read(CHARACTERISTIC_LEVEL_OF_FAN_SPEED)
 
     async def setFanSpeedSettings(
         self, humidity=2250, light=1625, trickle=1000
     ) -> None:
-        for val in (humidity, light, trickle):
-            if val % 25 != 0:
-                raise ValueError("Speeds should be multiples of 25")
-            if val > 2500 or val < 0:
-                raise ValueError("Speeds must be between 0 and 2500 rpm")
+        validate_fan_speed_settings(humidity, light, trickle)
 
         _LOGGER.debug("Calima setFanSpeedSettings: %s %s %s", humidity, light, trickle)
 
-        await self._writeUUID(
-            self.chars[CHARACTERISTIC_LEVEL_OF_FAN_SPEED],
-            pack("<HHH", humidity, light, trickle),
-        )
+        await self._write(CHARACTERISTIC_LEVEL_OF_FAN_SPEED, humidity, light, trickle)
 
     async def getHeatDistributor(self) -> HeatDistributorSettings:
-        return HeatDistributorSettings._make(
-            unpack(
-                "<BHH",
-                await self._readUUID(self.chars[CHARACTERISTIC_TEMP_HEAT_DISTRIBUTOR]),
-            )
-        )
+        return await self._read(CHARACTERISTIC_TEMP_HEAT_DISTRIBUTOR)
     
     async def setHeatDistributor(self, temperatureLimit, fanSpeedBelow, fanSpeedAbove) -> None:
         _LOGGER.debug(
@@ -139,15 +89,15 @@ class Calima(BaseDevice):
             fanSpeedBelow,
             fanSpeedAbove,
         )
-        await self._writeUUID(
-            self.chars[CHARACTERISTIC_TEMP_HEAT_DISTRIBUTOR],
-            pack("<BHH", temperatureLimit, fanSpeedBelow, fanSpeedAbove),
+        await self._write(
+            CHARACTERISTIC_TEMP_HEAT_DISTRIBUTOR,
+            temperatureLimit,
+            fanSpeedBelow,
+            fanSpeedAbove,
         )
 
     async def getSilentHours(self) -> SilentHours:
-        return SilentHours._make(
-            unpack("<5B", await self._readUUID(self.chars[CHARACTERISTIC_NIGHT_MODE]))
-        )
+        return await self._read(CHARACTERISTIC_NIGHT_MODE)
 
     async def setSilentHours(
         self, on: bool, startingTime: datetime.time, endingTime: datetime.time
@@ -159,74 +109,36 @@ class Calima(BaseDevice):
             endingTime.hour,
             endingTime.minute,
         )
-        value = pack(
-            "<5B",
+        await self._write(
+            CHARACTERISTIC_NIGHT_MODE,
             int(on),
             startingTime.hour,
             startingTime.minute,
             endingTime.hour,
             endingTime.minute,
         )
-        await self._writeUUID(self.chars[CHARACTERISTIC_NIGHT_MODE], value)
 
     async def getTrickleDays(self) -> TrickleDays:
-        return TrickleDays._make(
-            unpack(
-                "<2B",
-                await self._readUUID(self.chars[CHARACTERISTIC_BASIC_VENTILATION]),
-            )
-        )
+        return await self._read(CHARACTERISTIC_BASIC_VENTILATION)
 
     async def setTrickleDays(self, weekdays, weekends) -> None:
-        await self._writeUUID(
-            self.chars[CHARACTERISTIC_BASIC_VENTILATION],
-            pack("<2B", weekdays, weekends),
-        )
+        await self._write(CHARACTERISTIC_BASIC_VENTILATION, weekdays, weekends)
 
     async def getLightSensorSettings(self) -> LightSensorSettings:
-        return LightSensorSettings._make(
-            unpack(
-                "<2B", await self._readUUID(self.chars[CHARACTERISTIC_TIME_FUNCTIONS])
-            )
-        )
+        return await self._read(CHARACTERISTIC_TIME_FUNCTIONS)
 
     async def setLightSensorSettings(self, delayed, running) -> None:
-        # Align with Vent-Axia app / select options: delayed 0 or 1-10; running 5-60.
-        if delayed not in (0, *range(1, 11)):
-            raise ValueError("Delayed must be 0 or 1-10 minutes")
-        if running not in range(5, 61):
-            raise ValueError("Running time must be 5-60 minutes")
-
-        await self._writeUUID(
-            self.chars[CHARACTERISTIC_TIME_FUNCTIONS], pack("<2B", delayed, running)
-        )
+        validate_light_sensor_settings(delayed, running)
 
-    async def getSensorsSensitivity(self) -> Sensitivity:
-        # Hum Active | Hum Sensitivity | Light Active | Light Sensitivity
-        # We fix so that Sensitivity = 0 if active = 0
-        l = Sensitivity._make(
-            unpack("<4B", await self._readUUID(self.chars[CHARACTERISTIC_SENSITIVITY]))
-        )
+        await self._write(CHARACTERISTIC_TIME_FUNCTIONS, delayed, running)
 
-        return Sensitivity._make(
-            unpack(
-                "<4B",
-                bytearray(
-                    [
-                        l.HumidityOn,
-                        l.HumidityOn and l.Humidity,
-                        l.LightOn,
-                        l.LightOn and l.Light,
-                    ]
-                ),
-            )
-        )
+    async def getSensorsSensitivity(self) -> Sensitivity:
+        # Sensitivity reads as 0 while its sensor is not active
+        return await self._read(CHARACTERISTIC_SENSITIVITY)
 
     async def setSensorsSensitivity(self, humidity, light) -> None:
-        if humidity > 3 or humidity < 0:
-            raise ValueError("Humidity sensitivity must be between 0-3")
-        if light > 3 or light < 0:
-            raise ValueError("Light sensitivity must be between 0-3")
+        validate_sensors_sensitivity(humidity, light)
 
-        value = pack("<4B", bool(humidity), humidity, bool(light), light)
-        await self._writeUUID(self.chars[CHARACTERISTIC_SENSITIVITY], value)
+        await self._write(
+            CHARACTERISTIC_SENSITIVITY, bool(humidity), humidity, bool(light), light
+        )
@@ -0,0 +1,131 @@
+"""One BLE link per fan, shared by everything that talks to it."""
+
+import asyncio
+import logging
+
+from collections.abc import Callable
+
+from bleak.backends.device import BLEDevice
+from bleak_retry_connector import (
+    BleakClientWithServiceCache,
+    close_stale_connections,
+    establish_connection,
+)
+
+from ..const import DATA_CONNECTIONS
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ConnectionManager:
+    """Owns the BleakClientWithServiceCache of every fan, keyed by MAC.
+
+    These fans accept a single link. Coordinators and config flows each
+    have their own device object, but borrow the same client through
+    here: connecting to a fan that is connected already joins its link,
+    and the link is only dropped when the last borrower lets go. Each MAC
+    also has one operation lock, so a PIN check waits for a running poll
+    rather than competing with it.
+
+    Stale links left behind by an earlier run are closed once per fan,
+    on its first connection, not on every connect.
+    """
+
+    def __init__(self) -> None:
+        self._clients: dict[str, BleakClientWithServiceCache] = {}
+        # mac -> callbacks of the borrowers, told when the link drops
+        self._borrowers: dict[str, dict[object, Callable[[], None]]] = {}
+        self._connect_locks: dict[str, asyncio.Lock] = {}
+        self._operation_locks: dict[str, asyncio.Lock] = {}
+        self._stale_closed: set[str] = set()
+
+    def operation_lock(self, mac: str) -> asyncio.Lock:
+        """The lock serialising everything done over the fan's link."""
+        return self._operation_locks.setdefault(mac.lower(), asyncio.Lock())
+
+    def client(self, mac: str) -> BleakClientWithServiceCache | None:
+        client = self._clients.get(mac.lower())
+        return client if client is not None and client.is_connected else None
+
+    async def async_connect(
+        self,
+        device: BLEDevice,
+        borrower: object,
+        on_disconnect: Callable[[], None],
+        name: str,
+        timeout: float,
+    ) -> BleakClientWithServiceCache:
+        """Borrow the fan's link, connecting if nobody holds it yet."""
+        mac = device.address.lower()
+        async with self._connect_locks.setdefault(mac, asyncio.Lock()):
+            if (client := self.client(mac)) is None:
+                if mac not in self._stale_closed:
+                    try:
+                        await close_stale_connections(device)
+                    except Exception:
+                        _LOGGER.debug("Closing stale connections to %s failed", mac)
+                    self._stale_closed.add(mac)
+
+                client = await establish_connection(
+                    BleakClientWithServiceCache,
+                    device,
+                    name=name,
+                    disconnected_callback=lambda client: self._client_disconnected(
+                        mac, client
+                    ),
+                    use_services_cache=True,
+                    max_attempts=5,
+                    retry_interval=1.0,
+                    timeout=timeout,
+                )
+                self._clients[mac] = client
+            else:
+                _LOGGER.debug("Joining the open link to %s", mac)
+            self._borrowers.setdefault(mac, {})[borrower] = on_disconnect
+            return client
+
+    async def async_release(self, mac: str, borrower: object, force: bool = False) -> None:
+        """Let go of the link; it is dropped once nobody else holds it.
+
+        With force the link is dropped for every borrower, for a link that
+        is known to be broken.
+        """
+        mac = mac.lower()
+        async with self._connect_locks.setdefault(mac, asyncio.Lock()):
+            borrowers = self._borrowers.get(mac, {})
+            borrowers.pop(borrower, None)
+            if borrowers and not force:
+                return
+            if (client := self._clients.pop(mac, None)) is not None:
+                try:
+                    await client.disconnect()
+                except Exception as e:
+                    _LOGGER.warning("Error disconnecting %s: %s", mac, e)
+            self._dropped(mac)
+
+    def _client_disconnected(self, mac: str, client) -> None:
+        # Also called for links dropped on purpose, maybe after a new one
+        # to the same fan was made
+        if self._clients.get(mac) is client:
+            self._dropped(mac)
+
+    def _dropped(self, mac: str) -> None:
+        self._clients.pop(mac, None)
+        for on_disconnect in self._borrowers.pop(mac, {}).values():
+            on_disconnect()
+
+    def as_dict(self) -> dict[str, dict]:
+        return {
+            mac: {
+                "connected": client.is_connected,
+                "borrowers": len(self._borrowers.get(mac, ())),
+            }
+            for mac, client in self._clients.items()
+        }
+
+
+def get_connection_manager(hass) -> ConnectionManager:
+    """Return the connection manager shared by all fans."""
+    if (manager := hass.data.get(DATA_CONNECTIONS)) is None:
+        manager = hass.data[DATA_CONNECTIONS] = ConnectionManager()
+    return manager
@@ -1,29 +1,30 @@
 import asyncio
 import logging
-import math
 
 from .characteristics import *
 from .base_device import BaseDevice
-
-from collections import namedtuple
-from struct import pack, unpack
-
-_LOGGER = logging.getLogger(__name__)
-
-AutomaticCycles = namedtuple("AutomaticCycles", "Active Hour TimeMin Speed")
-ConstantOperation = namedtuple("ConstantOperation", "Active Speed")
-FanState = namedtuple("FanState", "Humidity AirQuality Temp Light RPM Mode")
-Humidity = namedtuple("Humidity", "Active Level Speed")
-TimerFunctions = namedtuple("TimerFunctions", "PresenceTime TimeActive TimeMin Speed")
-PresenceGas = namedtuple(
-    "PresenceGas", "PresenceActive PresenceLevel GasActive GasLevel"
+from .codecs import (
+    SVENSA_CODECS,
+    AutomaticCycles,
+    ConstantOperation,
+    Humidity,
+    Pause,
+    PresenceGas,
+    SvensaFanState as FanState,
+    TimerFunctions,
 )
-Pause = namedtuple(
-    "Pause", "PauseActive PauseMinutes"
+from .validation import (
+    validate_constant_operation,
+    validate_humidity,
+    validate_timer_functions,
 )
 
+_LOGGER = logging.getLogger(__name__)
+
 
 class Svensa(BaseDevice):
+    codecs = SVENSA_CODECS
+
     def __init__(self, hass, mac, pin):
         super().__init__(hass, mac, pin)
 
@@ -68,137 +69,48 @@ class Svensa(BaseDevice):
     ############## STATE / SENSOR DATA #############
     ################################################
     async def getState(self) -> FanState:
-        # Byte  Byte    Short Short Short Short    Byte Byte Byte Byte  Byte
-        # Trg1  Trg2    Hum   Gas   Light FanSpeed Tbd  Tbd  Tbd  Temp? Tbd
-        v = unpack(
-            "<2B4H5B", await self._readUUID(self.chars[CHARACTERISTIC_SENSOR_DATA])
-        )
-        _LOGGER.debug("Read Fan States: %s", v)
-
-        # Found in package com.component.svara.views.calima.SkyModeView
-        trigger = "No trigger"
-
-        if v[1] & 0x10:
-            # Check 5th-last bit (and remaining = 0)
-            trigger = "Constant Speed"
-        else:
-            # Check last 4 bits
-            trg_value = v[1] & 0x0F
-            if trg_value != 11:
-                match trg_value:
-                    case 0:
-                        trigger = "Idle"
-                    case 1:
-                        trigger = "Humidity"
-                    case 2:
-                        trigger = "Light"
-                    case 3:
-                        trigger = "Timer"
-                    case 4:
-                        trigger = "Air Quality Sensor"
-                    case 5:
-                        trigger = "Airing"
-                    case 6:
-                        trigger = "Pause"
-                    case 7:
-                        trigger = "Boost"
-                    case _:
-                        trigger = "Timer"
-            else:
-                trigger = "Timer"
-
-        # FanState = namedtuple("FanState", "Humidity AirQuality Temp Light RPM Mode")
-        return FanState(
-            # Below the threshold the raw value cannot be converted at all
-            # (log2 of <= 0 is a domain error, and low values give negative
-            # percentages), so there is no reading to report. Return None,
-            # which Home Assistant renders as "unknown", rather than 0 -
-            # which presents "no reading" as a measured 0% RH.
-            round(15 * math.log2(v[2]) - 75, 2) if v[2] > 35 else None,
-            v[3],
-            v[9],
-            v[4],
-            v[5],
-            trigger,
-        )
+        state = await self._read(CHARACTERISTIC_SENSOR_DATA)
+        _LOGGER.debug("Read Fan States: %s", state)
+        return state
 
     ################################################
     ############ CONFIGURATION FUNCTIONS ###########
     ################################################
     async def getAutomaticCycles(self) -> AutomaticCycles:
-        # Active | Hour | TimeMin | Speed
-        l = AutomaticCycles._make(
-            unpack(
-                "<3BH",
-                await self._readUUID(self.chars[CHARACTERISTIC_AUTOMATIC_CYCLES]),
-            )
-        )
-
-        # We fix so that TimeMin = 0 if Active = 0
-        return AutomaticCycles(l.Active, l.Hour, l.TimeMin if l.Active else 0, l.Speed)
+        # TimeMin reads as 0 while the cycles are not active
+        return await self._read(CHARACTERISTIC_AUTOMATIC_CYCLES)
 
     async def setAutomaticCycles(self, hour: int, timeMin: int, speed: int) -> None:
-        await self._writeUUID(
-            self.chars[CHARACTERISTIC_AUTOMATIC_CYCLES],
-            pack("<3BH", timeMin > 0, hour, timeMin, speed),
+        await self._write(
+            CHARACTERISTIC_AUTOMATIC_CYCLES, timeMin > 0, hour, timeMin, speed
         )
 
     async def getConstantOperation(self) -> ConstantOperation:
-        v = unpack(
-            "<BH", await self._readUUID(self.chars[CHARACTERISTIC_CONSTANT_OPERATION])
-        )
+        v = await self._read(CHARACTERISTIC_CONSTANT_OPERATION)
         _LOGGER.debug("Read Constant Operation settings: %s", v)
-
-        # ConstantOperation = namedtuple("ConstantOperation", "Active Speed")
-        return ConstantOperation(v[0], v[1])
+        return v
 
     async def setConstantOperation(self, active: bool, speed: int) -> None:
         _LOGGER.debug("Write Constant Operation settings")
+        validate_constant_operation(active, speed)
 
-        if speed % 25:
-            raise ValueError("Speed must be a multiple of 25")
-
-        await self._writeUUID(
-            self.chars[CHARACTERISTIC_CONSTANT_OPERATION], pack("<BH", active, speed)
-        )
+        await self._write(CHARACTERISTIC_CONSTANT_OPERATION, active, speed)
 
     async def getHumidity(self) -> Humidity:
-        v = unpack("<BBH", await self._readUUID(self.chars[CHARACTERISTIC_HUMIDITY]))
+        # Level reads as 0 while humidity control is not active
+        v = await self._read(CHARACTERISTIC_HUMIDITY)
         _LOGGER.debug("Read Fan Humidity settings: %s", v)
-
-        # Humidity = namedtuple("Humidity", "Active Level Speed")
-        return Humidity(v[0], v[1] if v[0] != 0 else 0, v[2])
+        return v
 
     async def setHumidity(self, active: bool, level: int, speed: int) -> None:
         _LOGGER.debug("Write Fan Humidity settings")
+        validate_humidity(active, level, speed)
 
-        if speed % 25:
-            raise ValueError("Speed must be a multiple of 25")
-
-        await self._writeUUID(
-            self.chars[CHARACTERISTIC_HUMIDITY], pack("<BBH", active, level, speed)
-        )
+        await self._write(CHARACTERISTIC_HUMIDITY, active, level, speed)
 
     async def getPresenceGas(self) -> PresenceGas:
-        # Pres Active | Pres Sensitivity | Gas Active | Gas Sensitivity
-        # We fix so that Sensitivity = 0 if active = 0
-        l = PresenceGas._make(
-            unpack("<4B", await self._readUUID(self.chars[CHARACTERISTIC_PRESENCE_GAS]))
-        )
-
-        return PresenceGas._make(
-            unpack(
-                "<4B",
-                bytearray(
-                    [
-                        l.PresenceActive,
-                        l.PresenceActive and l.PresenceLevel,
-                        l.GasActive,
-                        l.GasActive and l.GasLevel,
-                    ]
-                ),
-            )
-        )
+        # Sensitivity reads as 0 while its sensor is not active
+        return await self._read(CHARACTERISTIC_PRESENCE_GAS)
 
     async def setPresenceGas(
         self,
@@ -214,51 +126,37 @@ class Svensa(BaseDevice):
         if not gas_active:
             gas_level = 0
 
-        await self._writeUUID(
-            self.chars[CHARACTERISTIC_PRESENCE_GAS],
-            pack("<4B", presence_active, presence_level, gas_active, gas_level),
+        await self._write(
+            CHARACTERISTIC_PRESENCE_GAS,
+            presence_active,
+            presence_level,
+            gas_active,
+            gas_level,
         )
 
     async def getPause(self) -> Pause:
         # Pause Active | Pause Minutes
         # When paused, Minutes indicates how many minutes are remaining.
         # When not paused, Minutes indicates the saved pause length.
-        v = unpack("<BB", await self._readUUID(self.chars[CHARACTERISTIC_PAUSE]))
-        return Pause(v[0], v[1])
+        return await self._read(CHARACTERISTIC_PAUSE)
 
     async def setPause(
         self,
         active: bool,
         duration: int,
     ) -> None:
-        v = pack("<BB", active, duration)
         _LOGGER.debug("Write Pause")
-
-        await self._writeUUID(
-            self.chars[CHARACTERISTIC_PAUSE],
-            v,
-        )
+        await self._write(CHARACTERISTIC_PAUSE, active, duration)
 
     async def getTimerFunctions(self) -> TimerFunctions:
-        # PresenceTime | TimeActive | TimeMin | Speed, we fix so that TimeMin (Delay Time) = 0 if TimeActive = 0
-        l = TimerFunctions._make(
-            unpack(
-                "<3BH", await self._readUUID(self.chars[CHARACTERISTIC_TIME_FUNCTIONS])
-            )
-        )
-        return TimerFunctions(l.PresenceTime, l.TimeActive, int(l.TimeActive and l.TimeMin), l.Speed)
+        # TimeMin (Delay Time) reads as 0 while TimeActive is off
+        return await self._read(CHARACTERISTIC_TIME_FUNCTIONS)
 
     async def setTimerFunctions(
         self, presenceTimeMin, timeActive: bool, timeMin: int, speed: int
     ) -> None:
-        if presenceTimeMin not in (5, 10, 15, 30, 60):
-            raise ValueError("presenceTime must be 5, 10, 15, 30 or 60 minutes")
-        if timeMin not in (0, 2, 4):
-            raise ValueError("timeActive must be 0, 2 or 4 minutes")
-        if speed % 25:
-            raise ValueError("Speed must be a multiple of 25")
+        validate_timer_functions(presenceTimeMin, timeActive, timeMin, speed)
 
-        await self._writeUUID(
-            self.chars[CHARACTERISTIC_TIME_FUNCTIONS],
-            pack("<3BH", presenceTimeMin, timeActive, timeMin, speed),
+        await self._write(
+            CHARACTERISTIC_TIME_FUNCTIONS, presenceTimeMin, timeActive, timeMin, speed
         )
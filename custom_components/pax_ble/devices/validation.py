@@ -0,0 +1,68 @@
+"""Value checks of the device setters, usable before connecting.
+
+Each function takes the arguments of the setter it is named after and
+raises ValueError for values the fan would not accept. Kept free of
+homeassistant and bleak imports so it can be unit tested on its own.
+"""
+
+
+def _check_speed(speed) -> None:
+    if speed % 25:
+        raise ValueError("Speed must be a multiple of 25")
+
+
+################################################
+#################### COMMON ####################
+################################################
+def validate_boost_mode(on, speed, seconds) -> None:
+    _check_speed(speed)
+
+
+################################################
+#################### CALIMA ####################
+################################################
+def validate_automatic_cycles(setting) -> None:
+    if setting < 0 or setting > 3:
+        raise ValueError("Setting must be between 0-3")
+
+
+def validate_fan_speed_settings(humidity, light, trickle) -> None:
+    for val in (humidity, light, trickle):
+        if val % 25 != 0:
+            raise ValueError("Speeds should be multiples of 25")
+        if val > 2500 or val < 0:
+            raise ValueError("Speeds must be between 0 and 2500 rpm")
+
+
+def validate_light_sensor_settings(delayed, running) -> None:
+    # Align with Vent-Axia app / select options: delayed 0 or 1-10; running 5-60.
+    if delayed not in (0, *range(1, 11)):
+        raise ValueError("Delayed must be 0 or 1-10 minutes")
+    if running not in range(5, 61):
+        raise ValueError("Running time must be 5-60 minutes")
+
+
+def validate_sensors_sensitivity(humidity, light) -> None:
+    if humidity > 3 or humidity < 0:
+        raise ValueError("Humidity sensitivity must be between 0-3")
+    if light > 3 or light < 0:
+        raise ValueError("Light sensitivity must be between 0-3")
+
+
+################################################
+#################### SVENSA ####################
+################################################
+def validate_constant_operation(active, speed) -> None:
+    _check_speed(speed)
+
+
+def validate_humidity(active, level, speed) -> None:
+    _check_speed(speed)
+
+
+def validate_timer_functions(presenceTimeMin, timeActive, timeMin, speed) -> None:
+    if presenceTimeMin not in (5, 10, 15, 30, 60):
+        raise ValueError("presenceTime must be 5, 10, 15, 30 or 60 minutes")
+    if timeMin not in (0, 2, 4):
+        raise ValueError("timeActive must be 0, 2 or 4 minutes")
+    _check_speed(speed)
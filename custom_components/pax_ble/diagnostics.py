@@ -0,0 +1,49 @@
+"""Diagnostics support for Pax BLE."""
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_DEVICES
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_MAC, CONF_PIN, DATA_SCHEDULER, DOMAIN
+from .fleet import async_get_slots
+from .latency import merged
+from .loop_lag import async_get_lag_monitor
+
+TO_REDACT = {CONF_MAC, CONF_PIN}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinators = hass.data[DOMAIN][entry.entry_id][CONF_DEVICES]
+    devices = []
+    for device_id, device_data in entry.data[CONF_DEVICES].items():
+        device = {"config": async_redact_data(device_data, TO_REDACT)}
+        if (coordinator := coordinators.get(device_id)) is not None:
+            device.update(coordinator.diagnostics())
+        devices.append(device)
+
+    # Fans behind the same adapter or proxy, added up
+    slots = async_get_slots(hass)
+    by_route = {}
+    for coordinator in coordinators.values():
+        by_route.setdefault(slots.route(coordinator.mac), []).append(
+            coordinator.fan.latency
+        )
+
+    # Only there while the fleet scheduler is on
+    scheduler = hass.data.get(DATA_SCHEDULER)
+
+    return {
+        "devices": devices,
+        "latency_by_route": {
+            route: merged(recorders) for route, recorders in by_route.items()
+        },
+        "connection_slots": slots.as_dict(),
+        "poll_scheduler": scheduler.as_dict() if scheduler is not None else None,
+        "loop_lag": async_get_lag_monitor(hass).as_dict(),
+    }
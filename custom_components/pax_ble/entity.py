@@ -2,16 +2,53 @@
 
 import logging
 
+from collections.abc import Callable
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_DEVICES
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
 from .coordinator import BaseCoordinator
+from .profiler import section
 
 _LOGGER = logging.getLogger(__name__)
 
 
+@callback
+def async_setup_fan_entities(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: Callable[[list], None],
+    fan_entities: Callable[[BaseCoordinator], list],
+) -> None:
+    """Add a platform's entities for every fan, and keep a way to add more.
+
+    The adder is kept with the entry's data, so a fan added to the entry
+    later gets its entities without reloading the other fans.
+    """
+    entry_data = hass.data[DOMAIN][config_entry.entry_id]
+
+    @callback
+    def async_add_fan(coordinator: BaseCoordinator) -> None:
+        async_add_entities(fan_entities(coordinator))
+
+    entry_data.setdefault("entity_adders", []).append(async_add_fan)
+
+    # Values are already in the coordinator (read or restored); don't ask
+    # every entity for an update before it is added.
+    async_add_entities(
+        [
+            entity
+            for coordinator in entry_data[CONF_DEVICES].values()
+            for entity in fan_entities(coordinator)
+        ]
+    )
+
+
 class PaxCalimaEntity(CoordinatorEntity):
     """Pax Calima base entity class."""
 
@@ -35,7 +72,34 @@ class PaxCalimaEntity(CoordinatorEntity):
         """Store this entities key."""
         self._key = paxentity.key
 
+    @property
+    def _subscribed_keys(self) -> tuple[str, ...]:
+        """State keys whose changes should rewrite this entity."""
+        return (self._key,)
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to the keys this entity reads."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_key_listener(
+                self._handle_key_update, self._subscribed_keys
+            )
+        )
+
+    @callback
+    def _handle_key_update(self) -> None:
+        """Handle a change of one of the subscribed keys."""
+        with section("entity write"):
+            self._handle_coordinator_update()
+
     @property
     def extra_state_attributes(self):
         """Return the state attributes."""
-        return self._extra_state_attributes
+        attrs = dict(self._extra_state_attributes)
+
+        # Value comes from the snapshot of the last run, not a read yet
+        if (read_at := self.coordinator.restored_at(self._key)) is not None:
+            attrs["restored"] = True
+            attrs["read_at"] = read_at.isoformat()
+        attrs.update(self.coordinator.write_status(self._key))
+        return attrs
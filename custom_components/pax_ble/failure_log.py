@@ -0,0 +1,106 @@
+"""Warnings of repeated failures, aggregated per fan and kind of error.
+
+Kept free of homeassistant imports so it can be unit tested on its own.
+"""
+
+import logging
+
+from collections.abc import Callable
+from typing import Any
+
+SUMMARY_INTERVAL = 600  # Seconds between summaries of a repeating failure
+
+
+class _Failure:
+    __slots__ = ("first", "logged", "count", "total", "last")
+
+    def __init__(self, now: float) -> None:
+        self.first = now
+        self.logged = now
+        self.count = 0  # Since the last warning
+        self.total = 1
+        self.last = ""
+
+
+class FailureLog:
+    """Logs the first failure of a kind in full, then only summaries.
+
+    A failure is keyed by what failed ("connect", "clock sync") and its
+    error class. Repeats are logged at debug level and noted in the running
+    trace; every SUMMARY_INTERVAL the count is logged as a warning. When
+    the operation succeeds again, resolved() logs how many failures there
+    were and the next failure is logged in full again.
+
+    clock is the time source, time.monotonic in use.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        clock: Callable[[], float],
+        note: Callable[[str], None] | None = None,
+    ) -> None:
+        self._name = name
+        self._clock = clock
+        self._note = note
+        self._failures: dict[tuple[str, str], _Failure] = {}
+
+    def warning(
+        self,
+        logger: logging.Logger,
+        what: str,
+        error: str | BaseException,
+        msg: str,
+        *args: Any,
+    ) -> None:
+        if isinstance(error, BaseException):
+            error = type(error).__name__
+        now = self._clock()
+        if (failure := self._failures.get((what, error))) is None:
+            self._failures[(what, error)] = _Failure(now)
+            logger.warning(msg, *args)
+            return
+
+        failure.count += 1
+        failure.total += 1
+        failure.last = msg % args if args else msg
+        logger.debug(msg, *args)
+        if self._note is not None:
+            self._note(failure.last)
+        if now - failure.logged >= SUMMARY_INTERVAL:
+            logger.warning(
+                "%s: %d more %s failures (%s) in %d min, last: %s",
+                self._name,
+                failure.count,
+                what,
+                error,
+                round((now - failure.logged) / 60),
+                failure.last,
+            )
+            failure.logged = now
+            failure.count = 0
+
+    def resolved(self, logger: logging.Logger, what: str) -> None:
+        """what succeeded again; summarize the failures before it, if any."""
+        for key in [key for key in self._failures if key[0] == what]:
+            failure = self._failures.pop(key)
+            if failure.total > 1:
+                logger.info(
+                    "%s: %s working again after %d failures (%s) in %d min",
+                    self._name,
+                    what,
+                    failure.total,
+                    key[1],
+                    round((self._clock() - failure.first) / 60),
+                )
+
+    def as_dict(self) -> dict[str, dict[str, Any]]:
+        now = self._clock()
+        return {
+            f"{what}: {error}": {
+                "failures": failure.total,
+                "since_s": round(now - failure.first),
+                "last": failure.last,
+            }
+            for (what, error), failure in self._failures.items()
+        }
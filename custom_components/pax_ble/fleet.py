@@ -0,0 +1,314 @@
+"""Coordination of connections across every configured fan."""
+
+import asyncio
+import logging
+import time
+
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+
+from homeassistant.components import bluetooth
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import (
+    AIRTIME_MAX_DEFER,
+    AIRTIME_WINDOW,
+    DATA_FLEET,
+    DATA_SCHEDULER,
+    DOMAIN,
+    PRIORITY_AIRTIME_SHARE,
+    PROXY_CONNECTION_SLOTS,
+    SCHEDULER_BATCH_WINDOW,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+UNKNOWN_ROUTE = "unknown"
+
+
+class ConnectionSlots:
+    """Limits the connections open at once through each adapter or proxy.
+
+    A fan's route is the Bluetooth adapter or ESPHome proxy that last heard
+    it connectably. Each route lets PROXY_CONNECTION_SLOTS sessions run at
+    once, so many fans behind different proxies are served in parallel
+    while no proxy is asked for more connections than it can hold.
+
+    Links kept open between sessions, see BaseCoordinator.async_prepare,
+    are held against their route's slots too. A session that would find
+    its route full releases the longest held link of another fan first,
+    and waits for it to be released before taking a slot.
+
+    The time sessions hold a slot is the airtime they use of their route.
+    Routine polls wait, see async_wait_turn, while their route has used
+    more of the last AIRTIME_WINDOW than their fan's priority allows, so
+    low priority fans are polled when the route is quiet.
+    """
+
+    def __init__(self, hass: HomeAssistant, per_route: int = PROXY_CONNECTION_SLOTS) -> None:
+        self._hass = hass
+        self._per_route = per_route
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        # route -> sessions holding one of its slots
+        self._in_use: dict[str, int] = {}
+        # route -> mac -> coroutine function releasing the fan's held link
+        self._held: dict[str, dict[str, Callable[[], Awaitable[None]]]] = {}
+        # route -> (monotonic end, seconds) of the sessions within the window
+        self._airtime: dict[str, deque[tuple[float, float]]] = {}
+        # route -> counters reported by as_dict
+        self._stats: dict[str, dict[str, float]] = {}
+
+    def route(self, mac: str) -> str:
+        service_info = bluetooth.async_last_service_info(
+            self._hass, mac.upper(), connectable=True
+        )
+        return service_info.source if service_info is not None else UNKNOWN_ROUTE
+
+    @asynccontextmanager
+    async def acquire(self, mac: str) -> AsyncIterator[str]:
+        """Hold one of the slots of the fan's route, yielding the route."""
+        route = self.route(mac)
+        if (semaphore := self._semaphores.get(route)) is None:
+            semaphore = self._semaphores[route] = asyncio.Semaphore(self._per_route)
+        held = self._held.get(route, {})
+        if self.free(route) <= len(held) and (
+            other := next((m for m in held if m != mac), None)
+        ):
+            _LOGGER.debug("Releasing the held link of %s on %s for %s", other, route, mac)
+            # Before connecting, so the proxy has the connection back
+            await held.pop(other)()
+        if semaphore.locked():
+            _LOGGER.debug("Waiting for a connection slot on %s for %s", route, mac)
+        async with semaphore:
+            self._in_use[route] = self._in_use.get(route, 0) + 1
+            started = time.monotonic()
+            try:
+                yield route
+            finally:
+                self._in_use[route] -= 1
+                ended = time.monotonic()
+                self._airtime.setdefault(route, deque()).append(
+                    (ended, ended - started)
+                )
+                stats = self._route_stats(route)
+                stats["sessions"] += 1
+                stats["airtime"] += ended - started
+
+    def free(self, route: str) -> int:
+        """Slots of the route no session holds."""
+        return self._per_route - self._in_use.get(route, 0)
+
+    def airtime_used(self, route: str) -> float:
+        """Seconds of sessions through the route within the last window."""
+        used = self._airtime.get(route)
+        if not used:
+            return 0.0
+        while used and used[0][0] <= time.monotonic() - AIRTIME_WINDOW:
+            used.popleft()
+        return sum(seconds for _, seconds in used)
+
+    async def async_wait_turn(self, mac: str, priority: str) -> float:
+        """Defer routine work while the fan's route is over its priority's budget.
+
+        Waits at most AIRTIME_MAX_DEFER, so no fan goes unpolled for long.
+        Returns the seconds waited.
+        """
+        if (share := PRIORITY_AIRTIME_SHARE.get(priority)) is None:
+            return 0.0
+        route = self.route(mac)
+        started = time.monotonic()
+        deadline = started + AIRTIME_MAX_DEFER
+        while (now := time.monotonic()) < deadline and (
+            self.airtime_used(route) >= AIRTIME_WINDOW * share
+        ):
+            # Until the oldest session leaves the window
+            oldest = self._airtime[route][0][0]
+            await asyncio.sleep(min(oldest + AIRTIME_WINDOW, deadline) - now)
+        if (waited := time.monotonic() - started) > 0.1:
+            _LOGGER.debug(
+                "Deferred %s priority work of %s on %s for %.0f s",
+                priority, mac, route, waited,
+            )
+            stats = self._route_stats(route)
+            stats["deferred"] += 1
+            stats["deferred_seconds"] += waited
+        return waited
+
+    def _route_stats(self, route: str) -> dict[str, float]:
+        return self._stats.setdefault(
+            route,
+            {"sessions": 0, "airtime": 0.0, "deferred": 0, "deferred_seconds": 0.0},
+        )
+
+    def hold(self, mac: str, release: Callable[[], Awaitable[None]]) -> None:
+        """Count a link kept open to mac against its route's slots."""
+        self.unhold(mac)
+        self._held.setdefault(self.route(mac), {})[mac] = release
+
+    def unhold(self, mac: str) -> None:
+        for held in self._held.values():
+            held.pop(mac, None)
+
+    def as_dict(self) -> dict[str, dict[str, float]]:
+        return {
+            route: {
+                "limit": self._per_route,
+                "free": self.free(route),
+                "held": len(self._held.get(route, ())),
+                # Share of the window the route's sessions took, which
+                # passes 1.0 when several slots are busy at once
+                "airtime_used": round(self.airtime_used(route) / AIRTIME_WINDOW, 3),
+                **{
+                    key: round(value, 1)
+                    for key, value in self._route_stats(route).items()
+                },
+            }
+            for route in self._semaphores
+        }
+
+
+def async_get_slots(hass: HomeAssistant) -> ConnectionSlots:
+    """Return the connection slots shared by every entry."""
+    if (slots := hass.data.get(DATA_FLEET)) is None:
+        slots = hass.data[DATA_FLEET] = ConnectionSlots(hass)
+    return slots
+
+
+class PollScheduler:
+    """One timer planning the polls of every fan, instead of one per fan.
+
+    A coordinator using it hands its next poll here, see
+    BaseCoordinator._schedule_refresh. A fan keeps its phase from poll to
+    poll; a fan that is new or changes interval is placed in the widest gap
+    between the fans polled at the same interval, so they stay spread out
+    rather than drifting together. Due fans run one after another per
+    route, in parallel across routes, and fans on a route that are due
+    within SCHEDULER_BATCH_WINDOW join them so the proxy is busy once.
+
+    Planned polls are kept for fans that are removed, so a reloaded entry
+    carries on with the same schedule.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._hass = hass
+        self._slots = async_get_slots(hass)
+        self._active: dict[str, object] = {}  # mac -> coordinator
+        # mac -> (monotonic time of the next poll, interval)
+        self._plan: dict[str, tuple[float, float]] = {}
+        self._running: set[str] = set()
+        self._cancel_timer: Callable[[], None] | None = None
+
+    @callback
+    def async_plan(self, coordinator, interval: float) -> None:
+        """Plan the next poll of the coordinator's fan."""
+        mac = coordinator.mac
+        now = time.monotonic()
+        due, planned_interval = self._plan.get(mac, (None, None))
+        if due is None or planned_interval != interval:
+            due = now + self._widest_gap(mac, interval, now)
+        while due <= now:
+            due += interval
+        self._plan[mac] = (due, interval)
+        self._active[mac] = coordinator
+        self._async_arm()
+
+    @callback
+    def async_remove(self, coordinator) -> None:
+        if self._active.pop(coordinator.mac, None) is not None:
+            self._async_arm()
+
+    def next_poll(self, mac: str) -> float | None:
+        """Seconds until the fan's next planned poll."""
+        if mac not in self._active:
+            return None
+        return round(max(0.0, self._plan[mac][0] - time.monotonic()), 1)
+
+    def _widest_gap(self, mac: str, interval: float, now: float) -> float:
+        """Offset from now of the middle of the widest gap between peers."""
+        offsets = sorted(
+            (due - now) % interval
+            for other, (due, other_interval) in self._plan.items()
+            if other != mac and other in self._active and other_interval == interval
+        )
+        if not offsets:
+            return interval
+        gaps = [
+            (offsets[(i + 1) % len(offsets)] - offset) % interval
+            for i, offset in enumerate(offsets)
+        ]
+        widest = max(range(len(gaps)), key=gaps.__getitem__)
+        # A single peer, or peers all in phase, leave the whole interval
+        gap = gaps[widest] or interval
+        return (offsets[widest] + gap / 2) % interval or interval
+
+    @callback
+    def _async_arm(self) -> None:
+        if self._cancel_timer is not None:
+            self._cancel_timer()
+            self._cancel_timer = None
+        waiting = [
+            self._plan[mac][0] for mac in self._active if mac not in self._running
+        ]
+        if waiting:
+            self._cancel_timer = async_call_later(
+                self._hass, max(0.0, min(waiting) - time.monotonic()), self._async_fire
+            )
+
+    @callback
+    def _async_fire(self, _now) -> None:
+        self._cancel_timer = None
+        now = time.monotonic()
+        idle = [mac for mac in self._active if mac not in self._running]
+        routes = {
+            self._slots.route(mac) for mac in idle if self._plan[mac][0] <= now
+        }
+        batches: dict[str, list[str]] = {}
+        for mac in idle:
+            route = self._slots.route(mac)
+            if route in routes and self._plan[mac][0] <= now + SCHEDULER_BATCH_WINDOW:
+                batches.setdefault(route, []).append(mac)
+        for route, macs in batches.items():
+            macs.sort(key=lambda mac: self._plan[mac][0])
+            self._running.update(macs)
+            self._hass.async_create_background_task(
+                self._async_run(macs), f"{DOMAIN} polls on {route}"
+            )
+        self._async_arm()
+
+    async def _async_run(self, macs: list[str]) -> None:
+        for mac in macs:
+            if (coordinator := self._active.get(mac)) is None:
+                self._running.discard(mac)
+                continue
+            # Polled now; its next poll follows from here
+            due, interval = self._plan[mac]
+            self._plan[mac] = (min(due, time.monotonic()), interval)
+            try:
+                await coordinator.async_refresh()
+            except Exception:
+                _LOGGER.exception("Scheduled poll of %s failed", mac)
+            finally:
+                self._running.discard(mac)
+                # Planned again by the refresh. A fan nothing listens to any
+                # more was removed, see BaseCoordinator._unschedule_refresh
+                due, interval = self._plan[mac]
+                while due <= time.monotonic():
+                    due += interval
+                self._plan[mac] = (due, interval)
+        self._async_arm()
+
+    def as_dict(self) -> dict[str, object]:
+        return {
+            "fans": len(self._active),
+            "running": len(self._running),
+            "timer_armed": self._cancel_timer is not None,
+        }
+
+
+def async_get_scheduler(hass: HomeAssistant) -> PollScheduler:
+    """Return the poll scheduler shared by every entry."""
+    if (scheduler := hass.data.get(DATA_SCHEDULER)) is None:
+        scheduler = hass.data[DATA_SCHEDULER] = PollScheduler(hass)
+    return scheduler
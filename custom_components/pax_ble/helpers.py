@@ -9,6 +9,9 @@ from .const import (
 from .const import DeviceModel
 from .coordinator_calima import CalimaCoordinator
 from .coordinator_svensa import SvensaCoordinator
+from .devices.base_device import BaseDevice
+from .devices.calima import Calima
+from .devices.svensa import Svensa
 
 
 def getCoordinator(hass, device_data, dev):
@@ -24,13 +27,27 @@ def getCoordinator(hass, device_data, dev):
     match DeviceModel(model):
         case DeviceModel.CALIMA | DeviceModel.SVARA | DeviceModel.LEVANTE:
             coordinator = CalimaCoordinator(
-                hass, dev, model, mac, pin, scan_interval, scan_interval_fast
+                hass, dev, model, mac, pin, scan_interval, scan_interval_fast,
+                device_data,
             )
         case DeviceModel.SVENSA:
             coordinator = SvensaCoordinator(
-                hass, dev, model, mac, pin, scan_interval, scan_interval_fast
+                hass, dev, model, mac, pin, scan_interval, scan_interval_fast,
+                device_data,
             )
         case _:
             _LOGGER.debug("Unknown fan model")
 
     return coordinator
+
+
+def getDevice(hass, device_data) -> BaseDevice:
+    """The device of a fan's model on its own, for the config flows."""
+    mac = device_data[CONF_MAC]
+    pin = device_data[CONF_PIN]
+    match device_data.get(CONF_MODEL, "Calima"):
+        case DeviceModel.CALIMA | DeviceModel.SVARA | DeviceModel.LEVANTE:
+            return Calima(hass, mac, pin)
+        case DeviceModel.SVENSA:
+            return Svensa(hass, mac, pin)
+    return BaseDevice(hass, mac, pin)
@@ -0,0 +1,79 @@
+"""Persistent journal of writes waiting for an unreachable fan."""
+
+import datetime as dt
+import logging
+import time
+
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.storage import Store
+
+from .const import DATA_JOURNAL, DOMAIN, JOURNAL_SAVE_DELAY, JOURNAL_STORAGE_VERSION
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class WriteJournal:
+    """Setting values accepted while their fan could not be reached.
+
+    Entries are kept per MAC address and setting group, holding the latest
+    value of every key written to the group and when it was queued. They
+    survive restarts and are written when the fan is next connected.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._store = Store(hass, JOURNAL_STORAGE_VERSION, f"{DOMAIN}.journal")
+        self._records: dict[str, dict[str, dict]] = {}
+
+    async def async_load(self) -> None:
+        try:
+            data = await self._store.async_load()
+        except Exception as err:
+            _LOGGER.warning("Could not load write journal: %s", err)
+            data = None
+        self._records = (data or {}).get("devices", {})
+
+    def pending(self, mac: str) -> dict[str, dict]:
+        """The queued groups of a fan: {group: {"values", "queued_at"}}."""
+        return self._records.get(dr.format_mac(mac), {})
+
+    def async_queue(self, mac: str, group: str, key: str, value: Any) -> float:
+        """Queue a value, replacing one queued earlier for the same key."""
+        if isinstance(value, dt.time):
+            value = value.isoformat()
+        queued_at = time.time()
+        entry = self._records.setdefault(dr.format_mac(mac), {}).setdefault(
+            group, {"values": {}}
+        )
+        entry["values"][key] = value
+        entry["queued_at"] = queued_at
+        self._store.async_delay_save(self._data, JOURNAL_SAVE_DELAY)
+        return queued_at
+
+    def async_done(self, mac: str, group: str) -> None:
+        """Drop a group once it has been written."""
+        records = self._records.get(dr.format_mac(mac))
+        if records is None or records.pop(group, None) is None:
+            return
+        if not records:
+            del self._records[dr.format_mac(mac)]
+        # Saved at once, so a restart does not write the group again
+        self._store.async_delay_save(self._data, 0)
+
+    def async_remove(self, mac: str) -> None:
+        if self._records.pop(dr.format_mac(mac), None) is not None:
+            self._store.async_delay_save(self._data, JOURNAL_SAVE_DELAY)
+
+    def _data(self) -> dict:
+        return {"devices": self._records}
+
+
+async def async_get_journal(hass: HomeAssistant) -> WriteJournal:
+    """Return the shared write journal, loading it on first use."""
+    if (journal := hass.data.get(DATA_JOURNAL)) is None:
+        journal = WriteJournal(hass)
+        hass.data[DATA_JOURNAL] = journal
+        await journal.async_load()
+    return journal
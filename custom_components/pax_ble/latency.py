@@ -0,0 +1,169 @@
+"""Bounded latency histograms of connections and GATT operations.
+
+Kept free of homeassistant imports so it can be unit tested on its own.
+"""
+
+from array import array
+from bisect import bisect_left
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+
+# Upper bounds of the buckets, in seconds; the last bucket is open ended
+BUCKET_BOUNDS = (
+    0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 45.0
+)
+PERCENTILES = (50, 95, 99)
+MAX_REASONS = 8  # Distinct failure reasons kept per histogram
+RECENT = 20  # Outcomes the success ratio is taken over
+OTHER_REASON = "other"
+
+
+class LatencyHistogram:
+    """Counts of durations per bucket, plus outcomes and failure reasons.
+
+    Memory does not grow with the number of samples: percentiles are
+    estimated from the buckets, interpolating within the bucket they fall
+    in. Failure reasons beyond MAX_REASONS distinct ones are counted as
+    "other".
+    """
+
+    __slots__ = ("_counts", "successes", "failures", "reasons", "last", "_recent")
+
+    def __init__(self) -> None:
+        self._counts = array("L", [0]) * (len(BUCKET_BOUNDS) + 1)
+        self.successes = 0
+        self.failures = 0
+        self.reasons: dict[str, int] = {}
+        self.last: float | None = None
+        self._recent: deque[bool] = deque(maxlen=RECENT)
+
+    @property
+    def count(self) -> int:
+        return self.successes + self.failures
+
+    def add(self, seconds: float, reason: str | None = None) -> None:
+        """Count a duration; a reason marks it as failed."""
+        self._counts[bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.last = seconds
+        self._recent.append(reason is None)
+        if reason is None:
+            self.successes += 1
+            return
+        self.failures += 1
+        if reason not in self.reasons and len(self.reasons) >= MAX_REASONS:
+            reason = OTHER_REASON
+        self.reasons[reason] = self.reasons.get(reason, 0) + 1
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for index, count in enumerate(other._counts):
+            self._counts[index] += count
+        self.successes += other.successes
+        self.failures += other.failures
+        for reason, count in other.reasons.items():
+            if reason not in self.reasons and len(self.reasons) >= MAX_REASONS:
+                reason = OTHER_REASON
+            self.reasons[reason] = self.reasons.get(reason, 0) + count
+
+    def percentile(self, percent: float) -> float | None:
+        total = sum(self._counts)
+        if not total:
+            return None
+        rank = total * percent / 100
+        seen = 0
+        for index, count in enumerate(self._counts):
+            if count and seen + count >= rank:
+                lower = BUCKET_BOUNDS[index - 1] if index else 0.0
+                if index == len(BUCKET_BOUNDS):
+                    return lower  # Only known to be above the last bound
+                return lower + (BUCKET_BOUNDS[index] - lower) * (rank - seen) / count
+            seen += count
+        return BUCKET_BOUNDS[-1]
+
+    @property
+    def success_ratio(self) -> float | None:
+        """Share of the recent outcomes that succeeded."""
+        if not self._recent:
+            return None
+        return sum(self._recent) / len(self._recent)
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "successes": self.successes,
+            "failures": self.failures,
+            **{
+                f"p{percent}": _round(self.percentile(percent))
+                for percent in PERCENTILES
+            },
+            "last": _round(self.last),
+            "reasons": dict(self.reasons),
+        }
+
+
+class Timing:
+    """One measurement in progress, see LatencyRecorder.measure."""
+
+    __slots__ = ("reason",)
+
+    def __init__(self) -> None:
+        self.reason: str | None = None
+
+    def fail(self, reason: str | BaseException) -> None:
+        if isinstance(reason, BaseException):
+            reason = type(reason).__name__
+        self.reason = reason
+
+
+class LatencyRecorder:
+    """Latency histograms of one fan, per kind of operation.
+
+    clock is the time source, time.monotonic in use.
+    """
+
+    def __init__(self, clock: Callable[[], float]) -> None:
+        self._clock = clock
+        self._histograms: dict[str, LatencyHistogram] = {}
+
+    def histogram(self, operation: str) -> LatencyHistogram:
+        if (histogram := self._histograms.get(operation)) is None:
+            histogram = self._histograms[operation] = LatencyHistogram()
+        return histogram
+
+    def get(self, operation: str) -> LatencyHistogram | None:
+        return self._histograms.get(operation)
+
+    @contextmanager
+    def measure(self, operation: str) -> Iterator[Timing]:
+        """Time the block; an exception, or Timing.fail, marks a failure.
+
+        Cancelled operations, which raise no Exception, are not counted.
+        """
+        timing = Timing()
+        started = self._clock()
+        try:
+            yield timing
+        except Exception as err:
+            timing.fail(err)
+            self.histogram(operation).add(self._clock() - started, timing.reason)
+            raise
+        self.histogram(operation).add(self._clock() - started, timing.reason)
+
+    def as_dict(self) -> dict[str, dict]:
+        return {
+            operation: histogram.as_dict()
+            for operation, histogram in sorted(self._histograms.items())
+        }
+
+
+def merged(recorders: Iterable[LatencyRecorder]) -> dict[str, dict]:
+    """The histograms of several fans added up, per operation."""
+    total = LatencyRecorder(lambda: 0.0)
+    for recorder in recorders:
+        for operation, histogram in recorder._histograms.items():
+            total.histogram(operation).merge(histogram)
+    return total.as_dict()
+
+
+def _round(value: float | None) -> float | None:
+    return None if value is None else round(value, 3)
@@ -0,0 +1,138 @@
+"""Backing off non-critical work while the event loop is lagging."""
+
+import asyncio
+import logging
+import time
+
+from collections import deque
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DATA_LOOP_LAG,
+    LOOP_LAG_DECISIONS,
+    LOOP_LAG_INTERVAL,
+    LOOP_LAG_MAX_DEFER,
+    LOOP_LAG_SAMPLES,
+    LOOP_LAG_THRESHOLD,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop runs timers.
+
+    A timer is armed every LOOP_LAG_INTERVAL; how much later than planned
+    it fires is the loop's lag. While the worst of the last samples is over
+    LOOP_LAG_THRESHOLD, routine polls wait and optional steps, like the
+    daily config refresh and clock checks, are left for a later poll.
+    Writes and the reads verifying them are never held back.
+
+    Every decision is kept, the latest LOOP_LAG_DECISIONS of them, for the
+    diagnostics download.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._hass = hass
+        self._samples: deque[float] = deque(maxlen=LOOP_LAG_SAMPLES)
+        self._decisions: deque[dict[str, Any]] = deque(maxlen=LOOP_LAG_DECISIONS)
+        self._max_lag = 0.0
+        self._deferred = 0
+        self._trackers = 0
+        self._expected = 0.0
+        self._cancel_timer: CALLBACK_TYPE | None = None
+
+    @property
+    def lag(self) -> float:
+        """The worst lag of the recent samples, in seconds."""
+        return max(self._samples, default=0.0)
+
+    @property
+    def lagging(self) -> bool:
+        return self.lag > LOOP_LAG_THRESHOLD
+
+    @callback
+    def async_track(self) -> CALLBACK_TYPE:
+        """Measure while the caller is loaded; returns the callback to stop."""
+        self._trackers += 1
+        if self._cancel_timer is None:
+            self._async_arm()
+
+        @callback
+        def stop() -> None:
+            self._trackers -= 1
+            if self._trackers == 0 and self._cancel_timer is not None:
+                self._cancel_timer()
+                self._cancel_timer = None
+                self._samples.clear()
+
+        return stop
+
+    @callback
+    def _async_arm(self) -> None:
+        self._expected = time.monotonic() + LOOP_LAG_INTERVAL
+        self._cancel_timer = async_call_later(
+            self._hass, LOOP_LAG_INTERVAL, self._async_sample
+        )
+
+    @callback
+    def _async_sample(self, _now) -> None:
+        lag = max(0.0, time.monotonic() - self._expected)
+        self._samples.append(lag)
+        self._max_lag = max(self._max_lag, lag)
+        self._async_arm()
+
+    def defer(self, fan: str, work: str) -> bool:
+        """Whether optional work should be left for later, noting it if so."""
+        if not self.lagging:
+            return False
+        self._record(fan, work, self.lag, 0.0)
+        return True
+
+    async def async_wait_calm(self, fan: str, work: str) -> float:
+        """Wait while the loop is lagging, at most LOOP_LAG_MAX_DEFER.
+
+        Returns the seconds waited.
+        """
+        if not self.lagging:
+            return 0.0
+        lag = self.lag
+        started = time.monotonic()
+        while self.lagging and time.monotonic() - started < LOOP_LAG_MAX_DEFER:
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+        waited = time.monotonic() - started
+        self._record(fan, work, lag, waited)
+        return waited
+
+    def _record(self, fan: str, work: str, lag: float, waited: float) -> None:
+        _LOGGER.debug("Event loop lagging %.2f s, deferred %s of %s", lag, work, fan)
+        self._deferred += 1
+        self._decisions.append(
+            {
+                "at": dt_util.utcnow().isoformat(),
+                "fan": fan,
+                "work": work,
+                "lag": round(lag, 3),
+                "waited": round(waited, 1),
+            }
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "lag": round(self.lag, 3),
+            "max_lag": round(self._max_lag, 3),
+            "threshold": LOOP_LAG_THRESHOLD,
+            "deferred": self._deferred,
+            "decisions": list(self._decisions),
+        }
+
+
+def async_get_lag_monitor(hass: HomeAssistant) -> LoopLagMonitor:
+    """Return the loop lag monitor shared by every entry."""
+    if (monitor := hass.data.get(DATA_LOOP_LAG)) is None:
+        monitor = hass.data[DATA_LOOP_LAG] = LoopLagMonitor(hass)
+    return monitor
@@ -2,16 +2,14 @@ import logging
 
 from collections import namedtuple
 from homeassistant.components.number import NumberDeviceClass, NumberEntity
-from homeassistant.const import CONF_DEVICES
 from homeassistant.const import UnitOfTemperature, UnitOfTime
 from homeassistant.const import REVOLUTIONS_PER_MINUTE
 from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.restore_state import RestoreEntity
 
-from .const import DOMAIN, CONF_NAME
 from .const import DeviceModel
-from .entity import PaxCalimaEntity
+from .entity import PaxCalimaEntity, async_setup_fan_entities
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -128,40 +126,36 @@ RESTOREENTITIES = [
 
 async def async_setup_entry(hass, config_entry, async_add_devices):
     """Setup numbers from a config entry created in the integrations UI."""
-    # Create entities
+    async_setup_fan_entities(hass, config_entry, async_add_devices, _fan_entities)
+
+
+def _fan_entities(coordinator) -> list:
+    """Create the numbers of one fan."""
+    _LOGGER.debug("Starting paxcalima numbers: %s", coordinator.devicename)
     ha_entities = []
 
-    for device_id in config_entry.data[CONF_DEVICES]:
-        _LOGGER.debug(
-            "Starting paxcalima numbers: %s",
-            config_entry.data[CONF_DEVICES][device_id][CONF_NAME],
-        )
-
-        # Find coordinator for this device
-        coordinator = hass.data[DOMAIN][config_entry.entry_id][CONF_DEVICES][device_id]
-
-        # Create entities for this device
-        for paxentity in ENTITIES:
-            ha_entities.append(PaxCalimaNumberEntity(coordinator, paxentity))
-
-        # Device specific entities
-        match coordinator._model:
-            case (
-                DeviceModel.CALIMA.value
-                | DeviceModel.SVARA.value
-                | DeviceModel.LEVANTE.value
-            ):
-                for paxentity in CALIMA_ENTITIES:
-                    ha_entities.append(PaxCalimaNumberEntity(coordinator, paxentity))
-            case DeviceModel.SVENSA.value:
-                for paxentity in SVENSA_ENTITIES:
-                    ha_entities.append(PaxCalimaNumberEntity(coordinator, paxentity))
-
-        # Entities with local datas
-        for paxentity in RESTOREENTITIES:
-            ha_entities.append(PaxCalimaRestoreNumberEntity(coordinator, paxentity))
-
-    async_add_devices(ha_entities, True)
+    # Create entities for this device
+    for paxentity in ENTITIES:
+        ha_entities.append(PaxCalimaNumberEntity(coordinator, paxentity))
+
+    # Device specific entities
+    match coordinator._model:
+        case (
+            DeviceModel.CALIMA.value
+            | DeviceModel.SVARA.value
+            | DeviceModel.LEVANTE.value
+        ):
+            for paxentity in CALIMA_ENTITIES:
+                ha_entities.append(PaxCalimaNumberEntity(coordinator, paxentity))
+        case DeviceModel.SVENSA.value:
+            for paxentity in SVENSA_ENTITIES:
+                ha_entities.append(PaxCalimaNumberEntity(coordinator, paxentity))
+
+    # Entities with local datas
+    for paxentity in RESTOREENTITIES:
+        ha_entities.append(PaxCalimaRestoreNumberEntity(coordinator, paxentity))
+
+    return ha_entities
 
 
 class PaxCalimaNumberEntity(PaxCalimaEntity, NumberEntity):
@@ -0,0 +1,180 @@
+"""Timing and allocation counts of the integration's hot paths, on demand.
+
+Kept free of homeassistant imports so it can be unit tested on its own.
+"""
+
+import json
+import tracemalloc
+
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, ContextManager
+
+TOP_ALLOCATIONS = 25  # Source lines listed in the report
+
+_active: "Profiler | None" = None
+_IDLE = nullcontext()
+
+
+class _Section:
+    __slots__ = ("count", "total", "max", "allocated")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.allocated = 0
+
+
+class Profiler:
+    """Time spent in, and memory allocated by, named sections of code.
+
+    Sections of plain code measure the event loop time they take. Sections
+    around coroutines, like a poll cycle, include the time spent awaiting
+    the fan. Sections can nest: entity writes are also part of the state
+    publication that triggered them.
+
+    With allocations, tracemalloc traces the memory allocated while
+    profiling, and the report lists the lines of the integration holding
+    the most of it. Tracing slows down all of Home Assistant meanwhile.
+
+    clock is the time source, time.perf_counter in use.
+    """
+
+    def __init__(
+        self, clock: Callable[[], float], allocations: bool, root: str
+    ) -> None:
+        self._clock = clock
+        self._allocations = allocations
+        self._root = root
+        self._sections: dict[str, _Section] = {}
+        self._started = 0.0
+        self._duration = 0.0
+        self._running = False
+        self._tracing = False  # Started tracemalloc, so stops it too
+        self._snapshot: tracemalloc.Snapshot | None = None
+        self._peak = 0
+
+    def start(self) -> None:
+        if self._allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        self._started = self._clock()
+        self._running = True
+
+    def stop(self) -> None:
+        self._running = False
+        self._duration = self._clock() - self._started
+        if tracemalloc.is_tracing() and self._allocations:
+            self._snapshot = tracemalloc.take_snapshot()
+            self._peak = tracemalloc.get_traced_memory()[1]
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    @contextmanager
+    def section(self, name: str) -> Iterator[None]:
+        if (section := self._sections.get(name)) is None:
+            section = self._sections[name] = _Section()
+        traced = tracemalloc.get_traced_memory()[0] if self._allocations else 0
+        started = self._clock()
+        try:
+            yield
+        finally:
+            # Not counted when ended after the profile, as the report may
+            # be in the making
+            if self._running:
+                elapsed = self._clock() - started
+                section.count += 1
+                section.total += elapsed
+                section.max = max(section.max, elapsed)
+                if self._allocations:
+                    traced = tracemalloc.get_traced_memory()[0] - traced
+                    section.allocated += max(0, traced)
+
+    def report(self) -> dict[str, Any]:
+        """The results; lists the allocations too, so best run in the executor."""
+        duration = self._duration or 1e-9
+        return {
+            "duration_s": round(self._duration, 1),
+            "sections": {
+                name: {
+                    "count": section.count,
+                    "total_ms": round(section.total * 1000, 1),
+                    "mean_ms": round(section.total * 1000 / section.count, 2),
+                    "max_ms": round(section.max * 1000, 1),
+                    "share_of_duration": round(section.total / duration, 4),
+                    **(
+                        {"allocated_kib": round(section.allocated / 1024, 1)}
+                        if self._allocations
+                        else {}
+                    ),
+                }
+                for name, section in sorted(
+                    self._sections.items(), key=lambda item: -item[1].total
+                )
+                if section.count
+            },
+            "allocations": self._allocation_report(),
+        }
+
+    def _allocation_report(self) -> dict[str, Any] | None:
+        if self._snapshot is None:
+            return None
+        snapshot = self._snapshot.filter_traces(
+            [tracemalloc.Filter(True, str(Path(self._root) / "*"))]
+        )
+        statistics = snapshot.statistics("lineno")
+        return {
+            "peak_kib": round(self._peak / 1024, 1),
+            "integration_kib": round(sum(stat.size for stat in statistics) / 1024, 1),
+            "integration_blocks": sum(stat.count for stat in statistics),
+            "top": [
+                {
+                    "line": (
+                        f"{Path(stat.traceback[0].filename).relative_to(self._root)}"
+                        f":{stat.traceback[0].lineno}"
+                    ),
+                    "kib": round(stat.size / 1024, 1),
+                    "blocks": stat.count,
+                }
+                for stat in statistics[:TOP_ALLOCATIONS]
+            ],
+        }
+
+
+def active() -> Profiler | None:
+    return _active
+
+
+def start(profiler: Profiler) -> None:
+    """Profile the sections from now on, until stop()."""
+    global _active
+    if _active is not None:
+        raise RuntimeError("A profile is already running")
+    profiler.start()
+    _active = profiler
+
+
+def stop() -> Profiler | None:
+    global _active
+    profiler, _active = _active, None
+    if profiler is not None:
+        profiler.stop()
+    return profiler
+
+
+def section(name: str) -> ContextManager[None]:
+    """Time the block into the running profile; costs next to nothing idle."""
+    if (profiler := _active) is None:
+        return _IDLE
+    return profiler.section(name)
+
+
+def write_report(path: str, profiler: Profiler, extra: dict[str, Any]) -> dict[str, Any]:
+    """Write the report as JSON and return it. Blocking; run in the executor."""
+    report = {**extra, **profiler.report()}
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    return report
@@ -0,0 +1,203 @@
+"""Rolling statistics over a fixed-size ring buffer of samples.
+
+Kept free of homeassistant imports so it can be unit tested on its own.
+"""
+
+import math
+
+from array import array
+from collections import deque, namedtuple
+from collections.abc import Iterable, Mapping
+
+# slope is in value units per second
+WindowStats = namedtuple("WindowStats", "count min max mean slope")
+_EMPTY = WindowStats(0, None, None, None, None)
+
+
+class SampleRing:
+    """Fixed-capacity ring of timestamped samples, one array per field.
+
+    Samples are addressed by a sequence number that keeps counting up;
+    only the last `capacity` of them are held. Missing values are NaN.
+    """
+
+    __slots__ = ("fields", "capacity", "_columns", "_times", "_next")
+
+    def __init__(self, fields: Iterable[str], capacity: int) -> None:
+        self.fields = tuple(fields)
+        self.capacity = capacity
+        self._columns = {
+            field: array("d", [math.nan]) * capacity for field in self.fields
+        }
+        self._times = array("d", [0.0]) * capacity
+        self._next = 0
+
+    def __len__(self) -> int:
+        return min(self._next, self.capacity)
+
+    @property
+    def next_seq(self) -> int:
+        return self._next
+
+    @property
+    def oldest_seq(self) -> int:
+        return max(0, self._next - self.capacity)
+
+    def push(self, timestamp: float, values: Mapping[str, float | None]) -> int:
+        seq = self._next
+        slot = seq % self.capacity
+        self._times[slot] = timestamp
+        for field, column in self._columns.items():
+            value = values.get(field)
+            column[slot] = math.nan if value is None else value
+        self._next += 1
+        return seq
+
+    def time(self, seq: int) -> float:
+        return self._times[seq % self.capacity]
+
+    def value(self, field: str, seq: int) -> float:
+        return self._columns[field][seq % self.capacity]
+
+
+class RollingWindow:
+    """Min/max/mean/least-squares slope of one field over a time span.
+
+    Sums are updated as samples enter and leave, and min/max come from
+    monotonic deques, so each sample costs O(1) amortised however long the
+    window is. Times are taken relative to an origin that follows the
+    window, which keeps the sums of squares small enough to stay exact.
+    """
+
+    __slots__ = (
+        "_ring", "_field", "span", "_head", "_origin",
+        "_n", "_st", "_sv", "_stt", "_stv", "_min", "_max",
+    )
+
+    def __init__(self, ring: SampleRing, field: str, span: float) -> None:
+        self._ring = ring
+        self._field = field
+        self.span = span
+        self._head = ring.next_seq
+        self._origin = None
+        self._n = 0
+        self._st = self._sv = self._stt = self._stv = 0.0
+        self._min: deque[int] = deque()
+        self._max: deque[int] = deque()
+
+    def evict(self, before_time: float, before_seq: int) -> None:
+        """Drop samples older than before_time or numbered below before_seq."""
+        ring = self._ring
+        while self._head < ring.next_seq and (
+            self._head < before_seq or ring.time(self._head) < before_time
+        ):
+            self._remove(self._head)
+            self._head += 1
+
+    def add(self, seq: int) -> None:
+        ring = self._ring
+        value = ring.value(self._field, seq)
+        if math.isnan(value):
+            return
+
+        timestamp = ring.time(seq)
+        if self._origin is None:
+            self._origin = timestamp
+        elif timestamp - self._origin > 4 * self.span:
+            self._rebase(timestamp - self.span)
+        t = timestamp - self._origin
+
+        self._n += 1
+        self._st += t
+        self._sv += value
+        self._stt += t * t
+        self._stv += t * value
+
+        while self._min and ring.value(self._field, self._min[-1]) >= value:
+            self._min.pop()
+        self._min.append(seq)
+        while self._max and ring.value(self._field, self._max[-1]) <= value:
+            self._max.pop()
+        self._max.append(seq)
+
+    def stats(self) -> WindowStats:
+        n = self._n
+        if not n:
+            return _EMPTY
+        ring = self._ring
+        slope = None
+        denominator = n * self._stt - self._st * self._st
+        if n > 1 and denominator > 1e-9:
+            slope = (n * self._stv - self._st * self._sv) / denominator
+        return WindowStats(
+            n,
+            ring.value(self._field, self._min[0]),
+            ring.value(self._field, self._max[0]),
+            self._sv / n,
+            slope,
+        )
+
+    def _remove(self, seq: int) -> None:
+        value = self._ring.value(self._field, seq)
+        if math.isnan(value):
+            return
+        t = self._ring.time(seq) - self._origin
+        self._n -= 1
+        if not self._n:
+            self._origin = None
+            self._st = self._sv = self._stt = self._stv = 0.0
+        else:
+            self._st -= t
+            self._sv -= value
+            self._stt -= t * t
+            self._stv -= t * value
+        if self._min and self._min[0] == seq:
+            self._min.popleft()
+        if self._max and self._max[0] == seq:
+            self._max.popleft()
+
+    def _rebase(self, origin: float) -> None:
+        # Sum of (t - d) and (t - d)^2 expressed through the current sums
+        d = origin - self._origin
+        n = self._n
+        self._stt += -2 * d * self._st + n * d * d
+        self._stv -= d * self._sv
+        self._st -= n * d
+        self._origin = origin
+
+
+class RollingStatistics:
+    """A sample ring with rolling windows for each of its fields.
+
+    Memory use is fixed by the ring capacity; a window spanning more
+    samples than the ring holds is limited to what the ring holds.
+    """
+
+    __slots__ = ("_ring", "_windows", "spans")
+
+    def __init__(
+        self, fields: Iterable[str], spans: Iterable[float], capacity: int
+    ) -> None:
+        self._ring = SampleRing(fields, capacity)
+        self.spans = tuple(sorted(spans))
+        self._windows = {
+            (field, span): RollingWindow(self._ring, field, span)
+            for field in self._ring.fields
+            for span in self.spans
+        }
+
+    def __len__(self) -> int:
+        return len(self._ring)
+
+    def add(self, timestamp: float, values: Mapping[str, float | None]) -> None:
+        # The ring is about to overwrite its oldest sample: drop it from
+        # every window first, while its value can still be read.
+        overwritten = self._ring.next_seq - self._ring.capacity + 1
+        for window in self._windows.values():
+            window.evict(timestamp - window.span, overwritten)
+        seq = self._ring.push(timestamp, values)
+        for window in self._windows.values():
+            window.add(seq)
+
+    def stats(self, field: str, span: float) -> WindowStats:
+        return self._windows[(field, span)].stats()
@@ -2,12 +2,10 @@ import logging
 
 from collections import namedtuple
 from homeassistant.components.select import SelectEntity
-from homeassistant.const import CONF_DEVICES
 from homeassistant.helpers.entity import EntityCategory
 
-from .const import DOMAIN, CONF_NAME
 from .const import DeviceModel
-from .entity import PaxCalimaEntity
+from .entity import PaxCalimaEntity, async_setup_fan_entities
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -143,34 +141,30 @@ SVENSA_ENTITIES = [
 
 async def async_setup_entry(hass, config_entry, async_add_devices):
     """Setup selects from a config entry created in the integrations UI."""
-    # Create entities
+    async_setup_fan_entities(hass, config_entry, async_add_devices, _fan_entities)
+
+
+def _fan_entities(coordinator) -> list:
+    """Create the selects of one fan."""
+    _LOGGER.debug("Starting paxcalima selects: %s", coordinator.devicename)
     ha_entities = []
 
-    for device_id in config_entry.data[CONF_DEVICES]:
-        _LOGGER.debug(
-            "Starting paxcalima selects: %s",
-            config_entry.data[CONF_DEVICES][device_id][CONF_NAME],
-        )
-
-        # Find coordinator for this device
-        coordinator = hass.data[DOMAIN][config_entry.entry_id][CONF_DEVICES][device_id]
-
-        # Create entities for this device
-        for paxentity in ENTITIES:
-            ha_entities.append(PaxCalimaSelectEntity(coordinator, paxentity))
-
-        # Device specific entities
-        match coordinator._model:
-            # Svara uses the Calima characteristic set; wire the same config
-            # selects as Calima/Levante so sensitivity / light-sensor / cycles appear.
-            case DeviceModel.CALIMA.value | DeviceModel.LEVANTE.value | DeviceModel.SVARA.value:
-                for paxentity in CALIMA_ENTITIES:
-                    ha_entities.append(PaxCalimaSelectEntity(coordinator, paxentity))
-            case DeviceModel.SVENSA.value:
-                for paxentity in SVENSA_ENTITIES:
-                    ha_entities.append(PaxCalimaSelectEntity(coordinator, paxentity))
-
-    async_add_devices(ha_entities, True)
+    # Create entities for this device
+    for paxentity in ENTITIES:
+        ha_entities.append(PaxCalimaSelectEntity(coordinator, paxentity))
+
+    # Device specific entities
+    match coordinator._model:
+        # Svara uses the Calima characteristic set; wire the same config
+        # selects as Calima/Levante so sensitivity / light-sensor / cycles appear.
+        case DeviceModel.CALIMA.value | DeviceModel.LEVANTE.value | DeviceModel.SVARA.value:
+            for paxentity in CALIMA_ENTITIES:
+                ha_entities.append(PaxCalimaSelectEntity(coordinator, paxentity))
+        case DeviceModel.SVENSA.value:
+            for paxentity in SVENSA_ENTITIES:
+                ha_entities.append(PaxCalimaSelectEntity(coordinator, paxentity))
+
+    return ha_entities
 
 
 class PaxCalimaSelectEntity(PaxCalimaEntity, SelectEntity):
@@ -1,4 +1,5 @@
 import logging
+import time
 
 from collections import namedtuple
 from homeassistant.components.sensor import (
@@ -7,7 +8,6 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.helpers.entity import EntityCategory
-from homeassistant.const import CONF_DEVICES
 from homeassistant.const import UnitOfVolumeFlowRate, UnitOfTemperature, UnitOfTime
 from homeassistant.const import UnitOfRatio
 from homeassistant.const import (
@@ -15,10 +15,14 @@ from homeassistant.const import (
     PERCENTAGE,
     REVOLUTIONS_PER_MINUTE,
 )
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_call_later
 
-from .const import DOMAIN, CONF_NAME
+from .const import TREND_WINDOWS
 from .const import DeviceModel
-from .entity import PaxCalimaEntity
+from .deadband import Deadband, SignificantChangeFilter
+from .entity import PaxCalimaEntity, async_setup_fan_entities
+from .profiler import section
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -49,6 +53,30 @@ ENTITIES = [
     ),
     PaxEntity("state", "State", None, None, None, None),
     PaxEntity("mode", "Mode", None, None, EntityCategory.DIAGNOSTIC, None),
+    PaxEntity(
+        "humidity_rate",
+        "Humidity Rise Rate",
+        "%/min",
+        None,
+        EntityCategory.DIAGNOSTIC,
+        "mdi:water-percent-alert",
+    ),
+    PaxEntity(
+        "poll_duration",
+        "Last Poll Duration",
+        UnitOfTime.SECONDS,
+        SensorDeviceClass.DURATION,
+        EntityCategory.DIAGNOSTIC,
+        "mdi:timer-outline",
+    ),
+    PaxEntity(
+        "poll_success",
+        "Poll Success Ratio",
+        PERCENTAGE,
+        None,
+        EntityCategory.DIAGNOSTIC,
+        "mdi:check-network-outline",
+    ),
 ]
 SVENSA_ENTITIES = [
     PaxEntity(
@@ -69,37 +97,62 @@ SVENSA_ENTITIES = [
     ),
 ]
 
+# Smallest change worth a state write, per sensor key. The threshold used is
+# the larger of the two, times the fan's deadband_scale; max_silence comes
+# from the device options.
+# Temperature is reported in quarter degrees and jitters by one step, RPM
+# wobbles by a few tens of rpm around its setpoint.
+DEADBANDS = {
+    "humidity": Deadband(absolute=1.0),
+    "temperature": Deadband(absolute=0.5),
+    "light": Deadband(absolute=5, relative=0.1),
+    "rpm": Deadband(absolute=50, relative=0.03),
+    "flow": Deadband(absolute=2.5, relative=0.03),
+    "airquality": Deadband(absolute=25, relative=0.05),
+    "humidity_rate": Deadband(absolute=0.1),
+}
+
+# Poll statistics, for tracking down slow fans or proxies; off unless enabled
+DISABLED_BY_DEFAULT = ("poll_duration", "poll_success")
+
+# Sensors carrying rolling statistics of their recent samples as attributes
+TREND_KEYS = ("humidity", "temperature", "light", "rpm")
+TREND_ATTRIBUTES = ("min", "max", "mean", "trend")
+
 
 async def async_setup_entry(hass, config_entry, async_add_devices):
     """Setup sensors from a config entry created in the integrations UI."""
-    # Create entities
-    ha_entities = []
+    async_setup_fan_entities(hass, config_entry, async_add_devices, _fan_entities)
 
-    for device_id in config_entry.data[CONF_DEVICES]:
-        _LOGGER.debug(
-            "Starting paxcalima sensors: %s",
-            config_entry.data[CONF_DEVICES][device_id][CONF_NAME],
-        )
 
-        # Find coordinator for this device
-        coordinator = hass.data[DOMAIN][config_entry.entry_id][CONF_DEVICES][device_id]
+def _fan_entities(coordinator) -> list:
+    """Create the sensors of one fan."""
+    _LOGGER.debug("Starting paxcalima sensors: %s", coordinator.devicename)
+    ha_entities = []
 
-        # Create entities for this device
-        for paxentity in ENTITIES:
-            ha_entities.append(PaxCalimaSensorEntity(coordinator, paxentity))
+    # Create entities for this device
+    for paxentity in ENTITIES:
+        ha_entities.append(PaxCalimaSensorEntity(coordinator, paxentity))
 
-        # Device specific entities
-        match coordinator._model:
-            case DeviceModel.SVENSA.value:
-                for paxentity in SVENSA_ENTITIES:
-                    ha_entities.append(PaxCalimaSensorEntity(coordinator, paxentity))
+    # Device specific entities
+    match coordinator._model:
+        case DeviceModel.SVENSA.value:
+            for paxentity in SVENSA_ENTITIES:
+                ha_entities.append(PaxCalimaSensorEntity(coordinator, paxentity))
 
-    async_add_devices(ha_entities, True)
+    return ha_entities
 
 
 class PaxCalimaSensorEntity(PaxCalimaEntity, SensorEntity):
     """Representation of a Sensor."""
 
+    # Rolling statistics are derived from the recorded state itself
+    _unrecorded_attributes = frozenset(
+        f"{name}_{window // 60}m"
+        for name in TREND_ATTRIBUTES
+        for window in TREND_WINDOWS
+    )
+
     def __init__(self, coordinator, paxentity):
         """Pass coordinator to PaxCalimaEntity."""
         super().__init__(coordinator, paxentity)
@@ -107,6 +160,9 @@ class PaxCalimaSensorEntity(PaxCalimaEntity, SensorEntity):
         """Sensor Entity properties"""
         self._attr_device_class = paxentity.deviceClass
         self._attr_native_unit_of_measurement = paxentity.units
+        self._attr_entity_registry_enabled_default = (
+            paxentity.key not in DISABLED_BY_DEFAULT
+        )
         # volume_flow_rate enables HA unit conversion (m³/h, L/s, …).
         # Do not force a suggested display unit - Nordic installs typically
         # keep m³/h; users can pick L/s in entity settings if they want.
@@ -117,7 +173,103 @@ class PaxCalimaSensorEntity(PaxCalimaEntity, SensorEntity):
         elif paxentity.key in ("humidity", "temperature", "light", "rpm"):
             self._attr_state_class = SensorStateClass.MEASUREMENT
 
+        """Significant-change filter, if enabled for this device"""
+        self._deadband = self._options_deadband()
+        self._filter = None
+        self._cancel_heartbeat = None
+        if self._deadband is not None:
+            self._filter = SignificantChangeFilter(self._deadband)
+
+    def _options_deadband(self) -> Deadband | None:
+        """This sensor's deadband under the fan's current options, if filtered."""
+        if not self.coordinator.significant_change or self._key not in DEADBANDS:
+            return None
+        deadband = DEADBANDS[self._key]
+        scale = self.coordinator.deadband_scale
+        return deadband._replace(
+            absolute=deadband.absolute * scale,
+            relative=deadband.relative * scale,
+            max_silence=self.coordinator.max_silence,
+        )
+
+    @callback
+    def _async_follow_options(self) -> None:
+        """Rebuild the filter when the fan's options were edited in place."""
+        if (deadband := self._options_deadband()) == self._deadband:
+            return
+        self._deadband = deadband
+        self._async_cancel_heartbeat()
+        self._filter = None
+        if deadband is not None:
+            # Unseeded, so the current value is published as the new baseline
+            self._filter = SignificantChangeFilter(deadband)
+
+    async def async_added_to_hass(self) -> None:
+        """Seed the filter with the value the coordinator already holds."""
+        await super().async_added_to_hass()
+        if self._filter is not None:
+            self._filter.force(self.coordinator.get_data(self._key), time.monotonic())
+        self.async_on_remove(self._async_cancel_heartbeat)
+
     @property
     def native_value(self):
         """Return the value of the sensor."""
+        if self._filter is not None and self._filter.has_published:
+            return self._filter.value
         return self.coordinator.get_data(self._key)
+
+    @property
+    def extra_state_attributes(self):
+        """Rolling min/max/mean and trend (per minute) for each window."""
+        if self._key not in TREND_KEYS:
+            return super().extra_state_attributes
+
+        attrs = {}
+        for window in self.coordinator.trend_windows:
+            stats = self.coordinator.get_trend(self._key, window)
+            if not stats.count:
+                continue
+            suffix = f"{window // 60}m"
+            attrs[f"min_{suffix}"] = round(stats.min, 2)
+            attrs[f"max_{suffix}"] = round(stats.max, 2)
+            attrs[f"mean_{suffix}"] = round(stats.mean, 2)
+            if stats.slope is not None:
+                attrs[f"trend_{suffix}"] = round(stats.slope * 60, 3)
+        attrs.update(super().extra_state_attributes)
+        return attrs
+
+    @callback
+    def _handle_key_update(self) -> None:
+        """Only write state for significant changes of the value."""
+        self._async_follow_options()
+        if self._filter is None:
+            super()._handle_key_update()
+            return
+
+        now = time.monotonic()
+        if self._filter.accept(self.coordinator.get_data(self._key), now):
+            self._async_cancel_heartbeat()
+            with section("entity write"):
+                self.async_write_ha_state()
+        elif (
+            self._cancel_heartbeat is None
+            and (delay := self._filter.due_in(now)) is not None
+        ):
+            # Publish the held-back value once max_silence has passed, even
+            # if no further change arrives to trigger a check.
+            self._cancel_heartbeat = async_call_later(
+                self.hass, delay, self._async_heartbeat
+            )
+
+    @callback
+    def _async_heartbeat(self, _now) -> None:
+        self._cancel_heartbeat = None
+        self._filter.force(self.coordinator.get_data(self._key), time.monotonic())
+        with section("entity write"):
+            self.async_write_ha_state()
+
+    @callback
+    def _async_cancel_heartbeat(self) -> None:
+        if self._cancel_heartbeat is not None:
+            self._cancel_heartbeat()
+            self._cancel_heartbeat = None
@@ -0,0 +1,582 @@
+"""Services for Pax BLE."""
+
+import asyncio
+import datetime as dt
+import logging
+import time
+
+from pathlib import Path
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.const import CONF_DEVICES
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.event import async_call_later
+
+from .const import (
+    DATA_UPDATE_REQUESTS,
+    DOMAIN,
+    PREPARE_DEFAULT_TTL,
+    PREPARE_MAX_TTL,
+    PROFILE_DEFAULT_DURATION,
+    PROFILE_MAX_DURATION,
+    PROFILE_REPORT_FILE,
+    REQUEST_UPDATE_CONCURRENCY,
+    REQUEST_UPDATE_DEDUPE_WINDOW,
+    SERVICE_APPLY_CONFIG,
+    SERVICE_EXECUTE,
+    SERVICE_EXPORT_CONFIG,
+    SERVICE_GROUP_COMMAND,
+    SERVICE_PREPARE,
+    SERVICE_PROFILE,
+    SERVICE_REQUEST_UPDATE,
+)
+from . import profiler
+
+_LOGGER = logging.getLogger(__name__)
+
+ATTR_ALL = "all"
+ATTR_ALLOCATIONS = "allocations"
+ATTR_AREA_ID = "area_id"
+ATTR_DEVICE_ID = "device_id"
+ATTR_DURATION = "duration"
+ATTR_REFRESH = "refresh"
+ATTR_SNAPSHOT = "snapshot"
+ATTR_STEPS = "steps"
+ATTR_TTL = "ttl"
+
+# Fields of the group command, by the state key each one writes
+GROUP_COMMAND_FIELDS = {
+    "boost": "boostmode",
+    "boost_speed": "boostmodespeedwrite",
+    "boost_duration": "boostmodesecwrite",
+    "pause": "pause",
+    "pause_duration": "pausemin",
+    "fanspeed_humidity": "fanspeed_humidity",
+    "fanspeed_light": "fanspeed_light",
+    "fanspeed_trickle": "fanspeed_trickle",
+}
+
+REQUEST_UPDATE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DEVICE_ID, default=list): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_AREA_ID, default=list): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_ALL, default=False): cv.boolean,
+    }
+)
+
+EXECUTE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_DEVICE_ID): cv.string,
+        vol.Required(ATTR_STEPS): vol.All(
+            cv.ensure_list,
+            vol.Length(min=1),
+            [
+                vol.Any(
+                    vol.Schema({vol.Required("read"): cv.string}),
+                    vol.Schema(
+                        {
+                            vol.Required("write"): cv.string,
+                            vol.Required("values"): vol.All(
+                                dict, vol.Length(min=1)
+                            ),
+                        }
+                    ),
+                )
+            ],
+        ),
+    }
+)
+
+GROUP_COMMAND_SCHEMA = vol.All(
+    REQUEST_UPDATE_SCHEMA.extend(
+        {
+            vol.Optional("boost"): cv.boolean,
+            vol.Optional("boost_speed"): vol.All(vol.Coerce(int), vol.Range(min=0, max=2500)),
+            vol.Optional("boost_duration"): vol.All(vol.Coerce(int), vol.Range(min=0, max=65535)),
+            vol.Optional("pause"): cv.boolean,
+            vol.Optional("pause_duration"): vol.All(vol.Coerce(int), vol.Range(min=0, max=255)),
+            vol.Optional("fanspeed_humidity"): vol.All(vol.Coerce(int), vol.Range(min=0, max=2500)),
+            vol.Optional("fanspeed_light"): vol.All(vol.Coerce(int), vol.Range(min=0, max=2500)),
+            vol.Optional("fanspeed_trickle"): vol.All(vol.Coerce(int), vol.Range(min=0, max=2500)),
+        }
+    ),
+    cv.has_at_least_one_key(*GROUP_COMMAND_FIELDS),
+)
+
+EXPORT_CONFIG_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_DEVICE_ID): cv.string,
+        vol.Optional(ATTR_REFRESH, default=False): cv.boolean,
+    }
+)
+
+APPLY_CONFIG_SCHEMA = REQUEST_UPDATE_SCHEMA.extend(
+    {
+        vol.Required(ATTR_SNAPSHOT): vol.Schema(
+            {
+                vol.Required("version"): vol.Coerce(int),
+                vol.Optional("model"): cv.string,
+                vol.Required("groups"): {cv.string: vol.All(dict, vol.Length(min=1))},
+            }
+        ),
+    }
+)
+
+PREPARE_SCHEMA = REQUEST_UPDATE_SCHEMA.extend(
+    {
+        vol.Optional(ATTR_TTL, default=PREPARE_DEFAULT_TTL): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=PREPARE_MAX_TTL)
+        ),
+    }
+)
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DURATION, default=PROFILE_DEFAULT_DURATION): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=PROFILE_MAX_DURATION)
+        ),
+        vol.Optional(ATTR_ALLOCATIONS, default=True): cv.boolean,
+    }
+)
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration's services, once across all entries."""
+    if hass.services.has_service(DOMAIN, SERVICE_REQUEST_UPDATE):
+        return
+
+    hass.data[DATA_UPDATE_REQUESTS] = UpdateRequests()
+
+    async def _async_request_update(call: ServiceCall) -> ServiceResponse:
+        return await _async_service_request_update(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_REQUEST_UPDATE,
+        _async_request_update,
+        schema=REQUEST_UPDATE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def _async_execute(call: ServiceCall) -> ServiceResponse:
+        return await _async_service_execute(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXECUTE,
+        _async_execute,
+        schema=EXECUTE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def _async_group_command(call: ServiceCall) -> ServiceResponse:
+        return await _async_service_group_command(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GROUP_COMMAND,
+        _async_group_command,
+        schema=GROUP_COMMAND_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def _async_export_config(call: ServiceCall) -> ServiceResponse:
+        return await _async_service_export_config(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_CONFIG,
+        _async_export_config,
+        schema=EXPORT_CONFIG_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def _async_apply_config(call: ServiceCall) -> ServiceResponse:
+        return await _async_service_apply_config(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_APPLY_CONFIG,
+        _async_apply_config,
+        schema=APPLY_CONFIG_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def _async_prepare(call: ServiceCall) -> ServiceResponse:
+        return await _async_service_prepare(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PREPARE,
+        _async_prepare,
+        schema=PREPARE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def _async_profile(call: ServiceCall) -> ServiceResponse:
+        return await _async_service_profile(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        _async_profile,
+        schema=PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+def async_coordinators(hass: HomeAssistant) -> dict[str, Any]:
+    """Every coordinator of every entry, by device registry id."""
+    return {
+        coordinator.device_id: coordinator
+        for entry_data in hass.data.get(DOMAIN, {}).values()
+        for coordinator in entry_data.get(CONF_DEVICES, {}).values()
+    }
+
+
+def async_resolve_coordinators(hass: HomeAssistant, call: ServiceCall) -> list:
+    """The coordinators targeted by a call's device_id, area_id and all fields.
+
+    Raises ServiceValidationError when the call targets no Pax fan.
+    """
+    coordinators = async_coordinators(hass)
+    if call.data.get(ATTR_ALL):
+        if not coordinators:
+            raise ServiceValidationError("No Pax fans are configured")
+        return list(coordinators.values())
+
+    device_ids = dict.fromkeys(call.data.get(ATTR_DEVICE_ID, ()))
+    if area_ids := call.data.get(ATTR_AREA_ID):
+        device_registry = dr.async_get(hass)
+        for area_id in area_ids:
+            for device in dr.async_entries_for_area(device_registry, area_id):
+                device_ids.setdefault(device.id)
+
+    if not device_ids:
+        raise ServiceValidationError("A device, an area or all devices must be given")
+
+    targets = []
+    for device_id in device_ids:
+        if (coordinator := coordinators.get(device_id)) is not None:
+            targets.append(coordinator)
+        elif device_id in call.data.get(ATTR_DEVICE_ID, ()):
+            _LOGGER.warning("No coordinator found for device ID %s", device_id)
+    if not targets:
+        raise ServiceValidationError("None of the given devices or areas has a Pax fan")
+    return targets
+
+
+class UpdateRequests:
+    """Refreshes requested through the service, shared by every entry.
+
+    At most REQUEST_UPDATE_CONCURRENCY fans are refreshed at once. A request
+    for a fan whose refresh is running, or finished within the dedupe
+    window, is answered by that refresh rather than starting another.
+    """
+
+    def __init__(self) -> None:
+        self._semaphore = asyncio.Semaphore(REQUEST_UPDATE_CONCURRENCY)
+        # device_id -> (refresh task, monotonic time it started)
+        self._refreshes: dict[str, tuple[asyncio.Task, float]] = {}
+
+    def async_refresh(self, hass: HomeAssistant, coordinator) -> asyncio.Task:
+        now = time.monotonic()
+        recent = self._refreshes.get(coordinator.device_id)
+        if recent is not None and (
+            not recent[0].done() or now - recent[1] < REQUEST_UPDATE_DEDUPE_WINDOW
+        ):
+            _LOGGER.debug("Joining recent refresh of %s", coordinator.devicename)
+            return recent[0]
+
+        task = hass.async_create_task(self._async_refresh(coordinator))
+        self._refreshes[coordinator.device_id] = (task, now)
+        return task
+
+    async def _async_refresh(self, coordinator) -> bool:
+        async with self._semaphore:
+            # Through the coordinator, so its locking and listeners apply
+            coordinator.expedite()
+            await coordinator.async_refresh()
+        return coordinator.last_update_success
+
+
+async def _async_service_request_update(
+    hass: HomeAssistant, call: ServiceCall
+) -> ServiceResponse:
+    """Refresh the targeted fans concurrently, optionally returning readings."""
+    coordinators = async_resolve_coordinators(hass, call)
+    requests: UpdateRequests = hass.data[DATA_UPDATE_REQUESTS]
+    # Shielded: a refresh may be shared with other calls, which must not
+    # lose it if this one is cancelled
+    tasks = [
+        asyncio.shield(requests.async_refresh(hass, coordinator))
+        for coordinator in coordinators
+    ]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    if not call.return_response:
+        return None
+    return {
+        "devices": {
+            coordinator.device_id: {
+                "name": coordinator.devicename,
+                "success": result is True,
+                "values": _readings(coordinator),
+            }
+            for coordinator, result in zip(coordinators, results)
+        }
+    }
+
+
+def _as_json(values: dict[str, Any]) -> dict[str, Any]:
+    """Setting values as they can be returned in a service response."""
+    return {
+        key: value.isoformat() if isinstance(value, dt.time) else value
+        for key, value in values.items()
+    }
+
+
+def _readings(coordinator) -> dict[str, Any]:
+    """The values a sensor poll reads, and when they were read."""
+    readings = {key: coordinator.get_data(key) for key in coordinator.sensor_keys}
+    if (read_at := coordinator.get_last_updated("rpm")) is not None:
+        readings["read_at"] = read_at.isoformat()
+    return readings
+
+
+async def _async_service_execute(
+    hass: HomeAssistant, call: ServiceCall
+) -> ServiceResponse:
+    """Run a fan's reads and writes of setting groups in one session."""
+    device_id = call.data[ATTR_DEVICE_ID]
+    if (coordinator := async_coordinators(hass).get(device_id)) is None:
+        raise ServiceValidationError(f"No Pax fan found for device ID {device_id}")
+
+    try:
+        results = await coordinator.async_execute(call.data[ATTR_STEPS])
+    except ValueError as err:
+        raise ServiceValidationError(str(err)) from err
+
+    for result in results:
+        if values := result.get("values"):
+            result["values"] = _as_json(values)
+    if not call.return_response:
+        if failed := next((r for r in results if r.get("error")), None):
+            raise HomeAssistantError(
+                f"Step {failed['step']} failed on {coordinator.devicename}: {failed['error']}"
+            )
+        return None
+    return {"steps": results}
+
+
+def _group_command_steps(coordinator, values: dict[str, Any]) -> tuple[list | None, list]:
+    """A fan's write steps for the command's values, and the fields it lacks.
+
+    The steps are None if the fan has none of the fields.
+    """
+    steps: dict[str, dict[str, Any]] = {}
+    unsupported = []
+    for field, key in GROUP_COMMAND_FIELDS.items():
+        if field not in values:
+            continue
+        if (group := coordinator.config_group_of(key)) is None:
+            unsupported.append(field)
+            continue
+        steps.setdefault(group, {})[key] = values[field]
+    if not steps:
+        return None, unsupported
+    return [{"write": group, "values": v} for group, v in steps.items()], unsupported
+
+
+async def _async_service_group_command(
+    hass: HomeAssistant, call: ServiceCall
+) -> ServiceResponse:
+    """Write the same settings to many fans at once."""
+    values = {field: call.data[field] for field in GROUP_COMMAND_FIELDS if field in call.data}
+    planned = [
+        (coordinator, *_group_command_steps(coordinator, values))
+        for coordinator in async_resolve_coordinators(hass, call)
+    ]
+
+    devices = await _async_execute_fleet(planned)
+    return _fleet_response(call, "Group command", devices)
+
+
+async def _async_execute_fleet(planned: list[tuple]) -> dict[str, dict[str, Any]]:
+    """Run each fan's (coordinator, steps, unsupported) plan concurrently.
+
+    Every fan runs its own session; the connection slots of each adapter
+    or proxy bound how many of them are connected at a time. Steps of None
+    mean none of what was asked applies to the fan, which then fails.
+    """
+
+    async def _async_run(coordinator, steps) -> list[dict[str, Any]] | Exception:
+        if not steps:
+            return []
+        try:
+            return await coordinator.async_execute(steps)
+        except Exception as err:  # noqa: BLE001
+            return err
+
+    outcomes = await asyncio.gather(
+        *(_async_run(coordinator, steps) for coordinator, steps, _ in planned)
+    )
+
+    devices = {}
+    for (coordinator, steps, unsupported), outcome in zip(planned, outcomes):
+        if isinstance(outcome, Exception):
+            device = {"success": False, "error": str(outcome), "steps": []}
+        else:
+            failed = next((r for r in outcome if not r["success"]), None)
+            device = {"success": failed is None, "steps": outcome}
+            if failed is not None:
+                device["error"] = failed.get("error", "Not written")
+            elif steps is None:
+                device["success"] = False
+                device["error"] = "None of the given settings is supported"
+        for result in device["steps"]:
+            result.pop("values", None)
+        device["name"] = coordinator.devicename
+        device["unsupported"] = unsupported
+        devices[coordinator.device_id] = device
+    return devices
+
+
+def _fleet_response(call: ServiceCall, what: str, devices: dict) -> ServiceResponse:
+    """Totals of a fleet call, or an error for its failures if no response is wanted."""
+    succeeded = sum(device["success"] for device in devices.values())
+    if not call.return_response:
+        if failed := [d["name"] for d in devices.values() if not d["success"]]:
+            raise HomeAssistantError(
+                f"{what} failed on {len(failed)} of {len(devices)} fans: "
+                + ", ".join(failed)
+            )
+        return None
+    return {
+        "total": len(devices),
+        "succeeded": succeeded,
+        "failed": len(devices) - succeeded,
+        "devices": devices,
+    }
+
+
+async def _async_service_export_config(
+    hass: HomeAssistant, call: ServiceCall
+) -> ServiceResponse:
+    """Return a fan's configuration as a snapshot for apply_config."""
+    device_id = call.data[ATTR_DEVICE_ID]
+    if (coordinator := async_coordinators(hass).get(device_id)) is None:
+        raise ServiceValidationError(f"No Pax fan found for device ID {device_id}")
+
+    if call.data[ATTR_REFRESH]:
+        results = await coordinator.async_execute(
+            [{"read": name} for name in coordinator.snapshot_groups]
+        )
+        if failed := next((r for r in results if r.get("error")), None):
+            raise HomeAssistantError(
+                f"Reading {failed['read']} failed on {coordinator.devicename}: "
+                f"{failed['error']}"
+            )
+
+    snapshot = coordinator.config_snapshot()
+    snapshot["groups"] = {
+        name: _as_json(values) for name, values in snapshot["groups"].items()
+    }
+    return snapshot
+
+
+async def _async_service_apply_config(
+    hass: HomeAssistant, call: ServiceCall
+) -> ServiceResponse:
+    """Bring many fans to a snapshot, writing only the groups that differ."""
+    snapshot = call.data[ATTR_SNAPSHOT]
+
+    planned = []
+    for coordinator in async_resolve_coordinators(hass, call):
+        try:
+            steps, unsupported = coordinator.snapshot_steps(snapshot)
+        except ValueError as err:
+            raise ServiceValidationError(f"{coordinator.devicename}: {err}") from err
+        if unsupported and len(unsupported) == len(snapshot["groups"]):
+            steps = None
+        planned.append((coordinator, steps, unsupported))
+
+    devices = await _async_execute_fleet(planned)
+    for device, (_, steps, _) in zip(devices.values(), planned):
+        device["changed"] = [step["write"] for step in steps or ()]
+    return _fleet_response(call, "Applying the snapshot", devices)
+
+
+async def _async_service_prepare(
+    hass: HomeAssistant, call: ServiceCall
+) -> ServiceResponse:
+    """Open and authorize links to fans ahead of a latency-critical write."""
+    coordinators = async_resolve_coordinators(hass, call)
+    results = await asyncio.gather(
+        *(coordinator.async_prepare(call.data[ATTR_TTL]) for coordinator in coordinators),
+        return_exceptions=True,
+    )
+    devices = {
+        coordinator.device_id: {"name": coordinator.devicename, "success": result is True}
+        for coordinator, result in zip(coordinators, results)
+    }
+    return _fleet_response(call, "Preparing", devices)
+
+
+async def _async_service_profile(
+    hass: HomeAssistant, call: ServiceCall
+) -> ServiceResponse:
+    """Profile the hot paths for a while, then write a report to the config dir.
+
+    Returns right away with the path of the report, which is written once
+    the duration is up.
+    """
+    session = profiler.Profiler(
+        time.perf_counter, call.data[ATTR_ALLOCATIONS], str(Path(__file__).parent)
+    )
+    try:
+        profiler.start(session)
+    except RuntimeError as err:
+        raise ServiceValidationError(str(err)) from err
+    path = hass.config.path(PROFILE_REPORT_FILE.format(int(time.time())))
+
+    @callback
+    def _async_finish(_now) -> None:
+        if profiler.active() is session:
+            profiler.stop()
+            hass.async_create_task(_async_write_profile(hass, session, path))
+
+    async_call_later(hass, call.data[ATTR_DURATION], _async_finish)
+    _LOGGER.info(
+        "Profiling Pax BLE for %ss, the report goes to %s", call.data[ATTR_DURATION], path
+    )
+    return {"path": path}
+
+
+async def _async_write_profile(
+    hass: HomeAssistant, session: profiler.Profiler, path: str
+) -> None:
+    coordinators = async_coordinators(hass).values()
+    await hass.async_add_executor_job(
+        profiler.write_report,
+        path,
+        session,
+        {
+            "fans": len(coordinators),
+            "fast_polling": sum(
+                coordinator.fast_polling for coordinator in coordinators
+            ),
+        },
+    )
+    _LOGGER.info("Wrote Pax BLE profile to %s", path)
@@ -0,0 +1,178 @@
+"""Typed, change-tracking state store backing each coordinator.
+
+Kept free of homeassistant imports so it can be unit tested on its own.
+"""
+
+import datetime as dt
+import time
+
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from contextlib import contextmanager
+from typing import Any
+
+
+def _to_int(value) -> int:
+    # Restored entity states and select options arrive as strings ("600", "30")
+    if isinstance(value, str):
+        return int(float(value))
+    return int(value)
+
+
+_BOOL_STRINGS = {"true": True, "on": True, "1": True, "false": False, "off": False, "0": False}
+
+
+def _to_bool(value) -> bool:
+    # Snapshots, the journal and service calls may carry "off" or "false"
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in _BOOL_STRINGS:
+        return _BOOL_STRINGS[value.strip().lower()]
+    raise ValueError(f"Not a boolean: {value!r}")
+
+
+def _to_time(value) -> dt.time:
+    if isinstance(value, str):
+        return dt.time.fromisoformat(value)
+    return value
+
+
+_COERCE: dict[type, Callable[[Any], Any]] = {
+    int: _to_int,
+    float: float,
+    bool: _to_bool,
+    str: str,
+    dt.time: _to_time,
+}
+
+
+class StateStore:
+    """Slot-based store for a fixed schema of coordinator values.
+
+    Every key of the schema owns a slot holding its value and the time it was
+    last written. Writing a value equal to the current one only refreshes the
+    timestamp; a real change marks the key dirty. Dirty keys are handed to
+    on_commit once per commit - straight away for a single write, or once at
+    the end of the outermost transaction() for a batch.
+    """
+
+    __slots__ = ("_index", "_coerce", "_values", "_updated", "_dirty", "_depth", "_on_commit")
+
+    def __init__(
+        self,
+        schema: Mapping[str, type],
+        on_commit: Callable[[frozenset[str]], None] | None = None,
+    ) -> None:
+        self._index = {key: slot for slot, key in enumerate(schema)}
+        self._coerce = [_COERCE[typ] for typ in schema.values()]
+        self._values: list[Any] = [None] * len(self._index)
+        self._updated: list[float | None] = [None] * len(self._index)
+        self._dirty: set[str] = set()
+        self._depth = 0
+        self._on_commit = on_commit
+
+    def __contains__(self, key: str) -> bool:
+        slot = self._index.get(key)
+        return slot is not None and self._values[slot] is not None
+
+    def __getitem__(self, key: str) -> Any:
+        return self._values[self._index[key]]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.set(key, value)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        slot = self._index.get(key)
+        if slot is None or self._values[slot] is None:
+            return default
+        return self._values[slot]
+
+    def coerce(self, key: str, value: Any) -> Any:
+        """Convert value to the schema type of key, raising on a misfit."""
+        slot = self._index[key]
+        return None if value is None else self._coerce[slot](value)
+
+    def set(self, key: str, value: Any, timestamp: float | None = None) -> bool:
+        """Store value under key, returning True if it changed."""
+        slot = self._index[key]
+        if value is not None:
+            value = self._coerce[slot](value)
+        self._updated[slot] = time.time() if timestamp is None else timestamp
+
+        if self._values[slot] == value:
+            return False
+
+        self._values[slot] = value
+        self._dirty.add(key)
+        if not self._depth:
+            self._commit()
+        return True
+
+    def update(self, values: Mapping[str, Any]) -> frozenset[str]:
+        """Store several values with a single commit."""
+        with self.transaction():
+            return frozenset(key for key, value in values.items() if self.set(key, value))
+
+    def confirm(self, keys: Iterable[str], timestamp: float | None = None) -> None:
+        """Mark the current values of keys as read again, without a commit."""
+        now = time.time() if timestamp is None else timestamp
+        for key in keys:
+            slot = self._index[key]
+            if self._values[slot] is not None:
+                self._updated[slot] = now
+
+    def last_updated(self, key: str) -> float | None:
+        """Epoch seconds of the last write to key, changed or not."""
+        return self._updated[self._index[key]]
+
+    def items(self) -> Iterable[tuple[str, Any]]:
+        return zip(self._index, self._values)
+
+    def export(self) -> dict[str, list]:
+        """JSON-serialisable [value, last_updated] of every key holding a value."""
+        return {
+            key: [value.isoformat() if isinstance(value, dt.time) else value, updated]
+            for key, value, updated in zip(self._index, self._values, self._updated)
+            if value is not None
+        }
+
+    def restore(self, data: Mapping[str, list]) -> dict[str, float]:
+        """Load the output of export(), keeping the original timestamps.
+
+        Keys no longer in the schema, or whose value no longer fits its type,
+        are skipped. Returns the timestamp of every key that was restored.
+        """
+        restored = {}
+        with self.transaction():
+            for key, (value, updated) in data.items():
+                if key not in self._index:
+                    continue
+                try:
+                    self.set(key, value, timestamp=updated)
+                except (TypeError, ValueError):
+                    continue
+                restored[key] = updated
+        return restored
+
+    @contextmanager
+    def transaction(self) -> Iterator["StateStore"]:
+        """Batch writes so listeners see them as a single commit."""
+        self._depth += 1
+        try:
+            yield self
+        finally:
+            self._depth -= 1
+            if not self._depth:
+                self._commit()
+
+    def _commit(self) -> None:
+        if not self._dirty:
+            return
+        changed = frozenset(self._dirty)
+        self._dirty.clear()
+        if self._on_commit is not None:
+            self._on_commit(changed)
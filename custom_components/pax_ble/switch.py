@@ -2,12 +2,10 @@ import logging
 
 from collections import namedtuple
 from homeassistant.components.switch import SwitchEntity
-from homeassistant.const import CONF_DEVICES
 from homeassistant.helpers.entity import EntityCategory
 
-from .const import DOMAIN, CONF_NAME
 from .const import DeviceModel
-from .entity import PaxCalimaEntity
+from .entity import PaxCalimaEntity, async_setup_fan_entities
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -55,36 +53,32 @@ SVENSA_ENTITIES = [
 
 async def async_setup_entry(hass, config_entry, async_add_devices):
     """Setup switch from a config entry created in the integrations UI."""
-    # Create entities
-    ha_entities = []
+    async_setup_fan_entities(hass, config_entry, async_add_devices, _fan_entities)
 
-    for device_id in config_entry.data[CONF_DEVICES]:
-        _LOGGER.debug(
-            "Starting paxcalima switches: %s",
-            config_entry.data[CONF_DEVICES][device_id][CONF_NAME],
-        )
 
-        # Find coordinator for this device
-        coordinator = hass.data[DOMAIN][config_entry.entry_id][CONF_DEVICES][device_id]
+def _fan_entities(coordinator) -> list:
+    """Create the switches of one fan."""
+    _LOGGER.debug("Starting paxcalima switches: %s", coordinator.devicename)
+    ha_entities = []
 
-        # Create entities for this device
-        for paxentity in ENTITIES:
-            ha_entities.append(PaxCalimaSwitchEntity(coordinator, paxentity))
+    # Create entities for this device
+    for paxentity in ENTITIES:
+        ha_entities.append(PaxCalimaSwitchEntity(coordinator, paxentity))
 
-        # Device specific entities
-        match coordinator._model:
-            case (
-                DeviceModel.CALIMA.value
-                | DeviceModel.SVARA.value
-                | DeviceModel.LEVANTE.value
-            ):
-                for paxentity in CALIMA_ENTITIES:
-                    ha_entities.append(PaxCalimaSwitchEntity(coordinator, paxentity))
-            case DeviceModel.SVENSA.value:
-                for paxentity in SVENSA_ENTITIES:
-                    ha_entities.append(PaxCalimaSwitchEntity(coordinator, paxentity))
+    # Device specific entities
+    match coordinator._model:
+        case (
+            DeviceModel.CALIMA.value
+            | DeviceModel.SVARA.value
+            | DeviceModel.LEVANTE.value
+        ):
+            for paxentity in CALIMA_ENTITIES:
+                ha_entities.append(PaxCalimaSwitchEntity(coordinator, paxentity))
+        case DeviceModel.SVENSA.value:
+            for paxentity in SVENSA_ENTITIES:
+                ha_entities.append(PaxCalimaSwitchEntity(coordinator, paxentity))
 
-    async_add_devices(ha_entities, True)
+    return ha_entities
 
 
 class PaxCalimaSwitchEntity(PaxCalimaEntity, SwitchEntity):
@@ -95,6 +89,12 @@ class PaxCalimaSwitchEntity(PaxCalimaEntity, SwitchEntity):
         super().__init__(coordinator, paxentity)
         self._paxattr = paxentity.attributes
 
+    @property
+    def _subscribed_keys(self) -> tuple[str, ...]:
+        if self._paxattr is not None:
+            return (self._key, self._paxattr.key)
+        return (self._key,)
+
     @property
     def is_on(self):
         """Return the state of the switch."""
@@ -111,7 +111,7 @@ class PaxCalimaSwitchEntity(PaxCalimaEntity, SwitchEntity):
             attrs.update(super().extra_state_attributes)
             return attrs
         else:
-            return None
+            return super().extra_state_attributes
 
     async def async_turn_on(self, **kwargs):
         _LOGGER.debug("Enabling %s", self._attr_name)
@@ -0,0 +1,137 @@
+"""Unit tests for devices/codecs (no Home Assistant runtime required)."""
+
+import datetime as dt
+import pathlib
+import sys
+import unittest
+
+from struct import pack
+
+# devices/ has no __init__.py; import it as a namespace package so codecs'
+# relative import of characteristics resolves without loading base_device.
+sys.path.insert(0, str(pathlib.Path(__file__).parent))
+from devices import codecs  # noqa: E402
+from devices.characteristics import *  # noqa: E402,F403
+
+
+def _calima_trigger_ladder(b):
+    """The bit tests Calima.getState used before the lookup table."""
+    trigger = "No trigger"
+    if ((b >> 4) & 1) == 1:
+        trigger = "Boost"
+    elif ((b >> 6) & 3) == 3:
+        trigger = "Switch"
+    elif (b & 3) == 1:
+        trigger = "Trickle ventilation"
+    elif (b & 3) == 2:
+        trigger = "Light ventilation"
+    elif (b & 3) == 3:
+        trigger = "Humidity ventilation"
+    return trigger
+
+
+def _svensa_trigger_match(b):
+    """The match Svensa.getState used before the lookup table."""
+    if b & 0x10:
+        return "Constant Speed"
+    return {
+        0: "Idle",
+        1: "Humidity",
+        2: "Light",
+        3: "Timer",
+        4: "Air Quality Sensor",
+        5: "Airing",
+        6: "Pause",
+        7: "Boost",
+    }.get(b & 0x0F, "Timer")
+
+
+class LookupTableTests(unittest.TestCase):
+    def test_tables_cover_every_byte(self):
+        for table in (codecs.MODES, codecs.CALIMA_TRIGGERS, codecs.SVENSA_TRIGGERS):
+            self.assertEqual(len(table), 256)
+
+    def test_triggers_match_previous_decoding(self):
+        for b in range(256):
+            self.assertEqual(codecs.CALIMA_TRIGGERS[b], _calima_trigger_ladder(b))
+            self.assertEqual(codecs.SVENSA_TRIGGERS[b], _svensa_trigger_match(b))
+
+    def test_modes(self):
+        self.assertEqual(codecs.MODES[0], "MultiMode")
+        self.assertEqual(codecs.MODES[4], "HeatDistributionMode")
+        self.assertEqual(codecs.MODES[9], "Unknown: 9")
+
+
+class CodecTests(unittest.TestCase):
+    def test_calima_sensor_data(self):
+        raw = pack("<4HBHB", 30 + 64, 4 * 23, 120, 1500, 0b00010000, 0, 0)
+        state = codecs.CALIMA_CODECS[CHARACTERISTIC_SENSOR_DATA].decode(raw)
+        self.assertIsInstance(state, codecs.CalimaFanState)
+        self.assertEqual(state.Humidity, 60.0)
+        self.assertAlmostEqual(state.Temp, 20.4)
+        self.assertEqual((state.Light, state.RPM, state.Mode), (120, 1500, "Boost"))
+
+    def test_svensa_sensor_data_without_reading(self):
+        raw = pack("<2B4H5B", 0, 7, 10, 400, 50, 1200, 0, 0, 0, 21, 0)
+        state = codecs.SVENSA_CODECS[CHARACTERISTIC_SENSOR_DATA].decode(raw)
+        self.assertIsNone(state.Humidity)
+        self.assertEqual((state.AirQuality, state.Temp, state.Mode), (400, 21, "Boost"))
+
+    def test_decodes_from_memoryview_and_longer_payload(self):
+        codec = codecs.BASE_CODECS[CHARACTERISTIC_BOOST]
+        raw = bytearray(pack("<BHH", 1, 2250, 600) + b"\x00\x00")
+        self.assertEqual(codec.decode(memoryview(raw)), codecs.BoostMode(1, 2250, 600))
+
+    def test_short_payload_is_rejected(self):
+        with self.assertRaises(Exception):
+            codecs.BASE_CODECS[CHARACTERISTIC_BOOST].decode(b"\x01\x00")
+
+    def test_scalar_and_converted_values(self):
+        self.assertEqual(codecs.BASE_CODECS[CHARACTERISTIC_PIN_CODE].decode(pack("<I", 1234)), 1234)
+        self.assertIs(codecs.BASE_CODECS[CHARACTERISTIC_PIN_CONFIRMATION].decode(b"\x01"), True)
+        self.assertEqual(codecs.BASE_CODECS[CHARACTERISTIC_MODE].decode(b"\x02"), codecs.MODES[2])
+
+    def test_inactive_settings_read_as_zero(self):
+        sensitivity = codecs.CALIMA_CODECS[CHARACTERISTIC_SENSITIVITY].decode(bytes((0, 2, 1, 3)))
+        self.assertEqual(sensitivity, codecs.Sensitivity(0, 0, 1, 3))
+        timer = codecs.SVENSA_CODECS[CHARACTERISTIC_TIME_FUNCTIONS].decode(pack("<3BH", 15, 0, 4, 1500))
+        self.assertEqual(timer, codecs.TimerFunctions(15, 0, 0, 1500))
+
+    def test_encode_round_trip(self):
+        codec = codecs.CALIMA_CODECS[CHARACTERISTIC_NIGHT_MODE]
+        start, end = dt.time(22, 30), dt.time(6, 0)
+        raw = codec.encode(1, start.hour, start.minute, end.hour, end.minute)
+        self.assertEqual(codec.decode(raw), codecs.SilentHours(1, 22, 30, 6, 0))
+
+
+class DecodeCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.cache = codecs.DecodeCache(codecs.BASE_CODECS)
+        self.raw = pack("<BHH", 1, 2250, 600)
+
+    def test_repeated_payload_reuses_decoding(self):
+        first = self.cache.decode(CHARACTERISTIC_BOOST, bytearray(self.raw))
+        self.assertFalse(self.cache.repeated(CHARACTERISTIC_BOOST))
+        second = self.cache.decode(CHARACTERISTIC_BOOST, bytearray(self.raw))
+        self.assertIs(second, first)
+        self.assertTrue(self.cache.repeated(CHARACTERISTIC_BOOST))
+
+    def test_invalidate_forces_decoding(self):
+        self.cache.decode(CHARACTERISTIC_BOOST, self.raw)
+        self.cache.invalidate(CHARACTERISTIC_BOOST)
+        self.cache.decode(CHARACTERISTIC_BOOST, self.raw)
+        self.assertFalse(self.cache.repeated(CHARACTERISTIC_BOOST))
+
+    def test_fingerprint_follows_distinct_payloads(self):
+        other = codecs.DecodeCache(codecs.BASE_CODECS)
+        for raw in (self.raw, self.raw, pack("<BHH", 0, 0, 0)):
+            self.cache.decode(CHARACTERISTIC_BOOST, raw)
+        for raw in (self.raw, pack("<BHH", 0, 0, 0)):
+            other.decode(CHARACTERISTIC_BOOST, raw)
+        history = self.cache.as_dict()[CHARACTERISTIC_BOOST]
+        self.assertEqual((history["reads"], history["changes"]), (3, 2))
+        self.assertEqual(history["fingerprint"], other.as_dict()[CHARACTERISTIC_BOOST]["fingerprint"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+"""Unit tests for deadband (no Home Assistant runtime required)."""
+
+import importlib.util
+import pathlib
+import unittest
+
+_MODULE_PATH = pathlib.Path(__file__).with_name("deadband.py")
+_SPEC = importlib.util.spec_from_file_location("deadband", _MODULE_PATH)
+deadband = importlib.util.module_from_spec(_SPEC)
+assert _SPEC.loader is not None
+_SPEC.loader.exec_module(deadband)
+
+Deadband = deadband.Deadband
+SignificantChangeFilter = deadband.SignificantChangeFilter
+
+
+class SignificantChangeFilterTests(unittest.TestCase):
+    def test_first_value_is_always_published(self):
+        f = SignificantChangeFilter(Deadband(absolute=0.5))
+        self.assertTrue(f.accept(21.0, 0))
+        self.assertEqual(f.value, 21.0)
+
+    def test_absolute_threshold(self):
+        f = SignificantChangeFilter(Deadband(absolute=0.5))
+        f.accept(21.0, 0)
+        self.assertFalse(f.accept(21.25, 1))
+        self.assertTrue(f.accept(21.5, 2))
+        self.assertEqual(f.value, 21.5)
+
+    def test_larger_of_absolute_and_relative_threshold_applies(self):
+        f = SignificantChangeFilter(Deadband(absolute=50, relative=0.05))
+        f.accept(2000, 0)
+        # 5% of 2000 is 100, which beats the absolute 50
+        self.assertFalse(f.accept(2080, 1))
+        self.assertTrue(f.accept(2100, 2))
+
+    def test_unknown_transitions_are_published(self):
+        f = SignificantChangeFilter(Deadband(absolute=1.0))
+        f.accept(45.0, 0)
+        self.assertTrue(f.accept(None, 1))
+        self.assertTrue(f.accept(45.2, 2))
+
+    def test_max_silence_publishes_small_change(self):
+        f = SignificantChangeFilter(Deadband(absolute=1.0, max_silence=900))
+        f.accept(45.0, 0)
+        self.assertFalse(f.accept(45.5, 100))
+        self.assertEqual(f.due_in(100), 800)
+        self.assertTrue(f.accept(45.5, 900))
+        self.assertEqual(f.due_in(900), 900)
+
+    def test_unchanged_value_is_not_republished(self):
+        f = SignificantChangeFilter(Deadband(max_silence=10))
+        f.accept(1200, 0)
+        self.assertFalse(f.accept(1200, 100))
+
+
+if __name__ == "__main__":
+    unittest.main()
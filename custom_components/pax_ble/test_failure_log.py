@@ -0,0 +1,74 @@
+"""Unit tests for failure_log (no Home Assistant runtime required)."""
+
+import importlib.util
+import logging
+import pathlib
+import unittest
+
+_MODULE_PATH = pathlib.Path(__file__).with_name("failure_log.py")
+_SPEC = importlib.util.spec_from_file_location("failure_log", _MODULE_PATH)
+failure_log = importlib.util.module_from_spec(_SPEC)
+assert _SPEC.loader is not None
+_SPEC.loader.exec_module(failure_log)
+
+_LOGGER = logging.getLogger("pax_ble.test_failure_log")
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FailureLogTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.notes = []
+        self.log = failure_log.FailureLog("aa:bb", self.clock, self.notes.append)
+
+    def warnings(self, logs):
+        return [record for record in logs.records if record.levelno == logging.WARNING]
+
+    def test_first_failure_in_full_then_debug(self):
+        with self.assertLogs(_LOGGER, logging.DEBUG) as logs:
+            for _ in range(3):
+                self.log.warning(
+                    _LOGGER, "connect", TimeoutError(), "Failed to connect %s", "aa:bb"
+                )
+        self.assertEqual(len(self.warnings(logs)), 1)
+        self.assertEqual(len(logs.records), 3)
+        self.assertEqual(self.notes, ["Failed to connect aa:bb"] * 2)
+
+    def test_error_classes_kept_apart(self):
+        with self.assertLogs(_LOGGER, logging.WARNING) as logs:
+            self.log.warning(_LOGGER, "connect", TimeoutError(), "timeout")
+            self.log.warning(_LOGGER, "connect", "not found", "not found")
+            self.log.warning(_LOGGER, "clock sync", TimeoutError(), "timeout")
+        self.assertEqual(len(logs.records), 3)
+
+    def test_periodic_summary(self):
+        with self.assertLogs(_LOGGER, logging.WARNING) as logs:
+            for _ in range(42):
+                self.clock.now += 15
+                self.log.warning(_LOGGER, "connect", TimeoutError(), "timeout")
+        messages = [record.getMessage() for record in logs.records]
+        self.assertEqual(len(messages), 2)
+        self.assertIn("40 more connect failures (TimeoutError) in 10 min", messages[1])
+
+    def test_resolved(self):
+        with self.assertLogs(_LOGGER, logging.WARNING):
+            for _ in range(3):
+                self.log.warning(_LOGGER, "connect", TimeoutError(), "timeout")
+        self.assertEqual(self.log.as_dict()["connect: TimeoutError"]["failures"], 3)
+        with self.assertLogs(_LOGGER, logging.INFO) as logs:
+            self.log.resolved(_LOGGER, "connect")
+        self.assertIn("after 3 failures", logs.records[0].getMessage())
+        self.assertEqual(self.log.as_dict(), {})
+        with self.assertLogs(_LOGGER, logging.WARNING):
+            self.log.warning(_LOGGER, "connect", TimeoutError(), "timeout")
+
+
+if __name__ == "__main__":
+    unittest.main()
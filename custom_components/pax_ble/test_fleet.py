@@ -0,0 +1,50 @@
+"""Unit tests for fleet's connection slots.
+
+Needs Home Assistant installed; run from the repository root with
+python -m unittest custom_components.pax_ble.test_fleet
+"""
+
+import unittest
+
+from custom_components.pax_ble.fleet import ConnectionSlots
+
+
+class ConnectionSlotsTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.slots = ConnectionSlots(None, per_route=1)
+        self.slots.route = lambda mac: "proxy"
+        self.released = []
+
+    def release(self, mac):
+        async def release():
+            self.released.append(mac)
+            self.slots.unhold(mac)
+
+        return release
+
+    async def test_held_link_released_for_another_fan(self):
+        self.slots.hold("aa", self.release("aa"))
+        async with self.slots.acquire("bb"):
+            self.assertEqual(self.slots.free("proxy"), 0)
+        self.assertEqual(self.released, ["aa"])
+        self.assertEqual(self.slots.as_dict()["proxy"]["held"], 0)
+
+    async def test_own_held_link_kept(self):
+        self.slots.hold("aa", self.release("aa"))
+        async with self.slots.acquire("aa"):
+            pass
+        self.assertEqual(self.released, [])
+
+    async def test_dropped_link_not_released_again(self):
+        # A prepared link that dropped unexpectedly is unheld by the
+        # coordinator's disconnect callback
+        self.slots.hold("aa", self.release("aa"))
+        self.slots.unhold("aa")
+        async with self.slots.acquire("bb"):
+            pass
+        self.assertEqual(self.released, [])
+        self.assertEqual(self.slots.free("proxy"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+"""Unit tests for latency (no Home Assistant runtime required)."""
+
+import importlib.util
+import pathlib
+import unittest
+
+_MODULE_PATH = pathlib.Path(__file__).with_name("latency.py")
+_SPEC = importlib.util.spec_from_file_location("latency", _MODULE_PATH)
+latency = importlib.util.module_from_spec(_SPEC)
+assert _SPEC.loader is not None
+_SPEC.loader.exec_module(latency)
+
+LatencyHistogram = latency.LatencyHistogram
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Cancelled(BaseException):
+    """Stands in for asyncio.CancelledError, which is no Exception either."""
+
+
+def make_recorder(clock=None):
+    return latency.LatencyRecorder(clock or FakeClock())
+
+
+class LatencyHistogramTests(unittest.TestCase):
+    def test_empty(self):
+        histogram = LatencyHistogram()
+        self.assertIsNone(histogram.percentile(50))
+        self.assertIsNone(histogram.success_ratio)
+        self.assertEqual(histogram.as_dict()["count"], 0)
+
+    def test_percentiles_within_buckets(self):
+        histogram = LatencyHistogram()
+        for _ in range(98):
+            histogram.add(0.15)  # 0.1 - 0.2 bucket
+        histogram.add(3.0)  # 2 - 5 bucket
+        histogram.add(30.0)  # 20 - 45 bucket
+        self.assertTrue(0.1 <= histogram.percentile(50) <= 0.2)
+        self.assertTrue(0.1 <= histogram.percentile(95) <= 0.2)
+        self.assertTrue(2.0 <= histogram.percentile(99) <= 5.0)
+
+    def test_open_ended_bucket(self):
+        histogram = LatencyHistogram()
+        histogram.add(120.0)
+        self.assertEqual(histogram.percentile(50), latency.BUCKET_BOUNDS[-1])
+
+    def test_failures_and_reasons(self):
+        histogram = LatencyHistogram()
+        histogram.add(1.0)
+        histogram.add(2.0, "TimeoutError")
+        histogram.add(2.0, "TimeoutError")
+        self.assertEqual(histogram.successes, 1)
+        self.assertEqual(histogram.failures, 2)
+        self.assertEqual(histogram.reasons, {"TimeoutError": 2})
+        self.assertAlmostEqual(histogram.success_ratio, 1 / 3)
+
+    def test_reasons_are_bounded(self):
+        histogram = LatencyHistogram()
+        for index in range(latency.MAX_REASONS + 5):
+            histogram.add(1.0, f"reason {index}")
+        self.assertEqual(len(histogram.reasons), latency.MAX_REASONS + 1)
+        self.assertEqual(histogram.reasons[latency.OTHER_REASON], 5)
+
+    def test_success_ratio_is_recent(self):
+        histogram = LatencyHistogram()
+        for _ in range(latency.RECENT):
+            histogram.add(1.0, "failed")
+        for _ in range(latency.RECENT):
+            histogram.add(1.0)
+        self.assertEqual(histogram.success_ratio, 1.0)
+
+
+class LatencyRecorderTests(unittest.TestCase):
+    def test_measure_success_and_fail(self):
+        clock = FakeClock()
+        recorder = make_recorder(clock)
+        with recorder.measure("read"):
+            clock.now += 0.3
+        self.assertAlmostEqual(recorder.get("read").last, 0.3)
+        with recorder.measure("read") as timing:
+            timing.fail("invalid")
+        histogram = recorder.get("read")
+        self.assertEqual((histogram.successes, histogram.failures), (1, 1))
+        self.assertEqual(histogram.reasons, {"invalid": 1})
+
+    def test_measure_exception(self):
+        recorder = make_recorder()
+        with self.assertRaises(ValueError):
+            with recorder.measure("write"):
+                raise ValueError("bad")
+        self.assertEqual(recorder.get("write").reasons, {"ValueError": 1})
+
+    def test_cancelled_not_counted(self):
+        recorder = make_recorder()
+        with self.assertRaises(Cancelled):
+            with recorder.measure("connect"):
+                raise Cancelled
+        self.assertEqual(recorder.get("connect"), None)
+
+    def test_merged(self):
+        first, second = make_recorder(), make_recorder()
+        with first.measure("read"):
+            pass
+        with second.measure("read") as timing:
+            timing.fail("invalid")
+        result = latency.merged((first, second))
+        self.assertEqual(result["read"]["count"], 2)
+        self.assertEqual(result["read"]["failures"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""Unit tests for profiler (no Home Assistant runtime required)."""
+
+import importlib.util
+import json
+import pathlib
+import tempfile
+import tracemalloc
+import unittest
+
+_MODULE_PATH = pathlib.Path(__file__).with_name("profiler.py")
+_SPEC = importlib.util.spec_from_file_location("profiler", _MODULE_PATH)
+profiler = importlib.util.module_from_spec(_SPEC)
+assert _SPEC.loader is not None
+_SPEC.loader.exec_module(profiler)
+
+_ROOT = str(_MODULE_PATH.parent)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ProfilerTests(unittest.TestCase):
+    def tearDown(self):
+        profiler.stop()
+
+    def test_idle_sections_not_recorded(self):
+        with profiler.section("decode"):
+            pass
+        self.assertIsNone(profiler.active())
+
+    def test_sections_timed(self):
+        clock = FakeClock()
+        session = profiler.Profiler(clock, False, _ROOT)
+        profiler.start(session)
+        for elapsed in (0.001, 0.003):
+            with profiler.section("decode"):
+                clock.now += elapsed
+        clock.now += 0.996
+        self.assertIs(profiler.stop(), session)
+        report = session.report()
+        self.assertEqual(report["duration_s"], 1.0)
+        decode = report["sections"]["decode"]
+        self.assertEqual(decode["count"], 2)
+        self.assertEqual(decode["total_ms"], 4.0)
+        self.assertEqual(decode["max_ms"], 3.0)
+        self.assertEqual(decode["share_of_duration"], 0.004)
+        self.assertIsNone(report["allocations"])
+
+    def test_exception_propagates(self):
+        profiler.start(profiler.Profiler(FakeClock(), False, _ROOT))
+        with self.assertRaises(ValueError):
+            with profiler.section("decode"):
+                raise ValueError
+
+    def test_one_profile_at_a_time(self):
+        profiler.start(profiler.Profiler(FakeClock(), False, _ROOT))
+        with self.assertRaises(RuntimeError):
+            profiler.start(profiler.Profiler(FakeClock(), False, _ROOT))
+
+    def test_allocations(self):
+        session = profiler.Profiler(FakeClock(), True, _ROOT)
+        profiler.start(session)
+        with profiler.section("build"):
+            kept = [bytearray(1024) for _ in range(100)]
+        profiler.stop()
+        self.assertFalse(tracemalloc.is_tracing())
+        report = session.report()
+        self.assertGreater(report["sections"]["build"]["allocated_kib"], 90)
+        self.assertTrue(
+            any(top["line"].startswith("test_profiler.py:")
+                for top in report["allocations"]["top"])
+        )
+        del kept
+
+    def test_write_report(self):
+        session = profiler.Profiler(FakeClock(), False, _ROOT)
+        profiler.start(session)
+        profiler.stop()
+        with tempfile.TemporaryDirectory() as directory:
+            path = str(pathlib.Path(directory) / "profile.json")
+            report = profiler.write_report(path, session, {"fans": 30})
+            self.assertEqual(report["fans"], 30)
+            self.assertEqual(json.loads(pathlib.Path(path).read_text()), report)
+
+
+if __name__ == "__main__":
+    unittest.main()
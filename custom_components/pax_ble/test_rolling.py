@@ -0,0 +1,66 @@
+"""Unit tests for rolling (no Home Assistant runtime required)."""
+
+import importlib.util
+import pathlib
+import unittest
+
+_MODULE_PATH = pathlib.Path(__file__).with_name("rolling.py")
+_SPEC = importlib.util.spec_from_file_location("rolling", _MODULE_PATH)
+rolling = importlib.util.module_from_spec(_SPEC)
+assert _SPEC.loader is not None
+_SPEC.loader.exec_module(rolling)
+
+RollingStatistics = rolling.RollingStatistics
+
+
+class RollingStatisticsTests(unittest.TestCase):
+    def test_empty_window(self):
+        stats = RollingStatistics(("humidity",), (300,), 16)
+        self.assertEqual(stats.stats("humidity", 300).count, 0)
+
+    def test_min_max_mean_slope(self):
+        stats = RollingStatistics(("humidity",), (300,), 16)
+        for t, value in ((0, 40.0), (60, 42.0), (120, 44.0), (180, 46.0)):
+            stats.add(t, {"humidity": value})
+        result = stats.stats("humidity", 300)
+        self.assertEqual(result.count, 4)
+        self.assertEqual(result.min, 40.0)
+        self.assertEqual(result.max, 46.0)
+        self.assertAlmostEqual(result.mean, 43.0)
+        self.assertAlmostEqual(result.slope * 60, 2.0)
+
+    def test_old_samples_leave_the_window(self):
+        stats = RollingStatistics(("rpm",), (100, 1000), 64)
+        stats.add(0, {"rpm": 3000})
+        for t in range(50, 501, 50):
+            stats.add(t, {"rpm": 1000})
+        self.assertEqual(stats.stats("rpm", 100).max, 1000)
+        self.assertEqual(stats.stats("rpm", 100).count, 3)
+        self.assertEqual(stats.stats("rpm", 1000).max, 3000)
+
+    def test_window_is_limited_by_ring_capacity(self):
+        stats = RollingStatistics(("rpm",), (10_000,), 4)
+        for t, value in enumerate((5, 1, 2, 3, 4)):
+            stats.add(t, {"rpm": value})
+        result = stats.stats("rpm", 10_000)
+        self.assertEqual(len(stats), 4)
+        self.assertEqual(result.count, 4)
+        self.assertEqual(result.max, 4)
+        self.assertEqual(result.min, 1)
+
+    def test_missing_values_are_skipped(self):
+        stats = RollingStatistics(("humidity", "rpm"), (300,), 8)
+        stats.add(0, {"humidity": None, "rpm": 1000})
+        stats.add(10, {"humidity": 50.0, "rpm": 1000})
+        self.assertEqual(stats.stats("humidity", 300).count, 1)
+        self.assertIsNone(stats.stats("humidity", 300).slope)
+
+    def test_slope_stays_exact_over_long_runs(self):
+        stats = RollingStatistics(("temperature",), (600,), 32)
+        for step in range(5000):
+            stats.add(1_000_000 + step * 60, {"temperature": 20 + step * 0.01})
+        self.assertAlmostEqual(stats.stats("temperature", 600).slope * 60, 0.01)
+
+
+if __name__ == "__main__":
+    unittest.main()
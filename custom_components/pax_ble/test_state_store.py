@@ -0,0 +1,107 @@
+"""Unit tests for state_store (no Home Assistant runtime required)."""
+
+import datetime as dt
+import importlib.util
+import pathlib
+import unittest
+
+_MODULE_PATH = pathlib.Path(__file__).with_name("state_store.py")
+_SPEC = importlib.util.spec_from_file_location("state_store", _MODULE_PATH)
+state_store = importlib.util.module_from_spec(_SPEC)
+assert _SPEC.loader is not None
+_SPEC.loader.exec_module(state_store)
+
+StateStore = state_store.StateStore
+
+_SCHEMA = {
+    "rpm": int,
+    "temperature": float,
+    "boostmode": bool,
+    "silenthours_starttime": dt.time,
+}
+
+
+class StateStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.commits = []
+        self.store = StateStore(_SCHEMA, self.commits.append)
+
+    def test_unset_keys_read_as_none(self):
+        self.assertIsNone(self.store.get("rpm"))
+        self.assertNotIn("rpm", self.store)
+        self.assertIsNone(self.store.last_updated("rpm"))
+
+    def test_unknown_key_is_rejected(self):
+        with self.assertRaises(KeyError):
+            self.store["unknown"] = 1
+
+    def test_values_are_coerced_to_schema_type(self):
+        self.store["rpm"] = "1200.0"
+        self.store["boostmode"] = 1
+        self.store["silenthours_starttime"] = "22:30:00"
+        self.assertEqual(self.store["rpm"], 1200)
+        self.assertIs(self.store["boostmode"], True)
+        self.assertEqual(self.store["silenthours_starttime"], dt.time(22, 30))
+
+    def test_bool_strings_are_parsed(self):
+        for value, expected in (("false", False), ("0", False), ("off", False),
+                                ("On", True), ("true", True), (0, False)):
+            self.store["boostmode"] = value
+            self.assertIs(self.store["boostmode"], expected)
+        for value in ("maybe", 2, [True]):
+            with self.assertRaises(ValueError):
+                self.store["boostmode"] = value
+
+    def test_single_write_commits_only_on_change(self):
+        self.assertTrue(self.store.set("rpm", 1200))
+        self.assertFalse(self.store.set("rpm", 1200))
+        self.assertEqual(self.commits, [frozenset({"rpm"})])
+
+    def test_unchanged_write_refreshes_timestamp(self):
+        self.store.set("rpm", 1200, timestamp=100.0)
+        self.store.set("rpm", 1200, timestamp=200.0)
+        self.assertEqual(self.store.last_updated("rpm"), 200.0)
+
+    def test_confirm_refreshes_timestamps_without_commit(self):
+        self.store.set("rpm", 1200, timestamp=100.0)
+        self.commits.clear()
+        self.store.confirm(("rpm", "temperature"), timestamp=200.0)
+        self.assertEqual(self.store.last_updated("rpm"), 200.0)
+        self.assertEqual(self.store["rpm"], 1200)
+        self.assertIsNone(self.store.last_updated("temperature"))
+        self.assertEqual(self.commits, [])
+
+    def test_transaction_commits_once(self):
+        self.store["rpm"] = 1200
+        self.commits.clear()
+        with self.store.transaction() as state:
+            state["rpm"] = 1200
+            state["temperature"] = 21.5
+            with state.transaction():
+                state["boostmode"] = True
+            self.assertEqual(self.commits, [])
+        self.assertEqual(self.commits, [frozenset({"temperature", "boostmode"})])
+
+    def test_transaction_without_changes_does_not_commit(self):
+        self.store.update({"rpm": 1200})
+        self.commits.clear()
+        self.assertEqual(self.store.update({"rpm": 1200}), frozenset())
+        self.assertEqual(self.commits, [])
+
+    def test_export_restore_round_trip(self):
+        self.store.set("rpm", 1200, timestamp=100.0)
+        self.store.set("silenthours_starttime", dt.time(22, 30), timestamp=50.0)
+        exported = self.store.export()
+        self.assertEqual(exported["silenthours_starttime"], ["22:30:00", 50.0])
+        self.assertNotIn("temperature", exported)
+
+        other = StateStore(_SCHEMA)
+        exported["removed_key"] = [1, 10.0]
+        restored = other.restore(exported)
+        self.assertEqual(restored, {"rpm": 100.0, "silenthours_starttime": 50.0})
+        self.assertEqual(other["silenthours_starttime"], dt.time(22, 30))
+        self.assertEqual(other.last_updated("rpm"), 100.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
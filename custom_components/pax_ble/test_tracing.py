@@ -0,0 +1,119 @@
+"""Unit tests for tracing (no Home Assistant runtime required)."""
+
+import importlib.util
+import json
+import pathlib
+import tempfile
+import unittest
+
+_MODULE_PATH = pathlib.Path(__file__).with_name("tracing.py")
+_SPEC = importlib.util.spec_from_file_location("tracing", _MODULE_PATH)
+tracing = importlib.util.module_from_spec(_SPEC)
+assert _SPEC.loader is not None
+_SPEC.loader.exec_module(tracing)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TracingTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.buffer = tracing.TraceBuffer(3, self.clock, lambda: 0.0)
+
+    def test_spans_recorded_in_trace(self):
+        with self.buffer.record("poll", "Bathroom"):
+            with tracing.span("connect", source="proxy") as step:
+                self.clock.now += 0.5
+            self.assertEqual(step.attrs, {"source": "proxy"})
+            with tracing.span("read", characteristic="SENSOR_DATA"):
+                self.clock.now += 0.1
+        trace = self.buffer.as_list()[0]
+        self.assertEqual(trace["kind"], "poll")
+        self.assertEqual(trace["outcome"], "ok")
+        self.assertEqual(trace["duration_ms"], 600.0)
+        self.assertEqual([s["name"] for s in trace["spans"]], ["connect", "read"])
+        self.assertEqual(trace["spans"][1]["start_ms"], 500.0)
+        self.assertEqual(trace["spans"][0]["source"], "proxy")
+
+    def test_failed_span_fails_trace(self):
+        with self.buffer.record("poll", "Bathroom"):
+            with self.assertRaises(ValueError):
+                with tracing.span("read"):
+                    raise ValueError
+            with tracing.span("validate") as step:
+                step.fail("invalid")
+        trace = self.buffer.as_list()[0]
+        self.assertEqual(trace["outcome"], "failed")
+        self.assertEqual(trace["spans"][0]["error"], "ValueError")
+        self.assertEqual(trace["spans"][1]["error"], "invalid")
+
+    def test_span_without_trace(self):
+        with tracing.span("connect") as step:
+            step.fail("timeout")
+        self.assertEqual(step.error, "timeout")
+        self.assertEqual(self.buffer.as_list(), [])
+
+    def test_nested_record_joins_running_trace(self):
+        with self.buffer.record("write", "Bathroom"):
+            with self.buffer.record("poll", "Bathroom"):
+                with tracing.span("read"):
+                    pass
+        traces = self.buffer.as_list()
+        self.assertEqual(len(traces), 1)
+        self.assertEqual(traces[0]["kind"], "write")
+        self.assertIsNone(tracing.current_trace())
+
+    def test_ring_is_bounded(self):
+        for index in range(5):
+            with self.buffer.record("poll", f"fan {index}"):
+                pass
+        self.assertEqual(
+            [trace["fan"] for trace in self.buffer.as_list()],
+            ["fan 2", "fan 3", "fan 4"],
+        )
+
+    def test_spans_are_bounded(self):
+        with self.buffer.record("poll", "Bathroom"):
+            for _ in range(tracing.MAX_SPANS + 2):
+                with tracing.span("read"):
+                    pass
+        trace = self.buffer.as_list()[0]
+        self.assertEqual(len(trace["spans"]), tracing.MAX_SPANS)
+        self.assertEqual(trace["dropped_spans"], 2)
+
+    def test_on_finish(self):
+        finished = []
+        self.buffer.on_finish = finished.append
+        with self.buffer.record("poll", "Bathroom"):
+            pass
+        self.assertEqual(len(finished), 1)
+
+    def test_notes(self):
+        tracing.note("not kept")
+        with self.buffer.record("poll", "Bathroom"):
+            self.clock.now += 0.2
+            tracing.note("Failed to connect")
+        trace = self.buffer.as_list()[0]
+        self.assertEqual(
+            trace["notes"], [{"at_ms": 200.0, "message": "Failed to connect"}]
+        )
+
+    def test_export_rotates(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = str(pathlib.Path(directory) / "traces.jsonl")
+            tracing.export_traces(path, [{"n": 1}, {"n": 2}], 10)
+            tracing.export_traces(path, [{"n": 3}], 10)
+            lines = pathlib.Path(path).read_text().splitlines()
+            self.assertEqual([json.loads(line) for line in lines], [{"n": 3}])
+            rotated = pathlib.Path(f"{path}.1").read_text().splitlines()
+            self.assertEqual(len(rotated), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
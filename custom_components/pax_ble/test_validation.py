@@ -0,0 +1,47 @@
+"""Unit tests for devices/validation (no Home Assistant runtime required)."""
+
+import pathlib
+import sys
+import unittest
+
+# devices/ has no __init__.py; import it as a namespace package
+sys.path.insert(0, str(pathlib.Path(__file__).parent))
+from devices import validation  # noqa: E402
+
+
+class ValidationTests(unittest.TestCase):
+    def test_fan_speed_settings(self):
+        validation.validate_fan_speed_settings(2250, 1625, 1000)
+        with self.assertRaises(ValueError):
+            validation.validate_fan_speed_settings(2250, 1630, 1000)
+        with self.assertRaises(ValueError):
+            validation.validate_fan_speed_settings(2525, 1625, 1000)
+
+    def test_light_sensor_settings(self):
+        validation.validate_light_sensor_settings(0, 5)
+        validation.validate_light_sensor_settings(10, 60)
+        with self.assertRaises(ValueError):
+            validation.validate_light_sensor_settings(11, 30)
+        with self.assertRaises(ValueError):
+            validation.validate_light_sensor_settings(2, 4)
+
+    def test_timer_functions(self):
+        validation.validate_timer_functions(15, True, 2, 1500)
+        with self.assertRaises(ValueError):
+            validation.validate_timer_functions(20, True, 2, 1500)
+        with self.assertRaises(ValueError):
+            validation.validate_timer_functions(15, True, 3, 1500)
+
+    def test_speeds_must_be_multiples_of_25(self):
+        validation.validate_boost_mode(True, 2400, 600)
+        for check in (
+            lambda: validation.validate_boost_mode(True, 2410, 600),
+            lambda: validation.validate_constant_operation(True, 1010),
+            lambda: validation.validate_humidity(True, 2, 1010),
+        ):
+            with self.assertRaises(ValueError):
+                check()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,12 +3,10 @@ import logging
 from collections import namedtuple
 from datetime import time
 from homeassistant.components.time import TimeEntity
-from homeassistant.const import CONF_DEVICES
 from homeassistant.helpers.entity import EntityCategory
 
-from .const import DOMAIN, CONF_NAME
 from .const import DeviceModel
-from .entity import PaxCalimaEntity
+from .entity import PaxCalimaEntity, async_setup_fan_entities
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -31,32 +29,28 @@ CALIMA_ENTITIES = [
 
 async def async_setup_entry(hass, config_entry, async_add_devices):
     """Setup switch from a config entry created in the integrations UI."""
-    # Create entities
+    async_setup_fan_entities(hass, config_entry, async_add_devices, _fan_entities)
+
+
+def _fan_entities(coordinator) -> list:
+    """Create the times of one fan."""
+    _LOGGER.debug("Starting paxcalima times: %s", coordinator.devicename)
     ha_entities = []
 
-    for device_id in config_entry.data[CONF_DEVICES]:
-        _LOGGER.debug(
-            "Starting paxcalima times: %s",
-            config_entry.data[CONF_DEVICES][device_id][CONF_NAME],
-        )
-
-        # Find coordinator for this device
-        coordinator = hass.data[DOMAIN][config_entry.entry_id][CONF_DEVICES][device_id]
-
-        # Device specific entities
-        match coordinator._model:
-            case (
-                DeviceModel.CALIMA.value
-                | DeviceModel.SVARA.value
-                | DeviceModel.LEVANTE.value
-            ):
-                for paxentity in CALIMA_ENTITIES:
-                    ha_entities.append(PaxCalimaTimeEntity(coordinator, paxentity))
-            case DeviceModel.SVENSA.value:
-                # Svensa does not support these entities
-                pass
-
-    async_add_devices(ha_entities, True)
+    # Device specific entities
+    match coordinator._model:
+        case (
+            DeviceModel.CALIMA.value
+            | DeviceModel.SVARA.value
+            | DeviceModel.LEVANTE.value
+        ):
+            for paxentity in CALIMA_ENTITIES:
+                ha_entities.append(PaxCalimaTimeEntity(coordinator, paxentity))
+        case DeviceModel.SVENSA.value:
+            # Svensa does not support these entities
+            pass
+
+    return ha_entities
 
 
 class PaxCalimaTimeEntity(PaxCalimaEntity, TimeEntity):
@@ -0,0 +1,200 @@
+"""Structured traces of what a poll or write did, step by step.
+
+Kept free of homeassistant imports so it can be unit tested on its own.
+"""
+
+import json
+import os
+
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any
+
+MAX_SPANS = 100  # Steps kept per trace; more are only counted
+MAX_NOTES = 20  # Log messages kept per trace
+
+_current: ContextVar["Trace | None"] = ContextVar("pax_ble_trace", default=None)
+
+
+class Span:
+    """One step of a trace: its start, duration, outcome and details."""
+
+    __slots__ = ("name", "start", "duration", "error", "attrs")
+
+    def __init__(self, name: str, start: float, attrs: dict[str, Any]) -> None:
+        self.name = name
+        self.start = start
+        self.duration: float | None = None
+        self.error: str | None = None
+        self.attrs = attrs
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def fail(self, reason: str | BaseException) -> None:
+        if isinstance(reason, BaseException):
+            reason = type(reason).__name__
+        self.error = reason
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "start_ms": round(self.start * 1000, 1),
+            "duration_ms": (
+                None if self.duration is None else round(self.duration * 1000, 1)
+            ),
+            "outcome": "ok" if self.error is None else "failed",
+            **({"error": self.error} if self.error is not None else {}),
+            **self.attrs,
+        }
+
+
+class Trace:
+    """The steps of one poll, write or other session with a fan."""
+
+    def __init__(self, kind: str, fan: str, at: float, clock: Callable[[], float]) -> None:
+        self.kind = kind
+        self.fan = fan
+        self.at = at
+        self._clock = clock
+        self._started = clock()
+        self.duration: float | None = None
+        self.error: str | None = None
+        self.spans: list[Span] = []
+        self.dropped = 0
+        self.notes: list[dict[str, Any]] = []
+
+    def begin(self, name: str, attrs: dict[str, Any]) -> Span:
+        span = Span(name, self._clock() - self._started, attrs)
+        if len(self.spans) < MAX_SPANS:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+        return span
+
+    def end(self, span: Span) -> None:
+        span.duration = self._clock() - self._started - span.start
+
+    def fail(self, reason: str | BaseException) -> None:
+        if isinstance(reason, BaseException):
+            reason = type(reason).__name__
+        self.error = reason
+
+    def note(self, message: str) -> None:
+        if len(self.notes) < MAX_NOTES:
+            offset = self._clock() - self._started
+            self.notes.append({"at_ms": round(offset * 1000, 1), "message": message})
+
+    def finish(self) -> None:
+        self.duration = self._clock() - self._started
+
+    @property
+    def failed(self) -> bool:
+        return self.error is not None or any(span.error for span in self.spans)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "fan": self.fan,
+            "at": datetime.fromtimestamp(self.at, timezone.utc).isoformat(),
+            "duration_ms": (
+                None if self.duration is None else round(self.duration * 1000, 1)
+            ),
+            "outcome": "failed" if self.failed else "ok",
+            **({"error": self.error} if self.error is not None else {}),
+            "spans": [span.as_dict() for span in self.spans],
+            **({"dropped_spans": self.dropped} if self.dropped else {}),
+            **({"notes": list(self.notes)} if self.notes else {}),
+        }
+
+
+def current_trace() -> Trace | None:
+    return _current.get()
+
+
+def note(message: str) -> None:
+    """Keep a log message with the running trace, if any."""
+    if (trace := _current.get()) is not None:
+        trace.note(message)
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Span]:
+    """Record a step in the running trace; an exception marks it failed.
+
+    Without a running trace the span is not kept, but can still be
+    failed and read back by the caller.
+    """
+    trace = _current.get()
+    if trace is None:
+        yield Span(name, 0.0, attrs)
+        return
+    step = trace.begin(name, attrs)
+    try:
+        yield step
+    except BaseException as err:
+        step.fail(err)
+        raise
+    finally:
+        trace.end(step)
+
+
+class TraceBuffer:
+    """The latest traces of a fan, in a ring of fixed capacity.
+
+    clock times the steps, time.monotonic in use; wall_clock dates the
+    traces, time.time in use. on_finish is given every finished trace.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        clock: Callable[[], float],
+        wall_clock: Callable[[], float],
+    ) -> None:
+        self._traces: deque[Trace] = deque(maxlen=capacity)
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self.on_finish: Callable[[Trace], None] | None = None
+
+    @contextmanager
+    def record(self, kind: str, fan: str) -> Iterator[Trace]:
+        """Trace the block; a trace already running takes its steps instead."""
+        if (running := _current.get()) is not None:
+            yield running
+            return
+        trace = Trace(kind, fan, self._wall_clock(), self._clock)
+        token = _current.set(trace)
+        try:
+            yield trace
+        except BaseException as err:
+            trace.fail(err)
+            raise
+        finally:
+            _current.reset(token)
+            trace.finish()
+            self._traces.append(trace)
+            if self.on_finish is not None:
+                self.on_finish(trace)
+
+    def as_list(self) -> list[dict[str, Any]]:
+        return [trace.as_dict() for trace in self._traces]
+
+
+def export_traces(path: str, traces: Iterable[dict[str, Any]], max_bytes: int) -> None:
+    """Append traces to a JSON lines file. Blocking; run in the executor.
+
+    A file grown past max_bytes is moved to path.1, replacing the one
+    before, and a new file is started.
+    """
+    try:
+        if os.path.getsize(path) > max_bytes:
+            os.replace(path, f"{path}.1")
+    except FileNotFoundError:
+        pass
+    with open(path, "a", encoding="utf-8") as file:
+        for trace in traces:
+            file.write(json.dumps(trace) + "\n")